@@ -1,9 +1,8 @@
 import json
 import shlex
-import subprocess
 from dataclasses import dataclass, field
 from typing import List, Any, Dict
-from urllib.parse import urlparse
+from urllib.parse import parse_qsl, quote_plus, urlparse
 
 from keboola.component import UserException
 
@@ -95,9 +94,120 @@ def normalize_url_in_curl(curl_command: str) -> tuple[str, str]:
     return new_curl_command, original_url
 
 
+# options taking a value that do not affect the parsed request
+_IGNORED_VALUE_OPTIONS = {
+    "-o",
+    "--output",
+    "-m",
+    "--max-time",
+    "--connect-timeout",
+    "--retry",
+    "--retry-delay",
+    "--retry-max-time",
+    "-w",
+    "--write-out",
+    "-x",
+    "--proxy",
+    "-U",
+    "--proxy-user",
+    "--cacert",
+    "--capath",
+    "-E",
+    "--cert",
+    "--key",
+    "--cert-type",
+    "--key-type",
+    "--limit-rate",
+    "--resolve",
+    "--max-redirs",
+    "-c",
+    "--cookie-jar",
+    "-D",
+    "--dump-header",
+    "--interface",
+    "-r",
+    "--range",
+    "-K",
+    "--config",
+    "--connect-to",
+    "--proxy-header",
+}
+
+_DATA_OPTIONS = {
+    "-d": "data",
+    "--data": "data",
+    "--data-ascii": "data",
+    "--data-binary": "data",
+    "--data-raw": "data",
+    "--data-urlencode": "data-urlencode",
+    "--json": "json",
+}
+
+_HEADER_OPTIONS = {
+    "-A": "User-Agent",
+    "--user-agent": "User-Agent",
+    "-e": "Referer",
+    "--referer": "Referer",
+    "-b": "Cookie",
+    "--cookie": "Cookie",
+}
+
+_SHORT_VALUE_OPTIONS = {"-X", "-H", "-d", "-u", "-A", "-e", "-b", "-F"} | {
+    option for option in _IGNORED_VALUE_OPTIONS if len(option) == 2
+}
+
+
+def _split_options(tokens: list[str]) -> list[str]:
+    """
+    Split short options with attached value, e.g. -XPOST to -X POST
+    """
+    result = []
+    for token in tokens:
+        if len(token) > 2 and token[:2] in _SHORT_VALUE_OPTIONS and not token.startswith("--"):
+            result.extend([token[:2], token[2:]])
+        else:
+            result.append(token)
+    return result
+
+
+def _urlencode_data(value: str) -> str:
+    """
+    Encode the value of --data-urlencode the same way cURL does
+    """
+    if "=" in value:
+        name, content = value.split("=", 1)
+        return f"{name}={quote_plus(content)}" if name else quote_plus(content)
+    return quote_plus(value)
+
+
+def _parse_query(query: str) -> dict:
+    """
+    Parse query string or form data, repeated keys are returned as list of values
+    """
+    result = {}
+    for key, value in parse_qsl(query, keep_blank_values=True):
+        if key in result:
+            if not isinstance(result[key], list):
+                result[key] = [result[key]]
+            result[key].append(value)
+        else:
+            result[key] = value
+    return result
+
+
+def _parse_data(data: str, content_type: str) -> Any:
+    if "json" in content_type:
+        try:
+            return json.loads(data)
+        except ValueError:
+            pass
+    return _parse_query(data)
+
+
 def parse_curl(curl_command: str) -> dict:
     """
-    Running the curlconverter to parse the cURL command, returns the JSON representation of the cURL command
+    Parse the cURL command into its JSON representation. Supports the -X, -H, -d/--data-*, --json, -u, -G,
+    -I and --url options, the other options are ignored.
 
     Example:
     {'url': 'https://api.example.com', 'raw_url': 'https://api.example.com?test=testvalue',
@@ -105,7 +215,6 @@ def parse_curl(curl_command: str) -> dict:
     'headers': {'accept': 'application/json', 'Content-Type': 'application/json'},
     'queries': {'test': 'testvalue'}, 'data': {'key': 'value'}}
 
-    https://github.com/curlconverter/curlconverter/
     Args:
         curl_command: The entire cURL command string.
 
@@ -114,23 +223,104 @@ def parse_curl(curl_command: str) -> dict:
     """
     # normalize the URL
     curl_command, original_url = normalize_url_in_curl(curl_command)
-    escaped_curl_command = curl_command.replace("'", "'\\''")
-    command = f"echo '{escaped_curl_command}' | curlconverter --language json -"
-
-    # Running the command
-    result = subprocess.run(command, shell=True, text=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-
-    # Getting the results
-    stdout_str = result.stdout
-    stderr_str = result.stderr
-
-    if result.returncode != 0:
-        raise UserException(f"Error parsing cURL: {stderr_str}")
+    try:
+        tokens = _split_options(shlex.split(curl_command.replace("\\\n", " ")))
+    except ValueError as e:
+        raise UserException(f"Error parsing cURL: {e}") from e
+
+    url = None
+    method = None
+    headers = {}
+    data = []
+    auth = None
+    use_get = False
+    position = 1
+    while position < len(tokens):
+        token = tokens[position]
+        position += 1
+        if not token.startswith("-") or token == "-":
+            # values of the options not known to take one are positional as well, only a valid URL is taken
+            if url is None and is_url(token):
+                url = token
+            continue
+
+        takes_value = (
+            token in ("-X", "--request", "-H", "--header", "-u", "--user", "--url", "-F", "--form")
+            or token in _DATA_OPTIONS
+            or token in _HEADER_OPTIONS
+            or token in _IGNORED_VALUE_OPTIONS
+        )
+        if not takes_value:
+            if token in ("-G", "--get"):
+                use_get = True
+            elif token in ("-I", "--head"):
+                method = "head"
+            continue
+
+        if position >= len(tokens):
+            raise UserException(f"Error parsing cURL: option {token} requires a value")
+        value = tokens[position]
+        position += 1
+
+        if token in ("-X", "--request"):
+            method = value.lower()
+        elif token in ("-H", "--header"):
+            name, _, header_value = value.partition(":")
+            header_value = header_value.strip()
+            if header_value:
+                headers[name.strip()] = header_value
+            else:
+                # "-H 'Name:'" removes the header
+                headers.pop(name.strip(), None)
+        elif token in _HEADER_OPTIONS:
+            headers[_HEADER_OPTIONS[token]] = value
+        elif token in ("-u", "--user"):
+            user, _, password = value.partition(":")
+            auth = {"user": user, "password": password}
+        elif token == "--url":
+            url = value
+        elif token in ("-F", "--form"):
+            raise UserException("Multipart form data (-F) is not supported.")
+        elif token in _DATA_OPTIONS:
+            kind = _DATA_OPTIONS[token]
+            if kind == "data-urlencode":
+                value = _urlencode_data(value)
+            elif kind == "json":
+                headers.setdefault("Content-Type", "application/json")
+                headers.setdefault("Accept", "application/json")
+            data.append(value)
 
-    result = json.loads(stdout_str)
-    # replace the original URL in case it was changed to enable child job detection
-    if original_url:
-        result["url"] = original_url
+    if not url:
+        raise UserException("Error parsing cURL: no URL found")
+
+    raw_url = url
+    url, _, query = url.partition("?")
+    queries = _parse_query(query)
+    data_string = "&".join(data)
+
+    result = {"url": original_url or url, "raw_url": raw_url}
+    if use_get:
+        # -G sends the data as query parameters
+        if data_string:
+            raw_url = f"{raw_url}{'&' if query else '?'}{data_string}"
+            queries = _parse_query("&".join(filter(None, [query, data_string])))
+        result["raw_url"] = raw_url
+        data = []
+        method = method or "get"
+    elif data:
+        method = method or "post"
+        headers.setdefault("Content-Type", "application/x-www-form-urlencoded")
+
+    result["method"] = method or "get"
+    if headers:
+        result["headers"] = headers
+    if queries:
+        result["queries"] = queries
+    if data:
+        content_type = _get_content_type(headers).lower()
+        result["data"] = _parse_data(data_string, content_type)
+    if auth:
+        result["auth"] = auth
 
     return result
 
@@ -3,30 +3,61 @@ Template Component main class.
 
 """
 
-import copy
 import logging
 import tempfile
 import traceback
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from functools import wraps
 from io import StringIO
+from itertools import islice
 from typing import Any
 from urllib.parse import urlencode, urlparse
 
 import requests
 from keboola.component.base import ComponentBase, sync_action
 from keboola.component.exceptions import UserException
-from requests.exceptions import JSONDecodeError
 
 import configuration
 from actions.curl import build_job_from_curl
 from actions.mapping import infer_mapping
-from configuration import ConfigHelpers, Configuration
+from configuration import ConfigHelpers, Configuration, DataPath
 from http_generic.auth import AuthBuilderError, AuthMethodBuilder
-from http_generic.client import GenericHttpClient, HttpClientError
-from http_generic.pagination import PaginationBuilder
+from http_generic.budget import BudgetExhaustedError, ExecutionBudget
+from http_generic.circuit_breaker import CircuitBreaker
+from http_generic.client import DEFAULT_POOL_MAXSIZE, GenericHttpClient, HttpClientError
+from http_generic.concurrency import AdaptiveConcurrencyLimiter
+from http_generic.hedging import HedgePolicy
+from http_generic.json_stream import JsonStreamParser
+from http_generic.response_cache import ResponseCache
+from http_generic.snapshot import ResponseSnapshot
+from http_generic.token_cache import DEFAULT_CACHE_DIRECTORY, TokenCache
+from http_generic.transfer_stats import TransferStats
+from http_generic.rate_limit import RateLimiter
+from http_generic.retry import DEFAULT_MAX_RETRY_TIME, RetryBudget
+from http_generic.pagination import BasePagination, DummyPagination, Page, PageRequest, PaginationBuilder
 from placeholders_utils import PlaceholdersUtils
-
-MAX_CHILD_CALLS = 20
+from redaction import SecretsRedactor
+
+# maximum number of child calls running in parallel, may be overridden by the __CONCURRENCY parameter
+DEFAULT_CONCURRENCY = 5
+# __CONCURRENCY value enabling the adaptive limit, starting at DEFAULT_CONCURRENCY
+ADAPTIVE_CONCURRENCY = "adaptive"
+# upper bound of the adaptive limit
+ADAPTIVE_MAX_CONCURRENCY = 20
+# time in seconds the action may spend calling the API, may be overridden by the __TIME_BUDGET parameter
+DEFAULT_TIME_BUDGET = 20
+# number of retries of all requests of the action, may be overridden by the __RETRY_BUDGET parameter
+DEFAULT_RETRY_BUDGET = 20
+# number of duplicate requests sent for the slow GET requests, may be overridden by the __HEDGE_LIMIT parameter
+DEFAULT_HEDGE_LIMIT = 0
+# number of pages fetched by a single call, may be overridden by the __PAGE_LIMIT parameter
+DEFAULT_PAGE_LIMIT = 1
+# number of pages fetched in advance in parallel, may be overridden by the __PAGE_PREFETCH parameter
+DEFAULT_PAGE_PREFETCH = 0
+# size of chunks the response body is read in when the __RECORD_LIMIT parameter turns on the streaming mode
+STREAM_CHUNK_SIZE = 64 * 1024
 
 # configuration variables
 KEY_API_TOKEN = "#api_token"
@@ -52,6 +83,33 @@ def sync_action_exception_handler(func):
     return wrapper
 
 
+@dataclass(frozen=True)
+class JobContext:
+    """
+    Parent results and placeholder parameters of a single (child) job call.
+    Each call has its own context so the calls may run concurrently.
+    """
+
+    parent_results: tuple = ()
+    parent_params: dict = field(default_factory=dict)
+
+    def child(self, config_index: int, parent_result: Any, parent_params: dict) -> "JobContext":
+        """
+        Create context for a child call of the given parent result
+        Args:
+            config_index: nesting level of the parent job
+            parent_result: parent row the child call is made for
+            parent_params: placeholder parameters used by the parent call
+
+        Returns:
+            JobContext
+        """
+        parent_results = self.parent_results
+        if parent_result:
+            parent_results = parent_results[:config_index] + (parent_result,) + parent_results[config_index + 1 :]
+        return JobContext(parent_results=parent_results, parent_params=parent_params)
+
+
 class Component(ComponentBase):
     """
     Extends base class for general Python components. Initializes the CommonInterface
@@ -81,11 +139,18 @@ class Component(ComponentBase):
         self._configurations: list[Configuration] = None
         self._configuration: Configuration = None
         self._client: GenericHttpClient = None
-        self._parent_params = {}
-        self._final_results = []
-        self._parent_results = []
-        self._final_response: requests.Response = None
+        self._budget: ExecutionBudget = None
+        self._record_limit: int | None = None
+        self._page_limit: int = DEFAULT_PAGE_LIMIT
+        self._page_prefetch: int = DEFAULT_PAGE_PREFETCH
+        self._prefetch_executor: ThreadPoolExecutor | None = None
+        self._concurrency_limiter: AdaptiveConcurrencyLimiter | None = None
+        self._retry_budget: RetryBudget | None = None
+        self._max_retry_time: float = DEFAULT_MAX_RETRY_TIME
+        self._hedge_policy: HedgePolicy | None = None
         self._conf_helpers = ConfigHelpers()
+        self._token_cache = TokenCache(DEFAULT_CACHE_DIRECTORY)
+        self._transfer_stats = TransferStats()
 
     def run(self):
         """
@@ -104,8 +169,7 @@ class Component(ComponentBase):
         try:
             if authentication:
                 # evaluate user_params inside the user params itself
-                user_params = self._configuration.user_parameters
-                user_params = self._conf_helpers.fill_in_user_parameters(user_params, user_params)
+                user_params = self._conf_helpers.evaluate_user_parameters(self._configuration.user_parameters)
                 # apply user parameters
                 auth_method_params = self._conf_helpers.fill_in_user_parameters(
                     authentication.parameters, user_params, False
@@ -115,8 +179,8 @@ class Component(ComponentBase):
             raise UserException(e) from e
 
         # evaluate user_params inside the user params itself
-        self._configuration.user_parameters = self._conf_helpers.fill_in_user_parameters(
-            self._configuration.user_parameters, self._configuration.user_parameters
+        self._configuration.user_parameters = self._conf_helpers.evaluate_user_parameters(
+            self._configuration.user_parameters
         )
 
         self._configuration.user_data = self._conf_helpers.fill_in_user_parameters(
@@ -124,14 +188,62 @@ class Component(ComponentBase):
         )
 
         # init client
+        api_cfg = self._configuration.api
+        verify, cert = self._get_tls_settings(api_cfg)
+        cache_ttl = self._get_cache_ttl()
         self._client = GenericHttpClient(
-            base_url=self._configuration.api.base_url,
-            max_retries=self._configuration.api.retry_config.max_retries,
-            backoff_factor=self._configuration.api.retry_config.backoff_factor,
-            status_forcelist=self._configuration.api.retry_config.codes,
+            base_url=api_cfg.base_url,
+            max_retries=api_cfg.retry_config.max_retries,
+            backoff_factor=api_cfg.retry_config.backoff_factor,
+            status_forcelist=api_cfg.retry_config.codes,
             auth_method=auth_method,
+            timeout=api_cfg.timeout,
+            verify=verify,
+            cert=cert,
+            # each parallel call may have prefetched pages in flight
+            pool_maxsize=max(DEFAULT_POOL_MAXSIZE, self._get_concurrency() * (1 + self._page_prefetch)),
+            token_cache=self._token_cache,
+            response_cache=ResponseCache(cache_ttl) if cache_ttl else None,
+            http2=api_cfg.http2,
+            rate_limiter=RateLimiter(
+                api_cfg.retry_config.retry_header, deadline=self._budget.deadline if self._budget else None
+            ),
+            concurrency_limiter=self._concurrency_limiter,
+            retry_budget=self._retry_budget,
+            max_retry_time=self._max_retry_time,
+            # child calls of a failing endpoint fail fast instead of retrying one by one
+            circuit_breaker=CircuitBreaker(),
+            hedge_policy=self._hedge_policy,
         )
 
+    @staticmethod
+    def _get_tls_settings(api_cfg: configuration.ApiConfig) -> tuple[bool | str, str]:
+        """
+        Get TLS settings of the API. If user provided CA certificate or client certificate & key,
+        those will be written to a temp file and used.
+        Args:
+            api_cfg: API configuration
+
+        Returns:
+            tuple (verify, cert) as accepted by requests
+        """
+        if not api_cfg.ca_cert:
+            ca_cert_file = ""
+        else:
+            with tempfile.NamedTemporaryFile("w", delete=False) as cafp:
+                ca_cert_file = cafp.name
+                cafp.write(api_cfg.ca_cert)
+
+        if not api_cfg.client_cert_key:
+            client_cert_key_file = ""
+        else:
+            with tempfile.NamedTemporaryFile("w", delete=False) as ccfp:
+                client_cert_key_file = ccfp.name
+                ccfp.write(api_cfg.client_cert_key)
+
+        verify = ca_cert_file if ca_cert_file else api_cfg.ssl_verify
+        return verify, client_cert_key_file
+
     def _validate_allowed_hosts(
         self,
         allowed_hosts: list[dict],
@@ -247,54 +359,6 @@ class Component(ComponentBase):
             secrets.extend(auth_secrets)
         return secrets
 
-    def _replace_words(self, obj, words, replacement="--HIDDEN--"):
-        # Helper function to perform replacement in strings
-        def replace_in_string(s):
-            for word in words:
-                s = s.replace(word, replacement)
-            return s
-
-        # If the object is a dictionary
-        if isinstance(obj, dict):
-            new_obj = {}
-            for key, value in obj.items():
-                new_key = replace_in_string(key) if isinstance(key, str) else key
-                new_value = self._replace_words(value, words, replacement)
-                new_obj[new_key] = new_value
-            return new_obj
-
-        # If the object is a list
-        elif isinstance(obj, list):
-            return [self._replace_words(item, words, replacement) for item in obj]
-
-        # If the object is a tuple
-        elif isinstance(obj, tuple):
-            return tuple(self._replace_words(item, words, replacement) for item in obj)
-
-        # If the object is a set
-        elif isinstance(obj, set):
-            return {self._replace_words(item, words, replacement) for item in obj}
-
-        # If the object is a custom object
-        elif hasattr(obj, "__dict__"):
-            new_obj = copy.deepcopy(obj)
-            for attr in vars(new_obj):
-                setattr(new_obj, attr, self._replace_words(getattr(new_obj, attr), words, replacement))
-            return new_obj
-
-        # If the object is a string and contains any of the words
-        elif isinstance(obj, str):
-            return replace_in_string(obj)
-
-        # Return the object if it is of any other type
-        else:
-            return obj
-
-    # Function to deep copy the object and replace specified words with a replacement string
-    def _deep_copy_and_replace_words(self, original_obj, words):
-        copied_obj = copy.deepcopy(original_obj)
-        return self._replace_words(copied_obj, words)
-
     def _fill_placeholders(self, placeholders, path):
         """
         Fill placeholders in the path
@@ -405,159 +469,477 @@ class Component(ComponentBase):
 
         return result
 
-    def _add_page_params(self, job: Configuration, query_parameters: dict) -> dict:
+    def _parse_response(self, response: requests.Response, path: DataPath) -> Any:
         """
-        Add page parameters to the query parameters
+        Parse data from the response. If the record limit is set, the response is streamed and only the records
+        within the limit are read, the connection is closed as soon as the limit is reached.
         Args:
-            job: job configuration
-            query_parameters: query parameters
+            response: response of the request, opened with stream=True when the record limit is set
+            path: path to the data
 
         Returns:
-            query_parameters: updated query parameters
+            parsed data, see `_parse_data`
+        """
+        if self._record_limit is None:
+            return self._parse_data(response.json(), path)
+
+        consumed = []
+
+        def read_chunks():
+            for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+                consumed.append(chunk)
+                yield chunk
+
+        chunks = read_chunks()
+        parser = JsonStreamParser(chunks)
+        limit_reached = False
+        if not path:
+            # the array property can be found only in the complete document
+            result = self._parse_data(parser.read_value(), path)
+        elif not parser.find([] if path.path == "." else path.path.split(path.delimiter)):
+            result = [f"Path {path.path} not found in the response data"]
+        elif parser.is_array():
+            result = list(islice(parser.iter_array(), self._record_limit + 1))
+            limit_reached = len(result) > self._record_limit
+            result = result[: self._record_limit]
+        else:
+            result = parser.read_value()
+
+        if limit_reached:
+            logging.info(f"Record limit {self._record_limit} reached, the rest of the response was not read.")
+            response.close()
+        else:
+            for _ in chunks:
+                pass
+        # keep what was read so the response can be shown, it is not valid JSON when the reading was stopped
+        response._content = b"".join(consumed)
+        return result
+
+    def _get_scroller(self, job: Configuration) -> BasePagination:
         """
+        Build the scroller of the job
+        Args:
+            job: job configuration
 
+        Returns:
+            scroller, DummyPagination if the job is not paginated
+        """
         if not job.api.pagination:
-            return query_parameters
+            return DummyPagination()
 
-        paginator_config = job.api.pagination.get(job.request_parameters.scroller)
+        scroller_name = job.request_parameters.scroller
+        paginator_config = job.api.pagination.get(scroller_name)
         if not paginator_config:
-            raise UserException(f"Paginator '{job.request_parameters.scroller}' not found in the configuration.")
+            if scroller_name == "common":
+                # multiple scrollers without default, the job is not paginated
+                return DummyPagination()
+            raise UserException(f"Paginator '{scroller_name}' not found in the configuration.")
 
-        paginaton_method = PaginationBuilder.get_paginator(paginator_config.get("method"))
-        paginator_params = paginaton_method.get_page_params(paginator_config)
+        return PaginationBuilder.get_paginator(paginator_config.get("method"), paginator_config)
 
-        if paginator_config.get("offsetFromJob"):
-            for key, value in paginator_params.items():
-                if key not in query_parameters:
-                    query_parameters[key] = value
-        else:
-            query_parameters.update(paginator_params)
+    def _get_concurrency(self) -> int:
+        """
+        Get the maximum number of child requests that may run in parallel
+        Returns:
+            parallelism limit, the upper bound of the adaptive limit in the adaptive mode
+        """
+        concurrency = self.configuration.parameters.get("__CONCURRENCY", DEFAULT_CONCURRENCY)
+        if concurrency == ADAPTIVE_CONCURRENCY:
+            # the requests in flight are limited by the client, the workers only need to cover the highest limit
+            return ADAPTIVE_MAX_CONCURRENCY
+        message = f'Invalid __CONCURRENCY value: {concurrency}, a positive integer or "adaptive" is expected.'
+        try:
+            concurrency = int(concurrency)
+        except (TypeError, ValueError):
+            raise UserException(message)
+        if concurrency < 1:
+            raise UserException(message)
+        return concurrency
+
+    def _get_concurrency_limiter(self) -> AdaptiveConcurrencyLimiter | None:
+        """
+        Get the adaptive limit of the requests in flight shared by the child calls and the page prefetch
+        Returns:
+            the limiter or None if the concurrency is fixed
+        """
+        if self.configuration.parameters.get("__CONCURRENCY") != ADAPTIVE_CONCURRENCY:
+            return None
+        return AdaptiveConcurrencyLimiter(DEFAULT_CONCURRENCY, ADAPTIVE_MAX_CONCURRENCY)
+
+    def _get_numeric_parameter(
+        self,
+        name: str,
+        default: int | float | None,
+        value_type: type = int,
+        minimum: int | float = 0,
+        exclusive: bool = False,
+    ) -> int | float | None:
+        """
+        Read numeric parameter of the action
+        Args:
+            name: name of the parameter
+            default: value used when the parameter is not set
+            value_type: int or float
+            minimum: lowest allowed value
+            exclusive: the minimum itself is not allowed
 
-        return query_parameters
+        Returns:
+            the converted value, or the default if the parameter is not set
 
-    def make_call(self) -> tuple[list, Any, str, str]:
+        Raises:
+            UserException: if the value is not a number of the type or is out of the range
         """
-        Make call to the API
+        value = self.configuration.parameters.get(name, default)
+        if value is None:
+            return None
+        sign = "positive" if minimum > 0 or exclusive else "non-negative"
+        kind = "integer" if value_type is int else "number"
+        message = f"Invalid {name} value: {value}, a {sign} {kind} is expected."
+        try:
+            converted = value_type(value)
+        except (TypeError, ValueError):
+            raise UserException(message)
+        if converted < minimum or exclusive and converted == minimum:
+            raise UserException(message)
+        return converted
+
+    def _get_time_budget(self) -> ExecutionBudget:
+        """
+        Create the time budget of the action
         Returns:
-            requests.Response
+            ExecutionBudget
         """
-        self.init_component()
-        if not self._configuration.request_parameters:
-            raise ValueError("__SELECTED_JOB is missing!")
+        return ExecutionBudget(self._get_numeric_parameter("__TIME_BUDGET", DEFAULT_TIME_BUDGET, float, exclusive=True))
 
-        # Validate allowed hosts
-        self._validate_allowed_hosts(
-            self.configuration.image_parameters.get("allowed_hosts", []),
-            self._configuration.api.base_url,
-            self._configuration.api.jobs,
-            self.configuration.parameters.get("__SELECTED_JOB", ""),
-        )
-        self._client.login()
-        # set back to debug because sync action mutes it
-        logging.getLogger().setLevel(logging.DEBUG)
+    def _get_retry_budget(self) -> RetryBudget:
+        """
+        Create the retry budget of the action, no retries are started after the time budget is spent
+        Returns:
+            RetryBudget
+        """
+        max_retries = self._get_numeric_parameter("__RETRY_BUDGET", DEFAULT_RETRY_BUDGET)
+        return RetryBudget(max_retries, deadline=self._budget.deadline)
 
-        final_results = []
+    def _get_max_retry_time(self) -> float:
+        """
+        Get maximum number of seconds a single request may spend retrying, including the waits
+        Returns:
+            max retry time
+        """
+        return self._get_numeric_parameter("__MAX_RETRY_TIME", DEFAULT_MAX_RETRY_TIME, float, exclusive=True)
+
+    def _get_hedge_policy(self) -> HedgePolicy:
+        """
+        Create the hedging policy of the action, the slow GET requests are sent once more up to the limit
+        Returns:
+            HedgePolicy, disabled if the limit is 0
+        """
+        return HedgePolicy(self._get_numeric_parameter("__HEDGE_LIMIT", DEFAULT_HEDGE_LIMIT))
 
-        self._parent_results = [{}] * len(self._configurations)
+    def _get_record_limit(self) -> int | None:
+        """
+        Get maximum number of records read from a single response, None when the whole response should be read
+        Returns:
+            record limit or None
+        """
+        return self._get_numeric_parameter("__RECORD_LIMIT", None, minimum=1)
 
-        def recursive_call(parent_result, config_index=0):
-            if parent_result:
-                self._parent_results[config_index - 1] = parent_result
+    def _get_cache_ttl(self) -> float | None:
+        """
+        Get number of seconds the responses are cached for, None when the cache is disabled
+        Returns:
+            cache TTL or None
+        """
+        return self._get_numeric_parameter("__CACHE_TTL", None, float) or None
 
-            if config_index >= len(self._configurations):
-                return final_results, self._final_response.json(), self.log.getvalue()
+    def _get_page_limit(self) -> int:
+        """
+        Get maximum number of pages fetched by a single call of a job
+        Returns:
+            page limit
+        """
+        return self._get_numeric_parameter("__PAGE_LIMIT", DEFAULT_PAGE_LIMIT, minimum=1)
 
-            job = self._configurations[config_index]
+    def _get_page_prefetch(self) -> int:
+        """
+        Get number of pages fetched in advance by scrollers with predictable requests (offset, pagenum)
+        Returns:
+            number of prefetched pages, 0 if disabled
+        """
+        return self._get_numeric_parameter("__PAGE_PREFETCH", DEFAULT_PAGE_PREFETCH)
 
-            api_cfg = job.api
-            request_cfg = job.request_parameters
-            # fix KBC bug
-            user_params = job.user_parameters
-            # evaluate user_params inside the user params itself
-            user_params = self._conf_helpers.fill_in_user_parameters(user_params, user_params)
+    def _build_request_parameters(self, job: Configuration) -> dict:
+        """
+        Build request parameters shared by all calls of the job (headers, query parameters, timeout, body)
+        Args:
+            job: job configuration
 
-            # build headers
-            headers = {**api_cfg.default_headers.copy(), **request_cfg.headers.copy()}
-            new_headers = self._conf_helpers.fill_in_user_parameters(headers, user_params)
+        Returns:
+            request parameters passed to the http client
+        """
+        api_cfg = job.api
+        request_cfg = job.request_parameters
+        # fix KBC bug
+        user_params = job.user_parameters
+        # evaluate user_params inside the user params itself, memoized after the first job
+        user_params = self._conf_helpers.evaluate_user_parameters(user_params)
+
+        # the configuration subtrees are filled in separately, so their templates are compiled once per action
+        fill_in = self._conf_helpers.fill_in_user_parameters
+        # build headers
+        new_headers = {
+            **fill_in(api_cfg.default_headers, user_params),
+            **fill_in(request_cfg.headers, user_params),
+        }
 
-            # build additional parameters
-            query_parameters = {**api_cfg.default_query_parameters.copy(), **request_cfg.query_parameters.copy()}
-            query_parameters = self._conf_helpers.fill_in_user_parameters(query_parameters, user_params)
-            timeout = api_cfg.timeout
-            # additional_params = self._build_request_parameters(additional_params_cfg)
+        # build additional parameters
+        query_parameters = {
+            **fill_in(api_cfg.default_query_parameters, user_params),
+            **fill_in(request_cfg.query_parameters, user_params),
+        }
+        timeout = api_cfg.timeout
+
+        # TLS settings are applied by the http client to all requests
+        request_parameters = {
+            "params": query_parameters,
+            "headers": new_headers,
+            "timeout": timeout,
+            "stream": self._record_limit is not None,
+        }
 
-            query_parameters = self._add_page_params(job, query_parameters)
+        if job.request_content.content_type == configuration.ContentType.json:
+            request_parameters["json"] = job.request_content.body
+        elif job.request_content.content_type == configuration.ContentType.form:
+            request_parameters["data"] = job.request_content.body
 
-            # if user provided CA certificate or client certificate & key, those will be written to a temp file and used
-            if not api_cfg.ca_cert:
-                ca_cert_file = ""
-            else:
-                with tempfile.NamedTemporaryFile("w", delete=False) as cafp:
-                    ca_cert_file = cafp.name
-                    cafp.write(api_cfg.ca_cert)
+        return request_parameters
 
-            if not api_cfg.client_cert_key:
-                client_cert_key_file = ""
-            else:
-                with tempfile.NamedTemporaryFile("w", delete=False) as ccfp:
-                    client_cert_key_file = ccfp.name
-                    ccfp.write(api_cfg.client_cert_key)
-
-            verify = ca_cert_file if ca_cert_file else api_cfg.ssl_verify
-
-            request_parameters = {
-                "params": query_parameters,
-                "headers": new_headers,
-                "timeout": timeout,
-                "verify": verify,
-                "cert": client_cert_key_file,
-            }
+    def _fetch_page(
+        self, job: Configuration, request_parameters: dict, endpoint_path: str, page_request: PageRequest
+    ) -> Page:
+        """
+        Send request of a single page
+        Args:
+            job: job configuration
+            request_parameters: request parameters built by `_build_request_parameters`
+            endpoint_path: endpoint of the job with the placeholders filled in
+            page_request: changes of the request required by the scroller
 
-            if job.request_content.content_type == configuration.ContentType.json:
-                request_parameters["json"] = job.request_content.body
-            elif job.request_content.content_type == configuration.ContentType.form:
-                request_parameters["data"] = job.request_content.body
+        Returns:
+            fetched page
+        """
+        params = page_request.build_params(request_parameters["params"])
+        # each call gets its own copy, the http client updates the dictionaries in place
+        call_parameters = {
+            **request_parameters,
+            "params": dict(params),
+            "headers": dict(request_parameters["headers"]),
+            "timeout": self._budget.request_timeout(request_parameters["timeout"]),
+        }
+        method = job.request_parameters.method
+        if page_request.method:
+            # scroll request replaces the original request including its body
+            method = page_request.method
+            call_parameters.pop("json", None)
+            call_parameters.pop("data", None)
+
+        response = self._client.send_request(
+            method=method, endpoint_path=page_request.endpoint_path or endpoint_path, **call_parameters
+        )
+        return Page(page_request, params, response, self._parse_response(response, job.data_path))
 
-            row_path = job.request_parameters.endpoint_path
+    def _call_job(
+        self, job: Configuration, request_parameters: dict, scroller: BasePagination, context: JobContext
+    ) -> tuple[requests.Response, Any, dict] | None:
+        """
+        Perform a single call of the job for the given parent context, fetching up to `__PAGE_LIMIT` pages.
+        Does not touch any shared state, so it is safe to run it concurrently.
+        Args:
+            job: job configuration
+            request_parameters: request parameters built by `_build_request_parameters`
+            scroller: scroller of the job
+            context: parent results and parameters of the call
 
-            if job.request_parameters.placeholders:
-                placeholders = PlaceholdersUtils.get_params_for_child_jobs(
-                    job.request_parameters.placeholders, self._parent_results, self._parent_params
-                )
-                self._parent_params = placeholders[0]
-                row_path = self._fill_placeholders(placeholders, job.request_parameters.endpoint_path)
+        Returns:
+            tuple (last response, parsed data, placeholder parameters of the call)
+            or None if the call was skipped because the time budget was spent
+        """
+        row_path = job.request_parameters.endpoint_path
+        parent_params = context.parent_params
 
-            self._final_response = self._client.send_request(
-                method=job.request_parameters.method, endpoint_path=row_path, **request_parameters
+        if job.request_parameters.placeholders:
+            placeholders = PlaceholdersUtils.get_params_for_child_jobs(
+                job.request_parameters.placeholders, list(context.parent_results), context.parent_params
             )
+            parent_params = placeholders[0]
+            row_path = self._fill_placeholders(placeholders, job.request_parameters.endpoint_path)
+
+        pages = scroller.iter_pages(
+            lambda page_request: self._fetch_page(job, request_parameters, row_path, page_request),
+            max_pages=self._page_limit,
+            executor=self._prefetch_executor,
+            prefetch=self._page_prefetch,
+        )
+        response = None
+        page_records = []
+        record_count = 0
+        try:
+            for page in pages:
+                response = page.response
+                # prefetched pages dropped after a stop condition are not counted
+                self._transfer_stats.add(response)
+                page_records.append(page.records)
+                record_count += page.record_count
+                if self._record_limit is not None and record_count >= self._record_limit:
+                    break
+        except (BudgetExhaustedError, HttpClientError, requests.Timeout) as e:
+            if isinstance(e, BudgetExhaustedError) or self._budget.exhausted:
+                logging.warning(f"Call of {row_path} stopped, the time budget was spent.")
+                self._budget.mark_truncated()
+                if response is None:
+                    return None
+            else:
+                raise
+        finally:
+            pages.close()
 
-            current_results = self._parse_data(self._final_response.json(), job.data_path)
-
-            if config_index == len(self._configurations) - 1:
-                if isinstance(current_results, list):
-                    final_results.extend(current_results)
-                else:
-                    final_results.append(current_results)
+        if len(page_records) == 1:
+            return response, page_records[0], parent_params
 
+        results = []
+        for records in page_records:
+            if isinstance(records, list):
+                results.extend(records)
             else:
-                if isinstance(current_results, list):
-                    # limit the number of calls to 10 because of timeout
-                    for result in current_results[:MAX_CHILD_CALLS]:
-                        recursive_call(result, config_index + 1)
-                else:
-                    recursive_call(current_results, config_index + 1)
+                results.append(records)
+        if self._record_limit is not None:
+            results = results[: self._record_limit]
+        return response, results, parent_params
+
+    def _run_jobs(self, executor: ThreadPoolExecutor, final_results: list, max_pending: int) -> requests.Response:
+        """
+        Run the selected job chain level by level. The calls of a nesting level are submitted lazily, at most
+        `max_pending` at a time, and no more calls are submitted once the time budget is spent. Results are
+        collected in the order of the parent rows so the output is deterministic.
+        Args:
+            executor: executor used to run the calls of one level in parallel
+            final_results: list the results of the last level are collected into
+            max_pending: maximum number of calls submitted to the executor and not collected yet
+
+        Returns:
+            the last response
+        """
+        last_response = None
+        contexts = [JobContext(parent_results=({},) * len(self._configurations))]
+
+        for config_index, job in enumerate(self._configurations):
+            is_last_level = config_index == len(self._configurations) - 1
+            request_parameters = self._build_request_parameters(job)
+            scroller = self._get_scroller(job)
+
+            remaining_contexts = iter(contexts)
+            pending: deque[tuple[JobContext, Future]] = deque()
+            child_contexts = []
+            try:
+                while True:
+                    while len(pending) < max_pending and not self._budget.exhausted:
+                        context = next(remaining_contexts, None)
+                        if context is None:
+                            break
+                        pending.append(
+                            (context, executor.submit(self._call_job, job, request_parameters, scroller, context))
+                        )
+                    if not pending:
+                        break
+
+                    context, future = pending.popleft()
+                    outcome = future.result()
+                    if outcome is None:
+                        continue
+                    last_response, current_results, parent_params = outcome
+
+                    if is_last_level:
+                        if isinstance(current_results, list):
+                            final_results.extend(current_results)
+                        else:
+                            final_results.append(current_results)
+                    elif isinstance(current_results, list):
+                        for result in current_results:
+                            child_contexts.append(context.child(config_index, result, parent_params))
+                    else:
+                        child_contexts.append(context.child(config_index, current_results, parent_params))
+            except Exception:
+                for _, future in pending:
+                    future.cancel()
+                raise
+
+            if next(remaining_contexts, None) is not None:
+                logging.warning(f"Calls of the job {config_index} were skipped, the time budget was spent.")
+                self._budget.mark_truncated()
+            contexts = child_contexts
+
+        if last_response is None:
+            raise UserException(f"No response was received within the time budget of {self._budget.seconds}s.")
+        return last_response
+
+    def make_call(self) -> tuple[list, Any, str, str]:
+        """
+        Make call to the API
+        Returns:
+            requests.Response
+        """
+        self._budget = self._get_time_budget()
+        self._record_limit = self._get_record_limit()
+        self._page_limit = self._get_page_limit()
+        self._page_prefetch = self._get_page_prefetch()
+        self._concurrency_limiter = self._get_concurrency_limiter()
+        self._retry_budget = self._get_retry_budget()
+        self._max_retry_time = self._get_max_retry_time()
+        self._hedge_policy = self._get_hedge_policy()
+        self.init_component()
+        if not self._configuration.request_parameters:
+            raise ValueError("__SELECTED_JOB is missing!")
+
+        # Validate allowed hosts
+        self._validate_allowed_hosts(
+            self.configuration.image_parameters.get("allowed_hosts", []),
+            self._configuration.api.base_url,
+            self._configuration.api.jobs,
+            self.configuration.parameters.get("__SELECTED_JOB", ""),
+        )
+        self._client.login()
+        # set back to debug because sync action mutes it
+        logging.getLogger().setLevel(logging.DEBUG)
 
+        final_results = []
         try:
-            recursive_call({})
+            concurrency = self._get_concurrency()
+            if self._page_prefetch:
+                # pages are prefetched from the calls running in the executor, they need their own workers
+                self._prefetch_executor = ThreadPoolExecutor(max_workers=concurrency * self._page_prefetch)
+            try:
+                with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                    # a call waits in the queue for each running one, so the workers never idle
+                    response = self._run_jobs(executor, final_results, max_pending=concurrency * 2)
+            finally:
+                if self._prefetch_executor:
+                    # don't wait for the discarded pages
+                    self._prefetch_executor.shutdown(wait=False, cancel_futures=True)
+                self._client.close()
+                if self._concurrency_limiter:
+                    logging.info(
+                        f"Adaptive concurrency limit: {self._concurrency_limiter.limit}, "
+                        f"decreased {self._concurrency_limiter.decreases} times"
+                    )
             error_message = ""
         except HttpClientError as e:
             error_message = str(e)
             if e.response is not None:
-                self._final_response = e.response
+                response = e.response
             else:
                 raise UserException(e) from e
 
-        return final_results, self._final_response, self.log.getvalue(), error_message
+        return final_results, response, self.log.getvalue(), error_message
 
     @sync_action("load_from_curl")
     @sync_action_exception_handler
@@ -617,7 +999,7 @@ class Component(ComponentBase):
         self.init_component()
         function_cfg = self.configuration.parameters["__FUNCTION_CFG"]
         return {
-            "result": ConfigHelpers().perform_custom_function(
+            "result": self._conf_helpers.perform_custom_function(
                 "function", function_cfg, self._configuration.user_parameters
             )
         }
@@ -627,38 +1009,28 @@ class Component(ComponentBase):
     def test_request(self):
         results, response, log, error_message = self.make_call()
 
-        body = None
-        if response.request.body:
-            if isinstance(response.request.body, bytes):
-                body = response.request.body.decode("utf-8")
-            else:
-                body = response.request.body
-
-        secrets_to_hide = self._get_values_to_hide()
-        filtered_response = self._deep_copy_and_replace_words(self._final_response, secrets_to_hide)
-        filtered_log = self._deep_copy_and_replace_words(self.log.getvalue(), secrets_to_hide)
-        filtered_body = self._deep_copy_and_replace_words(body, secrets_to_hide)
-
-        # get response data:
-        try:
-            response_data = filtered_response.json()
-        except JSONDecodeError:
-            response_data = filtered_response.text
+        redactor = SecretsRedactor(self._get_values_to_hide())
+        snapshot = ResponseSnapshot.from_response(response).redact(redactor)
+        filtered_log = redactor.redact_text(self.log.getvalue())
 
         result = {
             "response": {
-                "status_code": filtered_response.status_code,
-                "reason": filtered_response.reason,
-                "data": response_data,
-                "headers": dict(filtered_response.headers),
+                "status_code": snapshot.status_code,
+                "reason": snapshot.reason,
+                "data": snapshot.data(),
+                "headers": snapshot.headers,
             },
             "request": {
-                "url": response.request.url,
-                "method": response.request.method,
-                "data": filtered_body,
-                "headers": dict(filtered_response.request.headers),
+                "url": snapshot.request.url,
+                "method": snapshot.request.method,
+                "data": snapshot.request.body,
+                "headers": snapshot.request.headers,
             },
             "records": results,
+            "truncated": self._budget.truncated,
+            "transfer": self._transfer_stats.to_dict(),
+            "retries": self._retry_budget.to_dict(),
+            "hedging": self._hedge_policy.to_dict(),
             "debug_log": filtered_log,
         }
         return result
@@ -0,0 +1,130 @@
+import time
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+TIME_REFERENCES = ("currentStart", "previousStart")
+
+
+class TemplateNode:
+    def render(self, user_params: dict, time_context: dict) -> Any:
+        raise NotImplementedError("Subclasses should implement this method")
+
+
+@dataclass(frozen=True)
+class LiteralNode(TemplateNode):
+    value: Any
+
+    def render(self, user_params: dict, time_context: dict) -> Any:
+        return self.value
+
+
+@dataclass(frozen=True)
+class AttrReferenceNode(TemplateNode):
+    """
+    {"attr": "name"} reference to a user parameter, rendered as a string
+    """
+
+    name: str
+
+    def render(self, user_params: dict, time_context: dict) -> Any:
+        return str(user_params[self.name])
+
+
+@dataclass(frozen=True)
+class TimeReferenceNode(TemplateNode):
+    """
+    {"time": "currentStart"} or {"time": "previousStart"} reference, rendered as a unix timestamp
+    """
+
+    name: str
+
+    def render(self, user_params: dict, time_context: dict) -> Any:
+        return time_context[self.name]
+
+
+@dataclass(frozen=True)
+class DictNode(TemplateNode):
+    items: tuple[tuple[str, TemplateNode], ...]
+
+    def render(self, user_params: dict, time_context: dict) -> Any:
+        return {key: node.render(user_params, time_context) for key, node in self.items}
+
+
+@dataclass(frozen=True)
+class ListNode(TemplateNode):
+    items: tuple[TemplateNode, ...]
+
+    def render(self, user_params: dict, time_context: dict) -> Any:
+        return [node.render(user_params, time_context) for node in self.items]
+
+
+class ConfigTemplate:
+    """
+    Configuration subtree compiled into a tree of literal and reference nodes. The subtree is parsed only once
+    and may be rendered many times against different user parameters. Each render returns new dictionaries
+    and lists, so the result may be modified freely.
+    """
+
+    def __init__(self, root: TemplateNode, attr_references: frozenset[str]):
+        self.root = root
+        self.attr_references = attr_references
+
+    @classmethod
+    def compile(cls, conf_object: Any, user_param_names: Iterable[str] | None = None) -> "ConfigTemplate":
+        """
+        Compile the configuration object.
+        Args:
+            conf_object: configuration that may contain {"attr": "key"} and {"time": "currentStart"} references
+            user_param_names: names of user parameters available for rendering. If not provided, only the time
+                              references are compiled and the {"attr": "key"} objects are kept as they are.
+
+        Returns:
+            ConfigTemplate
+
+        Raises:
+            ValueError: if the configuration references user parameters that are not available
+        """
+        known_names = set(user_param_names) if user_param_names is not None else None
+        attr_references = set()
+        unresolved = []
+
+        def compile_node(obj: Any) -> TemplateNode:
+            if isinstance(obj, dict):
+                if len(obj) == 1 and isinstance(obj.get("time"), str) and obj["time"] in TIME_REFERENCES:
+                    return TimeReferenceNode(obj["time"])
+
+                if "attr" in obj and known_names is not None:
+                    name = obj["attr"]
+                    if len(obj) == 1 and isinstance(name, str) and name in known_names:
+                        attr_references.add(name)
+                        return AttrReferenceNode(name)
+                    unresolved.append(name)
+
+                return DictNode(tuple((key, compile_node(value)) for key, value in obj.items()))
+
+            if isinstance(obj, list):
+                return ListNode(tuple(compile_node(item) for item in obj))
+
+            return LiteralNode(obj)
+
+        root = compile_node(conf_object)
+        if unresolved:
+            raise ValueError(
+                "Some user attributes [{}] specified in parameters "
+                'are not present in "user_parameters" json_path.'.format(unresolved)
+            )
+        return cls(root, frozenset(attr_references))
+
+    def render(self, user_params: dict | None = None, now: int | None = None) -> Any:
+        """
+        Render the template
+        Args:
+            user_params: values of the user parameters
+            now: unix timestamp used for time references, current time by default
+
+        Returns:
+            configuration with all references replaced by the values
+        """
+        now = int(time.time()) if now is None else now
+        time_context = {name: now for name in TIME_REFERENCES}
+        return self.root.render(user_params or {}, time_context)
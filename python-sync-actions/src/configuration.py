@@ -4,11 +4,11 @@ import time
 import urllib.parse as urlparse
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import List, Tuple, Optional, Literal
+from typing import Any, Iterable, List, Tuple, Optional, Literal
 
 import dataconf
-from nested_lookup import nested_lookup
 
+from config_template import TIME_REFERENCES, ConfigTemplate
 from user_functions import UserFunctions
 
 
@@ -57,6 +57,7 @@ class RetryConfig(ConfigurationBase):
     max_retries: int = 1
     backoff_factor: float = 0.3
     codes: Tuple[int, ...] = (500, 502, 504)
+    retry_header: str = "Retry-After"
 
 
 @dataclass
@@ -83,6 +84,7 @@ class ApiConfig(ConfigurationBase):
     ssl_verify: bool = True  # toggles requests.[method](verify=True/False)
     ca_cert: str = ""  # if provided, this value will be written to a temp file and used instead of ssl_verify
     client_cert_key: str = ""  # client certificate bundled with private key (will also be written to a temp file)
+    http2: bool = False  # send the requests over HTTP/2
     jobs: list[dict] = field(default_factory=list)
 
 
@@ -205,7 +207,10 @@ def convert_to_v2(configuration: dict) -> list[Configuration]:
 
     pagination = {}
     if api_json.get("pagination", {}).get("scrollers"):
-        pagination = api_json.get("pagination", {}).get("scrollers")
+        pagination = dict(api_json.get("pagination", {}).get("scrollers"))
+        # jobs without scroller use the default one
+        if default_scroller := api_json["pagination"].get("default"):
+            pagination.setdefault("common", pagination.get(default_scroller))
     elif api_json.get("pagination"):
         pagination["common"] = api_json.get("pagination")
 
@@ -227,6 +232,7 @@ def convert_to_v2(configuration: dict) -> list[Configuration]:
         ssl_verify=api_json.get("ssl_verify", True),
         ca_cert=ca_cert,
         client_cert_key=client_cert_key,
+        http2=bool(api_json.get("http", {}).get("http2", False)),
         jobs=jobs,
     )
 
@@ -265,6 +271,7 @@ def build_retry_config(configuration: dict) -> RetryConfig:
     return RetryConfig(
         max_retries=http_section.get("maxRetries", 10),
         codes=http_section.get("codes", (500, 502, 503, 504, 408, 420, 429)),
+        retry_header=http_section.get("retryHeader") or "Retry-After",
     )
 
 
@@ -484,8 +491,7 @@ class AuthMethodConverter:
         login_request: dict = config_parameters.get("api", {}).get("authentication", {}).get("loginRequest", {})
         api_request: dict = config_parameters.get("api", {}).get("authentication", {}).get("apiRequest", {})
         # evaluate functions and user parameters
-        user_parameters = build_user_parameters(config_parameters)
-        user_parameters = helpers.fill_in_user_parameters(user_parameters, user_parameters)
+        user_parameters = helpers.evaluate_user_parameters(build_user_parameters(config_parameters))
         login_request_eval = helpers.fill_in_user_parameters(login_request, user_parameters)
         # the function evaluation is left for the Auth method because of the response placeholder
         api_request_eval = helpers.fill_in_user_parameters(api_request, user_parameters, False)
@@ -519,14 +525,165 @@ class AuthMethodConverter:
             "login_content_type": login_request_content.content_type.value,
             "api_request_headers": api_request_headers,
             "api_request_query_parameters": api_request_query_parameters,
+            "expires": config_parameters.get("api", {}).get("authentication", {}).get("expires"),
         }
 
         return Authentication(type="Login", parameters=parameters)
 
 
+class UserParametersGraph:
+    """
+    User parameters compiled into a dependency graph. Parameters referencing other parameters via
+    {"attr": "key"} (also inside nested function objects) are evaluated after their dependencies,
+    each parameter exactly once.
+    """
+
+    def __init__(self, user_params: dict):
+        """
+
+        Args:
+            user_params: user parameters that may contain references and function definitions
+
+        Raises:
+            ValueError: if the parameters reference each other in a cycle or reference unknown parameters
+        """
+        self.user_params = user_params
+        self.dependencies = {key: self._collect_references(value) for key, value in user_params.items()}
+
+        unknown = [name for references in self.dependencies.values() for name in references if name not in user_params]
+        if unknown:
+            raise ValueError(
+                "Some user attributes [{}] specified in parameters "
+                'are not present in "user_parameters" json_path.'.format(unknown)
+            )
+        self.order = self._sort()
+
+    @classmethod
+    def _collect_references(cls, value) -> list[str]:
+        references = []
+        if isinstance(value, dict):
+            if isinstance(value.get("attr"), str) and len(value) == 1:
+                references.append(value["attr"])
+            else:
+                for item in value.values():
+                    references.extend(cls._collect_references(item))
+        elif isinstance(value, list):
+            for item in value:
+                references.extend(cls._collect_references(item))
+        return references
+
+    def _sort(self) -> list[str]:
+        """
+        Topological order of the parameters, dependencies first
+        """
+        order = []
+        state = {}  # key -> "visiting" | "done"
+
+        def visit(key: str, path: list[str]):
+            if state.get(key) == "done":
+                return
+            if state.get(key) == "visiting":
+                cycle = path[path.index(key) :] + [key]
+                raise ValueError(f"User parameters contain a circular reference: {' -> '.join(cycle)}")
+            state[key] = "visiting"
+            for dependency in self.dependencies[key]:
+                visit(dependency, path + [key])
+            state[key] = "done"
+            order.append(key)
+
+        for key in self.user_params:
+            visit(key, [])
+        return order
+
+    def evaluate(self, user_functions: UserFunctions, now: int) -> dict:
+        """
+        Evaluate all parameters
+        Args:
+            user_functions: functions available in the {"function": ...} objects
+            now: unix timestamp used for the {"time": ...} references
+
+        Returns:
+            dictionary of the evaluated parameters in the original order
+        """
+        resolved = {}
+
+        def evaluate_value(value):
+            if isinstance(value, dict):
+                if isinstance(value.get("attr"), str) and len(value) == 1:
+                    return resolved[value["attr"]]
+                if len(value) == 1 and value.get("time") in TIME_REFERENCES:
+                    return now
+                if value.get("function"):
+                    args = [evaluate_value(arg) for arg in value.get("args", [])]
+                    return user_functions.execute_function(value["function"], *args)
+                return {key: evaluate_value(item) for key, item in value.items()}
+            if isinstance(value, list):
+                return [evaluate_value(item) for item in value]
+            return value
+
+        for key in self.order:
+            resolved[key] = evaluate_value(self.user_params[key])
+        return {key: resolved[key] for key in self.user_params}
+
+
 class ConfigHelpers:
     def __init__(self):
         self.user_functions = UserFunctions()
+        self._now = None
+        self._evaluated_user_parameters = {}
+        self._templates = {}
+
+    @property
+    def now(self) -> int:
+        """
+        Unix timestamp of the first time reference evaluated by this instance, all time references and functions
+        of one action are evaluated against the same clock.
+        """
+        if self._now is None:
+            self._now = int(time.time())
+        return self._now
+
+    def evaluate_user_parameters(self, user_params: dict) -> dict:
+        """
+        Evaluate references and functions inside the user parameters. The result is memoized, evaluating the same
+        (or already evaluated) parameters again is free.
+        Args:
+            user_params: user parameters
+
+        Returns:
+            evaluated user parameters, must not be modified
+        """
+        cached = self._evaluated_user_parameters.get(id(user_params))
+        if cached and cached[0] is user_params:
+            return cached[1]
+
+        evaluated = UserParametersGraph(user_params).evaluate(self.user_functions, self.now)
+        # keep the source object referenced so its id can't be reused
+        self._evaluated_user_parameters[id(user_params)] = (user_params, evaluated)
+        self._evaluated_user_parameters[id(evaluated)] = (evaluated, evaluated)
+        return evaluated
+
+    def compile_template(self, conf_objects: Any, user_param_names: Iterable[str] | None = None) -> ConfigTemplate:
+        """
+        Compile the configuration subtree. The template is memoized, so the subtrees filled in by each call
+        of the action are compiled only once.
+        Args:
+            conf_objects: configuration subtree, must not be modified after it was compiled
+            user_param_names: names of the user parameters available for rendering, see `ConfigTemplate.compile`
+
+        Returns:
+            compiled template
+        """
+        names = frozenset(user_param_names) if user_param_names is not None else None
+        key = (id(conf_objects), names)
+        cached = self._templates.get(key)
+        if cached and cached[0] is conf_objects:
+            return cached[1]
+
+        template = ConfigTemplate.compile(conf_objects, names)
+        # keep the source object referenced so its id can't be reused
+        self._templates[key] = (conf_objects, template)
+        return template
 
     def fill_in_user_parameters(
         self, conf_objects: dict, user_param: dict, evaluate_conf_objects_functions: bool = True
@@ -543,58 +700,31 @@ class ConfigHelpers:
         Returns:
 
         """
-        # time references
-        conf_objects = self.fill_in_time_references(conf_objects)
-        user_param = self.fill_in_time_references(user_param)
-        # convert to string minified
-        steps_string = json.dumps(conf_objects, separators=(",", ":"))
-        # dirty and ugly replace
-        for key in user_param:
-            if isinstance(user_param[key], dict):
-                # in case the parameter is function, validate, execute and replace value with result
-                res = self.perform_custom_function(key, user_param[key], user_param)
-                user_param[key] = res
-
-            lookup_str = '{"attr":"' + key + '"}'
-            steps_string = steps_string.replace(lookup_str, '"' + str(user_param[key]) + '"')
-        new_steps = json.loads(steps_string)
-        non_matched = nested_lookup("attr", new_steps)
+        user_param = self.evaluate_user_parameters(user_param)
+        new_steps = self.compile_template(conf_objects, user_param.keys()).render(user_param, self.now)
 
         if evaluate_conf_objects_functions:
             for key in new_steps:
                 if isinstance(new_steps[key], dict):
                     # in case the parameter is function, validate, execute and replace value with result
-                    res = self.perform_custom_function(key, new_steps[key], user_param)
+                    # the time references were already rendered with the template
+                    res = self._evaluate_function(key, new_steps[key], user_param)
                     new_steps[key] = res
 
-        if non_matched:
-            raise ValueError(
-                "Some user attributes [{}] specified in parameters "
-                'are not present in "user_parameters" json_path.'.format(non_matched)
-            )
         return new_steps
 
-    @staticmethod
-    def fill_in_time_references(conf_objects: dict):
+    def fill_in_time_references(self, conf_objects: dict):
         """
-        This method replaces user parameter references via attr + parses functions inside user parameters,
-        evaluates them and fills in the resulting values
+        This method replaces the {"time": "currentStart"} and {"time": "previousStart"} references
+        with the timestamp of the action start
 
         Args:
-            conf_objects: Configuration that contains the references via {"attr": "key"} to user parameters or function
-                            definitions
+            conf_objects: Configuration that contains the time references
 
         Returns:
 
         """
-        # convert to string minified
-        steps_string = json.dumps(conf_objects, separators=(",", ":"))
-        # dirty and ugly replace
-
-        new_cfg_str = steps_string.replace('{"time":"currentStart"}', f"{int(time.time())}")
-        new_cfg_str = new_cfg_str.replace('{"time":"previousStart"}', f"{int(time.time())}")
-        new_config = json.loads(new_cfg_str)
-        return new_config
+        return self.compile_template(conf_objects).render(now=self.now)
 
     def perform_custom_function(self, key: str, function_cfg: dict, user_params: dict):
         """
@@ -607,7 +737,12 @@ class ConfigHelpers:
         Returns:
 
         """
-        function_cfg = self.fill_in_time_references(function_cfg)
+        return self._evaluate_function(key, self.fill_in_time_references(function_cfg), user_params)
+
+    def _evaluate_function(self, key: str, function_cfg: dict, user_params: dict):
+        """
+        Evaluate the function configuration with the time references already filled in
+        """
         if not isinstance(function_cfg, dict):
             # in case the function was evaluated as time
             return function_cfg
@@ -617,13 +752,13 @@ class ConfigHelpers:
 
         if not function_cfg.get("function"):
             for key in function_cfg:
-                function_cfg[key] = self.perform_custom_function(key, function_cfg[key], user_params)
+                function_cfg[key] = self._evaluate_function(key, function_cfg[key], user_params)
 
         new_args = []
         if function_cfg.get("args"):
             for arg in function_cfg.get("args"):
                 if isinstance(arg, dict):
-                    arg = self.perform_custom_function(key, arg, user_params)
+                    arg = self._evaluate_function(key, arg, user_params)
                 new_args.append(arg)
             function_cfg["args"] = new_args
         if isinstance(function_cfg, dict) and not function_cfg.get("function"):
@@ -1,6 +1,7 @@
 import inspect
 import json
 import re
+import time
 from abc import ABC, abstractmethod
 from typing import Callable, Union, Dict, Literal
 from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
@@ -10,8 +11,13 @@ from requests import auth
 from requests.auth import AuthBase, HTTPBasicAuth
 
 from configuration import ContentType, ConfigHelpers
+from http_generic.token_cache import build_cache_key
+from php_compat import php_strtotime
 from placeholders_utils import get_data_from_path
 
+# function sending a request with the signature of requests.request
+Transport = Callable[..., requests.Response]
+
 
 class AuthBuilderError(Exception):
     pass
@@ -21,12 +27,25 @@ class AuthMethodBase(ABC):
     """
     Base class to implement the authentication method. To mark secret constructor parameters prefix them with __
     e.g. __init__(self, username, __password)
+
+    Methods obtaining a token by the login set `token_based`, implement `export_token` and `restore_token`
+    and set `expires_at`, so the token is cached and reused by the following actions and refreshed when it expires.
     """
 
+    # True if the login obtains a token, which may be cached, refreshed before it expires or on 401 response
+    token_based: bool = False
+    # unix timestamp the login expires at, None if unknown
+    expires_at: float | None = None
+    # key of the method in the token cache, set by AuthMethodBuilder
+    cache_key: bytes | None = None
+
     @abstractmethod
-    def login(self):
+    def login(self, transport: Transport = requests.request):
         """
         Perform steps to login and returns requests.aut.AuthBase callable that modifies the request.
+        Args:
+            transport: function sending the login requests, with the signature of `requests.request`.
+                       The http client passes its own so the login shares its connections, retries and TLS settings.
 
         """
         pass
@@ -40,6 +59,26 @@ class AuthMethodBase(ABC):
         """
         pass
 
+    def export_token(self) -> dict | None:
+        """
+        State obtained by the login that may be cached.
+        Returns:
+            JSON serializable state or None if the method does not support caching
+        """
+        return None
+
+    def restore_token(self, token: dict, expires_at: float) -> Union[AuthBase, Callable]:
+        """
+        Restore the cached state instead of performing the login.
+        Args:
+            token: state returned by `export_token`
+            expires_at: unix timestamp the token expires at
+
+        Returns:
+            the same as `login`
+        """
+        raise NotImplementedError(f"{self.__class__.__name__} does not support token caching")
+
 
 class AuthMethodBuilder:
     @classmethod
@@ -62,7 +101,9 @@ class AuthMethodBuilder:
         parameters = cls._convert_secret_parameters(supported_actions[method_name], **parameters)
         cls._validate_method_arguments(supported_actions[method_name], **parameters)
 
-        return supported_actions[method_name](**parameters)
+        method = supported_actions[method_name](**parameters)
+        method.cache_key = build_cache_key(method_name, parameters)
+        return method
 
     @staticmethod
     def _validate_method_arguments(c_converted_method: object, **args):
@@ -106,7 +147,7 @@ class BasicHttp(AuthMethodBase):
         self.username = username
         self.password = __password
 
-    def login(self) -> Union[AuthBase, Callable]:
+    def login(self, transport: Transport = requests.request) -> Union[AuthBase, Callable]:
         return HTTPBasicAuth(username=self.username, password=self.password)
 
     def __eq__(self, other):
@@ -125,7 +166,7 @@ class BearerToken(AuthMethodBase, AuthBase):
     def __init__(self, __token):
         self.token = __token
 
-    def login(self) -> Union[AuthBase, Callable]:
+    def login(self, transport: Transport = requests.request) -> Union[AuthBase, Callable]:
         return self
 
     def __eq__(self, other):
@@ -148,7 +189,7 @@ class ApiKey(AuthMethodBase, AuthBase):
         self.key = key
         self.position = position
 
-    def login(self) -> Union[AuthBase, Callable]:
+    def login(self, transport: Transport = requests.request) -> Union[AuthBase, Callable]:
         return self
 
     def __eq__(self, other):
@@ -180,7 +221,7 @@ class Query(AuthMethodBase, AuthBase):
     def __init__(self, params: Dict):
         self.params = params
 
-    def login(self) -> Union[AuthBase, Callable]:
+    def login(self, transport: Transport = requests.request) -> Union[AuthBase, Callable]:
         return self
 
     def __call__(self, r):
@@ -189,6 +230,8 @@ class Query(AuthMethodBase, AuthBase):
 
 
 class Login(AuthMethodBase, AuthBase):
+    token_based = True
+
     def __init__(
         self,
         login_endpoint: str,
@@ -199,6 +242,7 @@ class Login(AuthMethodBase, AuthBase):
         login_headers: dict = None,
         api_request_headers: dict = None,
         api_request_query_parameters: dict = None,
+        expires: int | dict = None,
     ):
         """
 
@@ -209,6 +253,8 @@ class Login(AuthMethodBase, AuthBase):
             login_headers:
             api_request_headers:
             api_request_query_parameters:
+            expires: number of seconds the login is valid for or {"response": "path", "relative": false}
+                     to take the expiration from the login response
         """
         self.login_endpoint = login_endpoint
         self.method = method
@@ -218,6 +264,9 @@ class Login(AuthMethodBase, AuthBase):
         self.login_headers = login_headers or {}
         self.api_request_headers = api_request_headers or {}
         self.api_request_query_parameters = api_request_query_parameters or {}
+        self.expires = expires
+        self._api_request_headers = self.api_request_headers
+        self._api_request_query_parameters = self.api_request_query_parameters
 
     @classmethod
     def _retrieve_response_placeholders(
@@ -256,33 +305,78 @@ class Login(AuthMethodBase, AuthBase):
             source_object_params_str = source_object_params_str.replace(lookup_str, '"' + value_to_replace + '"')
         return json.loads(source_object_params_str)
 
-    def login(self) -> Union[AuthBase, Callable]:
-        request_parameters = {}
+    def _build_login_request(self) -> tuple[str, str, dict]:
+        """
+        Build method, URL and keyword arguments of the login request in the format of `requests.request`
+        """
+        request_parameters = {"params": self.login_query_parameters, "headers": self.login_headers}
 
         if self.login_content_type == ContentType.json:
             request_parameters["json"] = self.login_query_body
         elif self.login_content_type == ContentType.form:
             request_parameters["data"] = self.login_query_body
-
-        response = requests.request(
-            self.method,
-            self.login_endpoint,
-            params=self.login_query_parameters,
-            headers=self.login_headers,
-            **request_parameters,
+        return self.method, self.login_endpoint, request_parameters
+
+    def _process_login_response(self, response_data: dict) -> Union[AuthBase, Callable]:
+        # the templates are kept for the next login, the results are assigned at once as the requests running
+        # in other threads may use them
+        api_request_headers = self._replace_placeholders_with_response(response_data, self._api_request_headers)
+        api_request_query_parameters = self._replace_placeholders_with_response(
+            response_data, self._api_request_query_parameters
         )
+        cfg_helpers = ConfigHelpers()
+        api_request_headers = cfg_helpers.fill_in_user_parameters(api_request_headers, {}, True)
+        api_request_query_parameters = cfg_helpers.fill_in_user_parameters(api_request_query_parameters, {}, True)
+
+        self.expires_at = self._get_expiration(response_data)
+        self.api_request_headers = api_request_headers
+        self.api_request_query_parameters = api_request_query_parameters
+        return self
 
+    def login(self, transport: Transport = requests.request) -> Union[AuthBase, Callable]:
+        method, url, request_parameters = self._build_login_request()
+        response = transport(method, url, **request_parameters)
         response.raise_for_status()
+        return self._process_login_response(response.json())
 
-        self.api_request_headers = self._replace_placeholders_with_response(response.json(), self.api_request_headers)
-        self.api_request_query_parameters = self._replace_placeholders_with_response(
-            response.json(), self.api_request_query_parameters
-        )
-        cfg_helpers = ConfigHelpers()
-        self.api_request_headers = cfg_helpers.fill_in_user_parameters(self.api_request_headers, {}, True)
-        self.api_request_query_parameters = cfg_helpers.fill_in_user_parameters(
-            self.api_request_query_parameters, {}, True
-        )
+    def _get_expiration(self, response_data: dict) -> float | None:
+        """
+        Get expiration of the login based on the `expires` configuration
+        Args:
+            response_data: login response
+
+        Returns:
+            unix timestamp or None if the expiration is unknown
+
+        Raises:
+            ValueError: if the login response contains expiration in the past
+        """
+        now = int(time.time())
+        if not self.expires:
+            return None
+        if not isinstance(self.expires, dict):
+            return now + int(self.expires)
+
+        value = get_data_from_path(self.expires["response"], response_data, separator=".", strict=False)
+        if value is None:
+            return None
+        expires_at = value if isinstance(value, int) else php_strtotime(str(value), now)
+        if self.expires.get("relative"):
+            expires_at += now
+        if expires_at < now:
+            raise ValueError(f"Login authentication returned expiry time before current time: '{value}'")
+        return expires_at
+
+    def export_token(self) -> dict | None:
+        return {
+            "api_request_headers": self.api_request_headers,
+            "api_request_query_parameters": self.api_request_query_parameters,
+        }
+
+    def restore_token(self, token: dict, expires_at: float) -> Union[AuthBase, Callable]:
+        self.api_request_headers = token["api_request_headers"]
+        self.api_request_query_parameters = token["api_request_query_parameters"]
+        self.expires_at = expires_at
         return self
 
     def get_secrets(self) -> list[str]:
@@ -304,6 +398,8 @@ class Login(AuthMethodBase, AuthBase):
 
 
 class OAuth20ClientCredentials(AuthMethodBase, AuthBase):
+    token_based = True
+
     def __init__(
         self,
         login_endpoint: str,
@@ -328,7 +424,10 @@ class OAuth20ClientCredentials(AuthMethodBase, AuthBase):
         self.scopes = scopes or []
         self.auth_header = {}
 
-    def login(self) -> Union[AuthBase, Callable]:
+    def _build_login_request(self) -> tuple[str, str, dict]:
+        """
+        Build method, URL and keyword arguments of the token request in the format of `requests.request`
+        """
         data = {"grant_type": "client_credentials"}
         auth = None
         if self.scopes:
@@ -340,12 +439,27 @@ class OAuth20ClientCredentials(AuthMethodBase, AuthBase):
         elif self.method == "client_secret_basic":
             auth = (self.client_id, self.client_secret)
 
-        response = requests.request("POST", self.login_endpoint, data=data, auth=auth)
+        return "POST", self.login_endpoint, {"data": data, "auth": auth}
+
+    def _process_login_response(self, token: dict) -> Union[AuthBase, Callable]:
+        self.auth_header = {"Authorization": f"Bearer {token['access_token']}"}
+        if token.get("expires_in"):
+            self.expires_at = int(time.time()) + int(token["expires_in"])
+
+        return self
 
+    def login(self, transport: Transport = requests.request) -> Union[AuthBase, Callable]:
+        method, url, request_parameters = self._build_login_request()
+        response = transport(method, url, **request_parameters)
         response.raise_for_status()
+        return self._process_login_response(response.json())
 
-        self.auth_header = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    def export_token(self) -> dict | None:
+        return {"auth_header": self.auth_header}
 
+    def restore_token(self, token: dict, expires_at: float) -> Union[AuthBase, Callable]:
+        self.auth_header = token["auth_header"]
+        self.expires_at = expires_at
         return self
 
     def get_secrets(self) -> list[str]:
@@ -0,0 +1,77 @@
+import threading
+import time
+from typing import Callable
+
+
+class BudgetExhaustedError(Exception):
+    pass
+
+
+class ExecutionBudget:
+    """
+    Wall clock time budget of a single action. All requests of the action share it, each request gets timeout
+    limited by the remaining time and no new requests are started once the budget is spent.
+    """
+
+    def __init__(self, seconds: float, clock: Callable[[], float] = time.monotonic):
+        """
+
+        Args:
+            seconds: total time available for the action
+            clock: monotonic clock returning seconds
+        """
+        self.seconds = seconds
+        self._clock = clock
+        self._deadline = clock() + seconds
+        self._truncated = False
+        self._lock = threading.Lock()
+
+    def remaining(self) -> float:
+        """
+        Seconds left until the deadline, never negative
+        """
+        return max(0.0, self._deadline - self._clock())
+
+    @property
+    def deadline(self) -> float:
+        """
+        Time of the clock the budget is spent at
+        """
+        return self._deadline
+
+    @property
+    def exhausted(self) -> bool:
+        return self.remaining() <= 0
+
+    @property
+    def truncated(self) -> bool:
+        """
+        True if some work was skipped because the budget was spent
+        """
+        return self._truncated
+
+    def mark_truncated(self):
+        with self._lock:
+            self._truncated = True
+
+    def request_timeout(self, timeout: float | tuple | None = None) -> float | tuple:
+        """
+        Limit the request timeout by the remaining budget
+        Args:
+            timeout: configured timeout, either a single value or (connect, read) tuple as accepted by requests
+
+        Returns:
+            timeout in the same format, no longer than the remaining budget
+
+        Raises:
+            BudgetExhaustedError: if there is no time left
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise BudgetExhaustedError(f"The time budget of {self.seconds}s was exhausted.")
+
+        if isinstance(timeout, tuple):
+            return tuple(remaining if t is None else min(t, remaining) for t in timeout)
+        if timeout is None:
+            return remaining
+        return min(timeout, remaining)
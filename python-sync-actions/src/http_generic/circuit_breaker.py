@@ -0,0 +1,147 @@
+import re
+import threading
+import time
+from typing import Callable, Literal
+from urllib.parse import urlparse
+
+# number of consecutive failures opening the circuit
+DEFAULT_FAILURE_THRESHOLD = 5
+# seconds the open circuit rejects the requests before a probe request is let through
+DEFAULT_RESET_TIMEOUT = 30.0
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+# path segments identifying a single resource: numeric ids, or longer ones containing digits such as uuids or hashes
+_RESOURCE_SEGMENT = re.compile(r"^(\d+|(?=.*\d)[\w\-.~:@]{8,})$")
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+def endpoint_template(path: str) -> str:
+    """
+    Replace the path segments identifying a single resource by `{}`, e.g. `users/123/orders` -> `users/{}/orders`
+    """
+    return "/".join("{}" if _RESOURCE_SEGMENT.match(segment) else segment for segment in path.split("/"))
+
+
+def endpoint_key(url: str) -> str:
+    """
+    Host and endpoint template of the URL, e.g. `api.example.com/users/{}/orders`
+    """
+    parsed = urlparse(url)
+    return f"{parsed.netloc.lower()}{endpoint_template(parsed.path)}"
+
+
+class _Circuit:
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.rejected = 0
+        self.last_error = ""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker of the requests, keyed by the host or the host and the endpoint template. After
+    `failure_threshold` consecutive failures the circuit opens and the requests fail fast without being sent.
+    After `reset_timeout` seconds a single probe request is let through (half-open), its success closes
+    the circuit and its failure opens it again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+        scope: Literal["host", "endpoint"] = "endpoint",
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+
+        Args:
+            failure_threshold: number of consecutive failures opening the circuit
+            reset_timeout: seconds the circuit stays open before a probe request
+            scope: `host` shares the circuit by all endpoints of a host, `endpoint` keeps one per endpoint template
+            clock: monotonic clock returning seconds
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.scope = scope
+        self._clock = clock
+        self._circuits: dict[str, _Circuit] = {}
+        self._lock = threading.Lock()
+
+    def key(self, url: str) -> str:
+        """
+        Key of the circuit the request to the URL belongs to
+        """
+        if self.scope == "host":
+            return urlparse(url).netloc.lower()
+        return endpoint_key(url)
+
+    def before_request(self, key: str):
+        """
+        Check the request may be sent
+        Args:
+            key: circuit key built by `key`
+
+        Raises:
+            CircuitOpenError: if the circuit is open, the message summarizes the failures
+        """
+        with self._lock:
+            circuit = self._circuits.setdefault(key, _Circuit())
+            if circuit.state == OPEN and self._clock() - circuit.opened_at >= self.reset_timeout:
+                circuit.state = HALF_OPEN
+            if circuit.state == HALF_OPEN and not circuit.probing:
+                circuit.probing = True
+                return
+            if circuit.state == CLOSED:
+                return
+            circuit.rejected += 1
+            raise CircuitOpenError(
+                f"The circuit of {key} is open after {circuit.failures} consecutive failures, "
+                f"{circuit.rejected} requests were not sent. Last failure: {circuit.last_error}"
+            )
+
+    def record_success(self, key: str):
+        with self._lock:
+            circuit = self._circuits.setdefault(key, _Circuit())
+            circuit.state = CLOSED
+            circuit.failures = 0
+            circuit.rejected = 0
+            circuit.probing = False
+
+    def record_failure(self, key: str, error: str):
+        """
+        Register failed request
+        Args:
+            key: circuit key built by `key`
+            error: description of the failure included in the summary
+        """
+        with self._lock:
+            circuit = self._circuits.setdefault(key, _Circuit())
+            circuit.failures += 1
+            circuit.last_error = error
+            circuit.probing = False
+            if circuit.state == HALF_OPEN or circuit.failures >= self.failure_threshold:
+                circuit.state = OPEN
+                circuit.opened_at = self._clock()
+
+    def release(self, key: str):
+        """
+        End the request without a verdict, e.g. when it failed before it was sent
+        """
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit:
+                circuit.probing = False
+
+    def state(self, key: str) -> str:
+        with self._lock:
+            circuit = self._circuits.get(key)
+            return circuit.state if circuit else CLOSED
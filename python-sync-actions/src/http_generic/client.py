@@ -1,10 +1,30 @@
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from http.cookiejar import DefaultCookiePolicy
+from typing import Optional
+
 import requests
+import urllib3
 from keboola.http_client import HttpClient
 from requests.adapters import HTTPAdapter
 from requests.exceptions import HTTPError, InvalidJSONError, ConnectionError
-from urllib3 import Retry
 
 from http_generic.auth import AuthMethodBase
+from http_generic.circuit_breaker import CircuitBreaker, CircuitOpenError, endpoint_key
+from http_generic.concurrency import AdaptiveConcurrencyLimiter, is_congested
+from http_generic.hedging import HedgePolicy
+from http_generic.http2 import HTTP2Adapter
+from http_generic.rate_limit import RateLimiter, host_key
+from http_generic.retry import BudgetedRetry, RetryBudget
+from http_generic.response_cache import ResponseCache, build_cache_key
+from http_generic.token_cache import EXPIRY_MARGIN, TokenCache
+
+# number of connections kept open per host, requests' default
+DEFAULT_POOL_MAXSIZE = 10
+# encodings urllib3 can decode: gzip and deflate, br and zstd when the optional brotli and zstandard are installed
+ACCEPT_ENCODING = ", ".join(urllib3.util.request.ACCEPT_ENCODING.split(","))
 
 
 class HttpClientError(Exception):
@@ -13,7 +33,6 @@ class HttpClientError(Exception):
         super().__init__(message)
 
 
-# TODO: add support for pagination methods
 class GenericHttpClient(HttpClient):
     def __init__(
         self,
@@ -24,7 +43,47 @@ class GenericHttpClient(HttpClient):
         max_retries: int = 10,
         backoff_factor: float = 0.3,
         status_forcelist: tuple[int, ...] = (500, 502, 504),
+        timeout: float | tuple | None = None,
+        verify: bool | str = True,
+        cert: str | None = None,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        token_cache: TokenCache = None,
+        response_cache: ResponseCache = None,
+        http2: bool = False,
+        rate_limiter: RateLimiter = None,
+        concurrency_limiter: AdaptiveConcurrencyLimiter = None,
+        retry_budget: RetryBudget = None,
+        max_retry_time: float | None = None,
+        circuit_breaker: CircuitBreaker = None,
+        hedge_policy: HedgePolicy = None,
     ):
+        """
+
+        Args:
+            base_url: base url of the API
+            default_http_header: headers sent with each API request
+            default_params: query parameters sent with each API request
+            auth_method: authentication method
+            max_retries: maximum number of retries of a single request
+            backoff_factor: backoff factor of the retries
+            status_forcelist: status codes that are retried
+            timeout: default timeout of all requests including the login
+            verify: verify the TLS certificates, or path to the CA bundle
+            cert: path to the client certificate bundled with the private key
+            pool_maxsize: number of connections kept open per host, should match the number of parallel requests
+            token_cache: cache of the login tokens, the login is performed on each action if not set
+            response_cache: cache of the successful responses, the API is called on each request if not set
+            http2: send the requests over HTTP/2 using httpx, the parallel requests share a single connection
+            rate_limiter: scheduler pacing the requests by the rate limits announced by the API, the requests
+                          are sent immediately and only the `Retry-After` header is honored on retries if not set
+            concurrency_limiter: adaptive limit of the requests in flight shared by all threads using the client
+            retry_budget: retries shared by all requests of the action, the retries are limited per request only
+                          if not set
+            max_retry_time: maximum number of seconds a single request may spend retrying
+            circuit_breaker: circuit breaker failing fast the requests to the endpoints failing repeatedly
+            hedge_policy: policy sending a duplicate of the GET requests slower than usual,
+                          the first non-5xx response wins
+        """
         super().__init__(
             base_url=base_url,
             max_retries=max_retries,
@@ -35,21 +94,174 @@ class GenericHttpClient(HttpClient):
         )
 
         self._auth_method = auth_method
+        self.timeout = timeout
+        self.verify = verify
+        self.cert = cert or None
+        self.pool_maxsize = pool_maxsize
+        self.http2 = http2
+        self._rate_limiter = rate_limiter
+        self._concurrency_limiter = concurrency_limiter
+        self._retry_budget = retry_budget
+        self.max_retry_time = max_retry_time
+        self._circuit_breaker = circuit_breaker
+        self._hedge_policy = hedge_policy
+        # the hedged requests and their duplicates run in their own threads, created on the first use
+        self._hedge_executor: ThreadPoolExecutor | None = None
+        self._hedge_executor_lock = threading.Lock()
+        self._token_cache = token_cache
+        self._response_cache = response_cache
+        # serializes the logins, the generation is increased by each login
+        self._login_lock = threading.Lock()
+        self._login_generation = 0
+        # single session shared by all requests and threads, so the connections are kept alive and reused
+        self._session = self._requests_retry_session()
+        # requests are independent of each other as if each used its own session, cookies are not persisted
+        self._session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        # responses are decoded incrementally, so the compressed bodies may be streamed as well
+        self._session.headers["Accept-Encoding"] = ACCEPT_ENCODING
 
     def login(self):
         """
-        Perform login based on auth method
+        Perform login based on auth method. The login requests are sent using the same transport as the API calls.
+        A valid cached token is reused instead of the login.
 
         """
-        # perform login
-        if self._auth_method:
-            self._auth = self._auth_method.login()
+        with self._login_lock:
+            self._login()
+
+    def _login(self):
+        if not self._auth_method:
+            return
+
+        cache_key = self._auth_method.cache_key
+        use_cache = self._token_cache is not None and cache_key is not None and self._auth_method.token_based
+        if use_cache and (cached := self._token_cache.get(cache_key)):
+            token, expires_at = cached
+            self._auth = self._auth_method.restore_token(token, expires_at)
+        else:
+            # perform login
+            self._auth = self._auth_method.login(transport=self.transport)
+            if use_cache and self._auth_method.expires_at is not None:
+                self._token_cache.set(cache_key, self._auth_method.export_token(), self._auth_method.expires_at)
+        self._login_generation += 1
+
+    def _relogin(self, generation: int):
+        """
+        Login again unless another thread already did it. Parallel requests failing on the same expired token
+        wait for a single login.
+        Args:
+            generation: login generation the failed request was sent with
+        """
+        with self._login_lock:
+            if generation != self._login_generation:
+                return
+            logging.info("Authentication token expired, logging in again")
+            if self._token_cache is not None and self._auth_method.cache_key is not None:
+                self._token_cache.invalidate(self._auth_method.cache_key)
+            self._login()
+
+    def _refresh_expiring_login(self) -> int:
+        """
+        Login again if the token is about to expire.
+
+        Returns:
+            login generation the request is sent with
+        """
+        generation = self._login_generation
+        expires_at = self._auth_method.expires_at if self._auth_method else None
+        if expires_at is not None and expires_at - EXPIRY_MARGIN <= time.time():
+            self._relogin(generation)
+        return self._login_generation
+
+    def transport(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send request to an absolute URL using the pooled session, retries, TLS settings and timeout of the client.
+        Default headers, parameters and authentication of the API are not applied.
+        Args:
+            method: HTTP method
+            url: absolute URL
+            **kwargs: arguments of `requests.Session.request`
+
+        Returns:
+            requests.Response
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        kwargs.setdefault("verify", self.verify)
+        kwargs.setdefault("cert", self.cert)
+        host = host_key(url)
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire(host)
+        started = self._concurrency_limiter.acquire() if self._concurrency_limiter is not None else None
+        congested = False
+        try:
+            response = self._session.request(method, url, **kwargs)
+            congested = started is not None and is_congested(response)
+        except (ConnectionError, requests.Timeout):
+            congested = True
+            raise
+        finally:
+            if started is not None:
+                self._concurrency_limiter.release(started, congested)
+
+        if self._rate_limiter is not None:
+            self._rate_limiter.observe(host, response.headers)
+        return response
+
+    def _get_cached_response(
+        self, method: str, endpoint_path: str, kwargs: dict
+    ) -> tuple[requests.Response | None, str, requests.PreparedRequest]:
+        """
+        Look up the request in the response cache
+        Args:
+            method: HTTP method
+            endpoint_path: endpoint path relative to the base url
+            kwargs: arguments of the request
+
+        Returns:
+            tuple (cached response or None, cache key of the request, request to attach to the cached response)
+        """
+        url = self._build_url(endpoint_path)
+        headers = {**(kwargs.get("headers") or {}), **self._default_header, **self._auth_header}
+        params = {**(kwargs.get("params") or {}), **(self._default_params or {})}
+        body = kwargs.get("json", kwargs.get("data"))
+        auth_scope = self._auth_method.cache_key if self._auth_method else None
+        key = build_cache_key(method, url, params, headers, body, auth_scope)
+
+        # the request is rebuilt without the authentication, so the cache does not need to store the credentials
+        request = requests.Request(
+            method, url, headers=headers, params=params, json=kwargs.get("json"), data=kwargs.get("data")
+        ).prepare()
+        return self._response_cache.get(key, request), key, request
 
     def send_request(self, method, endpoint_path, **kwargs):
         resp = None
+        cache_key = None
+        validators = {}
+        if self._response_cache is not None:
+            cached, cache_key, cached_request = self._get_cached_response(method, endpoint_path, kwargs)
+            if cached is not None:
+                logging.debug(f'Request "{method}: {endpoint_path}" served from the cache')
+                return cached
+            # expired response is revalidated by a conditional request
+            validators = self._response_cache.get_validators(cache_key)
         try:
-            resp = self._request_raw(method=method, endpoint_path=endpoint_path, is_absolute_path=False, **kwargs)
+            if validators:
+                conditional_headers = {**(kwargs.get("headers") or {}), **validators}
+                resp = self._send_guarded(method, endpoint_path, **{**kwargs, "headers": conditional_headers})
+            else:
+                resp = self._send_guarded(method, endpoint_path, **kwargs)
+            if validators and resp.status_code == 304:
+                resp.close()
+                revalidated = self._response_cache.revalidate(cache_key, resp, cached_request)
+                if revalidated is not None:
+                    logging.debug(f'Request "{method}: {endpoint_path}" not modified, served from the cache')
+                    return revalidated
+                # the cached response was evicted in the meantime, the full response is requested
+                resp = self._send_guarded(method, endpoint_path, **kwargs)
             resp.raise_for_status()
+            # streamed responses may be read only partially, they are not cached
+            if cache_key is not None and not kwargs.get("stream"):
+                self._response_cache.set(cache_key, resp)
             return resp
         except HTTPError as e:
             if e.response.status_code in self.status_forcelist:
@@ -72,6 +284,140 @@ class GenericHttpClient(HttpClient):
         except ConnectionError as e:
             message = f'Request "{method}: {endpoint_path}" failed with the following error: {e}'
             raise HttpClientError(message, resp) from e
+        except CircuitOpenError as e:
+            message = f'Request "{method}: {endpoint_path}" was not sent. {e}'
+            raise HttpClientError(message) from e
+
+    def _send_guarded(self, method: str, endpoint_path: str, **kwargs) -> requests.Response:
+        """
+        Send the request through the circuit breaker, the failures are counted after the retries
+
+        Raises:
+            CircuitOpenError: if the endpoint failed repeatedly and the request was not sent
+        """
+        if self._circuit_breaker is None:
+            return self._send_authenticated(method, endpoint_path, **kwargs)
+
+        circuit_key = self._circuit_breaker.key(self._build_url(endpoint_path))
+        self._circuit_breaker.before_request(circuit_key)
+        try:
+            resp = self._send_authenticated(method, endpoint_path, **kwargs)
+        except (ConnectionError, requests.Timeout) as e:
+            self._circuit_breaker.record_failure(circuit_key, str(e))
+            raise
+        except Exception:
+            self._circuit_breaker.release(circuit_key)
+            raise
+
+        if resp.status_code >= 500 or resp.status_code in self.status_forcelist:
+            self._circuit_breaker.record_failure(circuit_key, f"Status Code: {resp.status_code}")
+        else:
+            self._circuit_breaker.record_success(circuit_key)
+        return resp
+
+    def _send_authenticated(self, method: str, endpoint_path: str, **kwargs) -> requests.Response:
+        """
+        Send the request, login again and retry once if the token was rejected
+        """
+        relogin = self._auth_method is not None and self._auth_method.token_based
+        generation = self._refresh_expiring_login() if relogin else None
+        resp = self._request_hedged(method, endpoint_path, **kwargs)
+        if relogin and resp.status_code == 401:
+            # the token was revoked or expired earlier than announced, retry once with a new one
+            resp.close()
+            self._relogin(generation)
+            resp = self._request_hedged(method, endpoint_path, **kwargs)
+        return resp
+
+    def _request_hedged(self, method: str, endpoint_path: str, **kwargs) -> requests.Response:
+        """
+        Send the request, GET request not answered within the usual latency of its endpoint is sent once more
+        and the first successful response is returned. The other one is closed when it arrives.
+        """
+        if self._hedge_policy is None or not self._hedge_policy.enabled or method.upper() != "GET":
+            return self._request_raw(method=method, endpoint_path=endpoint_path, is_absolute_path=False, **kwargs)
+
+        key = endpoint_key(self._build_url(endpoint_path))
+        started = time.monotonic()
+        delay = self._hedge_policy.delay(key)
+        if delay is None:
+            resp = self._request_raw(method=method, endpoint_path=endpoint_path, is_absolute_path=False, **kwargs)
+            self._hedge_policy.observe(key, time.monotonic() - started)
+            return resp
+
+        def send() -> requests.Response:
+            return self._request_raw(method=method, endpoint_path=endpoint_path, is_absolute_path=False, **kwargs)
+
+        executor = self._get_hedge_executor()
+        primary = executor.submit(send)
+        attempts = [primary]
+        pending = {primary}
+        if not wait(pending, timeout=delay).done and self._hedge_policy.acquire():
+            logging.debug(f'Request "{method}: {endpoint_path}" is slower than usual, sending it once more')
+            attempts.append(executor.submit(send))
+            pending.add(attempts[-1])
+
+        winner = None
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = next((future for future in done if self._is_successful(future)), None)
+        if winner is None:
+            # all attempts failed, the error or the response of the original request is returned
+            winner = primary
+        for future in attempts:
+            if future is not winner:
+                future.add_done_callback(self._close_response)
+        if winner is not primary:
+            self._hedge_policy.record_win()
+        if self._is_successful(winner):
+            self._hedge_policy.observe(key, time.monotonic() - started)
+        return winner.result()
+
+    @staticmethod
+    def _is_successful(future: Future) -> bool:
+        """
+        A fast server error must not win over the slower success of the other attempt
+        """
+        return future.exception() is None and future.result().status_code < 500
+
+    def _get_hedge_executor(self) -> ThreadPoolExecutor:
+        with self._hedge_executor_lock:
+            if self._hedge_executor is None:
+                # each thread using the client may have its request and a duplicate in flight
+                self._hedge_executor = ThreadPoolExecutor(max_workers=2 * self.pool_maxsize)
+            return self._hedge_executor
+
+    def close(self):
+        """
+        Release the threads of the hedged requests, the responses already returned stay readable
+        """
+        with self._hedge_executor_lock:
+            if self._hedge_executor is not None:
+                # the duplicates still in flight are closed by their callbacks, they are not waited for
+                self._hedge_executor.shutdown(wait=False)
+                self._hedge_executor = None
+
+    @staticmethod
+    def _close_response(future: Future):
+        if not future.cancelled() and future.exception() is None:
+            future.result().close()
+
+    # override to reuse the pooled session, the headers and authentication are passed with each request
+    def _request_raw(self, method: str, endpoint_path: Optional[str] = None, **kwargs) -> requests.Response:
+        is_absolute_path = kwargs.pop("is_absolute_path", False)
+        url = self._build_url(endpoint_path, is_absolute_path)
+
+        # default headers take precedence as in the parent implementation
+        headers = {**(kwargs.pop("headers", None) or {}), **self._default_header}
+        if kwargs.pop("ignore_auth", False) is False:
+            headers.update(self._auth_header)
+            kwargs["auth"] = self._auth
+
+        params = kwargs.pop("params", None) or {}
+        if self._default_params is not None:
+            params = {**params, **self._default_params}
+
+        return self.transport(method, url, headers=headers, params=params, **kwargs)
 
     def build_url(self, base_url, endpoint_path):
         self.base_url = base_url
@@ -80,7 +426,7 @@ class GenericHttpClient(HttpClient):
     # override to continue on retry error
     def _requests_retry_session(self, session=None):
         session = session or requests.Session()
-        retry = Retry(
+        retry = BudgetedRetry(
             total=self.max_retries,
             read=self.max_retries,
             connect=self.max_retries,
@@ -88,8 +434,14 @@ class GenericHttpClient(HttpClient):
             status_forcelist=self.status_forcelist,
             allowed_methods=self.allowed_methods,
             raise_on_status=False,
+            rate_limiter=self._rate_limiter,
+            retry_budget=self._retry_budget,
+            max_retry_time=self.max_retry_time,
         )
-        adapter = HTTPAdapter(max_retries=retry)
+        if self.http2:
+            adapter = HTTP2Adapter(max_retries=retry, pool_maxsize=self.pool_maxsize)
+        else:
+            adapter = HTTPAdapter(max_retries=retry, pool_maxsize=self.pool_maxsize)
         session.mount("http://", adapter)
         session.mount("https://", adapter)
         return session
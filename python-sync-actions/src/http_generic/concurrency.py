@@ -0,0 +1,99 @@
+import threading
+import time
+from typing import Callable
+
+import requests
+
+# responses signalling the API is overloaded
+CONGESTION_STATUS_CODES = frozenset([429, 503])
+# latencies below this are not considered spikes, fast responses vary a lot relatively
+MIN_LATENCY_BASELINE = 0.05
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limit of the requests in flight controlled by additive increase and multiplicative decrease (AIMD).
+    The limit grows by one per full window of successful requests while the latency stays flat, and is cut
+    by `decrease_factor` on 429, 503, connection errors or a latency spike. Only requests started after
+    the last decrease may decrease it again, so a burst of failures from the same window counts once.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int,
+        max_limit: int,
+        min_limit: int = 1,
+        decrease_factor: float = 0.5,
+        latency_tolerance: float = 2.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+
+        Args:
+            initial_limit: number of requests allowed in flight at the start
+            max_limit: upper bound of the limit
+            min_limit: lower bound of the limit
+            decrease_factor: multiplier applied to the limit on congestion
+            latency_tolerance: latency exceeding the baseline this many times is a spike
+            clock: monotonic clock returning seconds
+        """
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self._clock = clock
+        self._limit = float(min(max(initial_limit, min_limit), max_limit))
+        self._in_flight = 0
+        # smoothed latency of the uncongested responses
+        self._baseline: float | None = None
+        self._last_decrease = float("-inf")
+        self._condition = threading.Condition()
+        self.decreases = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def acquire(self) -> float:
+        """
+        Wait for a free slot
+        Returns:
+            start time of the request, to be passed to `release`
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._in_flight < int(self._limit))
+            self._in_flight += 1
+            return self._clock()
+
+    def release(self, started: float, congested: bool = False):
+        """
+        Free the slot and adjust the limit by the outcome of the request
+        Args:
+            started: start time returned by `acquire`
+            congested: True if the API responded with 429 or 503 or the request failed to connect
+        """
+        with self._condition:
+            self._in_flight -= 1
+            latency = self._clock() - started
+            baseline = max(self._baseline or latency, MIN_LATENCY_BASELINE)
+            if congested or latency > baseline * self.latency_tolerance:
+                if started >= self._last_decrease:
+                    self._limit = max(float(self.min_limit), self._limit * self.decrease_factor)
+                    self._last_decrease = self._clock()
+                    self.decreases += 1
+            else:
+                # one more slot per window of successful requests
+                self._limit = min(float(self.max_limit), self._limit + 1 / self._limit)
+                self._baseline = latency if self._baseline is None else 0.8 * self._baseline + 0.2 * latency
+            self._condition.notify_all()
+
+
+def is_congested(response: requests.Response) -> bool:
+    """
+    Check if the response or any of its retried attempts signal the API is overloaded
+    """
+    retries = getattr(response.raw, "retries", None)
+    history = retries.history if retries is not None else ()
+    statuses = [response.status_code] + [attempt.status for attempt in history]
+    errors = [attempt.error for attempt in history if attempt.error is not None]
+    return bool(errors) or any(status in CONGESTION_STATUS_CODES for status in statuses)
@@ -0,0 +1,84 @@
+import math
+import threading
+from collections import deque
+
+# number of latencies kept per endpoint
+LATENCY_WINDOW = 100
+# latencies needed before the endpoint requests are hedged
+MIN_SAMPLES = 10
+# percentile of the endpoint latency after which the duplicate request is sent
+DEFAULT_HEDGE_PERCENTILE = 0.95
+
+
+class HedgePolicy:
+    """
+    Hedging of the idempotent requests: a request not answered within the usual latency of its endpoint
+    (the given percentile of the recent latencies) is sent once more and the first non-5xx response wins. The number
+    of the duplicate requests is capped, so the load of the API grows by at most `max_hedges` requests.
+    """
+
+    def __init__(self, max_hedges: int, percentile: float = DEFAULT_HEDGE_PERCENTILE, min_samples: int = MIN_SAMPLES):
+        """
+
+        Args:
+            max_hedges: maximum number of duplicate requests, hedging is disabled if 0
+            percentile: percentile of the endpoint latency the request is hedged after, between 0 and 1
+            min_samples: number of latencies of the endpoint needed before its requests are hedged
+        """
+        self.max_hedges = max_hedges
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self._latencies: dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self.hedges = 0
+        self.wins = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_hedges > 0
+
+    def observe(self, key: str, latency: float):
+        """
+        Register latency of a request
+        Args:
+            key: endpoint key built by `endpoint_key`
+            latency: seconds the response took
+        """
+        with self._lock:
+            self._latencies.setdefault(key, deque(maxlen=LATENCY_WINDOW)).append(latency)
+
+    def delay(self, key: str) -> float | None:
+        """
+        Seconds after which the request of the endpoint is hedged
+        Args:
+            key: endpoint key built by `endpoint_key`
+
+        Returns:
+            the percentile of the recent latencies or None if the request should not be hedged
+        """
+        with self._lock:
+            if self.hedges >= self.max_hedges:
+                return None
+            latencies = sorted(self._latencies.get(key, ()))
+        if len(latencies) < self.min_samples:
+            return None
+        return latencies[min(len(latencies) - 1, math.ceil(self.percentile * len(latencies)) - 1)]
+
+    def acquire(self) -> bool:
+        """
+        Take a hedge from the cap
+        Returns:
+            False if all hedges were used
+        """
+        with self._lock:
+            if self.hedges >= self.max_hedges:
+                return False
+            self.hedges += 1
+            return True
+
+    def record_win(self):
+        with self._lock:
+            self.wins += 1
+
+    def to_dict(self) -> dict:
+        return {"hedges": self.hedges, "wins": self.wins}
@@ -0,0 +1,190 @@
+import ssl
+import threading
+from typing import Iterator
+
+import certifi
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3 import HTTPResponse, Retry
+from urllib3.exceptions import MaxRetryError
+
+try:
+    import h2  # noqa: F401
+    import httpx
+except ImportError:
+    httpx = None
+
+
+def build_ssl_context(verify: bool | str, cert: str | tuple | None) -> ssl.SSLContext:
+    """
+    Build SSL context from the TLS settings in the format of requests
+    Args:
+        verify: verify the server certificate, or path to the CA bundle
+        cert: path to the client certificate bundled with the key, or tuple (certificate, key)
+    """
+    if verify is False:
+        context = ssl.create_default_context()
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    else:
+        context = ssl.create_default_context(cafile=verify if isinstance(verify, str) else certifi.where())
+    if cert:
+        context.load_cert_chain(*(cert if isinstance(cert, tuple) else (cert,)))
+    return context
+
+
+def build_timeout(timeout: float | tuple | None) -> "httpx.Timeout":
+    """
+    Convert timeout in the format of requests, either a number or tuple (connect, read)
+    """
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect)
+    return httpx.Timeout(timeout)
+
+
+def build_retry_response(request_method: str, response: "httpx.Response") -> HTTPResponse:
+    """
+    urllib3 response carrying the status and headers the retry decisions are based on
+    """
+    return HTTPResponse(
+        headers=dict(response.headers),
+        status=response.status_code,
+        request_method=request_method,
+        preload_content=False,
+    )
+
+
+def convert_error(error: Exception, request: requests.PreparedRequest) -> requests.RequestException:
+    """
+    Convert httpx transport error to the matching requests exception
+    """
+    if isinstance(error, httpx.ConnectTimeout):
+        return requests.ConnectTimeout(error, request=request)
+    if isinstance(error, httpx.TimeoutException):
+        return requests.ReadTimeout(error, request=request)
+    return requests.ConnectionError(error, request=request)
+
+
+class _HttpxRawResponse:
+    """
+    File-like wrapper of `httpx.Response` used as `requests.Response.raw`, the body is decoded while streamed
+    """
+
+    def __init__(self, response: "httpx.Response"):
+        self._response = response
+
+    def stream(self, chunk_size: int | None = None, decode_content: bool = True) -> Iterator[bytes]:
+        yield from self._response.iter_bytes(chunk_size)
+
+    def read(self, amt: int | None = None, decode_content: bool = True) -> bytes:
+        return self._response.read()
+
+    def tell(self) -> int:
+        """
+        Number of bytes received over the wire, before decoding
+        """
+        return self._response.num_bytes_downloaded
+
+    def close(self):
+        self._response.close()
+
+
+class HTTP2Adapter(BaseAdapter):
+    """
+    Transport adapter of `requests` sending the requests through httpx with HTTP/2 enabled. The parallel requests
+    to the same host are multiplexed over a single connection. HTTP/2 is negotiated on https, plain http
+    requests use HTTP/1.1.
+    """
+
+    def __init__(self, max_retries: Retry, pool_maxsize: int):
+        """
+
+        Args:
+            max_retries: retry configuration, applied the same way as by `requests.adapters.HTTPAdapter`
+            pool_maxsize: maximum number of connections
+
+        Raises:
+            ImportError: if httpx with the http2 extra is not installed
+        """
+        if httpx is None:
+            raise ImportError("HTTP/2 transport requires the httpx package with the http2 extra (h2) installed.")
+        super().__init__()
+        self.max_retries = max_retries
+        self.pool_maxsize = pool_maxsize
+        # TLS settings are set per httpx client while requests passes them with each request
+        self._clients: dict[tuple, httpx.Client] = {}
+        self._lock = threading.Lock()
+
+    def _get_client(self, verify: bool | str, cert: str | tuple | None) -> "httpx.Client":
+        key = (verify, cert)
+        with self._lock:
+            if key not in self._clients:
+                limits = httpx.Limits(max_connections=self.pool_maxsize, max_keepalive_connections=self.pool_maxsize)
+                self._clients[key] = httpx.Client(http2=True, verify=build_ssl_context(verify, cert), limits=limits)
+            return self._clients[key]
+
+    def send(
+        self,
+        request: requests.PreparedRequest,
+        stream: bool = False,
+        timeout: float | tuple | None = None,
+        verify: bool | str = True,
+        cert: str | tuple | None = None,
+        proxies: dict | None = None,
+    ) -> requests.Response:
+        client = self._get_client(verify, cert)
+        retries = self.max_retries
+        while True:
+            httpx_request = client.build_request(
+                request.method,
+                request.url,
+                headers=list(request.headers.items()),
+                content=request.body,
+                timeout=build_timeout(timeout),
+            )
+            try:
+                response = client.send(httpx_request, stream=True)
+            except httpx.TransportError as e:
+                try:
+                    retries = retries.increment(request.method, request.url, error=e)
+                except MaxRetryError:
+                    raise convert_error(e, request) from e
+                retries.sleep()
+                continue
+
+            status = build_retry_response(request.method, response)
+            has_retry_after = "Retry-After" in response.headers
+            if retries.is_retry(request.method, response.status_code, has_retry_after):
+                try:
+                    retries = retries.increment(request.method, request.url, response=status)
+                except MaxRetryError:
+                    # raise_on_status is disabled, the last response is returned
+                    pass
+                else:
+                    response.close()
+                    retries.sleep(status)
+                    continue
+
+            # the body is read by the session unless the response is streamed
+            return self._build_response(request, response)
+
+    def _build_response(self, request: requests.PreparedRequest, response: "httpx.Response") -> requests.Response:
+        requests_response = requests.Response()
+        requests_response.status_code = response.status_code
+        requests_response.reason = response.reason_phrase
+        requests_response.headers = CaseInsensitiveDict(response.headers)
+        requests_response.encoding = get_encoding_from_headers(requests_response.headers)
+        requests_response.raw = _HttpxRawResponse(response)
+        requests_response.url = str(response.url)
+        requests_response.request = request
+        requests_response.connection = self
+        return requests_response
+
+    def close(self):
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients.clear()
@@ -0,0 +1,145 @@
+import codecs
+import json
+from typing import Any, Iterable, Iterator
+
+_WHITESPACE = " \t\n\r"
+
+
+class JsonStreamParser:
+    """
+    Incremental JSON parser walking a document that arrives in chunks (e.g. `requests.Response.iter_content`).
+
+    Only the part of the document that is needed is read: the parser navigates to the value under the given
+    key path and then decodes the array elements one by one, so the consumer may stop reading at any point.
+    Values that are not on the path are decoded and dropped.
+    """
+
+    def __init__(self, chunks: Iterable[bytes | str]):
+        self._chunks = iter(chunks)
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json_decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _read_chunk(self) -> bool:
+        """
+        Append next chunk to the buffer, dropping the already consumed part.
+        Returns:
+            False if the stream is exhausted
+        """
+        if self._eof:
+            return False
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self._eof = True
+            chunk = self._text_decoder.decode(b"", final=True)
+        else:
+            if isinstance(chunk, bytes):
+                chunk = self._text_decoder.decode(chunk)
+
+        self._buffer = self._buffer[self._pos :] + chunk
+        self._pos = 0
+        return True
+
+    def _grow(self) -> bool:
+        """
+        Read until the unconsumed part of the buffer at least doubles, so values spanning many chunks are not
+        re-decoded over and over.
+        Returns:
+            False if the stream is exhausted
+        """
+        target_size = max(2 * (len(self._buffer) - self._pos), 1)
+        read = False
+        while len(self._buffer) - self._pos < target_size and self._read_chunk():
+            read = True
+        return read
+
+    def _peek(self) -> str:
+        """
+        Skip whitespace and return the next character without consuming it, empty string at the end of stream.
+        """
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._read_chunk():
+                return ""
+
+    def _consume(self, expected: str):
+        char = self._peek()
+        if char != expected:
+            raise json.JSONDecodeError(f"Expecting '{expected}'", self._buffer, self._pos)
+        self._pos += 1
+
+    def read_value(self) -> Any:
+        """
+        Decode the next complete JSON value
+        """
+        self._peek()
+        while True:
+            try:
+                value, end = self._json_decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._grow():
+                    raise
+                continue
+
+            # a number (or literal) touching the end of buffer may continue in the next chunk
+            if end == len(self._buffer) and self._buffer[end - 1] not in '"]}' and self._grow():
+                continue
+
+            self._pos = end
+            return value
+
+    def find(self, keys: list[str]) -> bool:
+        """
+        Navigate to the value under the key path. The stream is positioned at the start of the value.
+        Args:
+            keys: keys of the nested objects, empty list for the document root
+
+        Returns:
+            False if the path does not exist in the document
+        """
+        for key in keys:
+            if self._peek() != "{":
+                return False
+            self._consume("{")
+            if self._peek() == "}":
+                return False
+
+            while True:
+                current_key = self.read_value()
+                self._consume(":")
+                if current_key == key:
+                    break
+                # skip the value
+                self.read_value()
+                if self._peek() != ",":
+                    return False
+                self._consume(",")
+        return True
+
+    def is_array(self) -> bool:
+        """
+        True if the value at the current position is an array
+        """
+        return self._peek() == "["
+
+    def iter_array(self) -> Iterator[Any]:
+        """
+        Decode elements of the array at the current position one by one
+        """
+        self._consume("[")
+        if self._peek() == "]":
+            self._pos += 1
+            return
+
+        while True:
+            yield self.read_value()
+            if self._peek() == "]":
+                self._pos += 1
+                return
+            self._consume(",")
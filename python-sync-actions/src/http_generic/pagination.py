@@ -1,12 +1,300 @@
+import hashlib
+import json
+import time
+from collections import deque
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, Callable, Iterator
+from urllib.parse import parse_qsl
+
+from php_compat import php_bool, php_strtotime
+
+
+@dataclass(frozen=True)
+class PageRequest:
+    """
+    Changes of the job request needed to fetch a single page
+    """
+
+    # parameters overriding the job query parameters
+    params: dict = field(default_factory=dict)
+    # parameters used only if the job query parameters don't define them
+    default_params: dict = field(default_factory=dict)
+    # False if the job query parameters are not sent
+    include_params: bool = True
+    # endpoint (relative or absolute URL) replacing the job endpoint
+    endpoint_path: str | None = None
+    # method replacing the job method, the job body is not sent with such request
+    method: str | None = None
+
+    def build_params(self, job_params: dict) -> dict:
+        """
+        Merge the page parameters with the query parameters of the job
+        """
+        params = dict(job_params) if self.include_params else {}
+        for key, value in self.default_params.items():
+            params.setdefault(key, value)
+        params.update(self.params)
+        return params
+
+
+@dataclass
+class Page:
+    """
+    Fetched page
+    """
+
+    request: PageRequest
+    # query parameters the page was requested with
+    params: dict
+    response: Any
+    # records parsed from the response data path
+    records: Any
+
+    @property
+    def record_count(self) -> int:
+        if isinstance(self.records, list):
+            return len(self.records)
+        return 1 if self.records else 0
+
+    @cached_property
+    def fingerprint(self) -> bytes:
+        """
+        Digest of the page records, pages with the same records have the same fingerprint
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for record in self.records if isinstance(self.records, list) else [self.records]:
+            digest.update(json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+            # separate the records, so that e.g. ["ab"] and ["a", "b"] differ
+            digest.update(b"\x1e")
+        return digest.digest()
+
+    @cached_property
+    def response_data(self) -> Any:
+        """
+        Decoded response body, None if it is not a valid JSON
+        """
+        try:
+            return self.response.json()
+        except ValueError:
+            return None
+
+    def response_value(self, path: str, delimiter: str = ".", default: Any = None) -> Any:
+        """
+        Value from the response body under the path
+        """
+        value = self.response_data
+        for key in path.split(delimiter):
+            if not isinstance(value, dict) or key not in value:
+                return default
+            value = value[key]
+        return value
+
+
+def _record_value(record: Any, path: str) -> Any:
+    for key in path.split("."):
+        if not isinstance(record, dict):
+            return None
+        record = record.get(key)
+    return record
+
+
+class StopConditions:
+    """
+    Stop conditions shared by all scrollers: `nextPageFlag`, `limitStop` and `forceStop`
+    """
+
+    def __init__(self, paginator_params: dict, clock: Callable[[], float] = time.monotonic):
+        self.next_page_flag = paginator_params.get("nextPageFlag") or {}
+        self.limit_stop = paginator_params.get("limitStop") or {}
+        force_stop = paginator_params.get("forceStop") or {}
+        self.max_pages = int(force_stop["pages"]) if force_stop.get("pages") else None
+        self.max_volume = int(force_stop["volume"]) if force_stop.get("volume") else None
+        self.max_time = self._parse_time(force_stop["time"]) if force_stop.get("time") else None
+
+        self._clock = clock
+        self._started = clock()
+        self._pages = 0
+        self._records = 0
+        self._volume = 0
+
+    @staticmethod
+    def _parse_time(value: Any) -> float:
+        """
+        Time limit in seconds, either a number or a relative time such as "5 minutes"
+        """
+        try:
+            return float(value)
+        except ValueError:
+            return float(php_strtotime(value, 0))
+
+    def is_reached(self, page: Page) -> bool:
+        """
+        Register the page and check the conditions
+        Returns:
+            True if no more pages should be fetched
+        """
+        self._pages += 1
+        self._records += page.record_count
+        if self.max_volume is not None:
+            self._volume += len(json.dumps(page.records, separators=(",", ":")))
+
+        if self.next_page_flag:
+            if "ifNotSet" in self.next_page_flag:
+                default = self.next_page_flag["ifNotSet"]
+            else:
+                default = self.next_page_flag.get("stopOn")
+            # both values are compared as booleans, e.g. "hasMore": "no" is true as in the PHP extractor
+            value = page.response_value(self.next_page_flag["field"], default=default)
+            if php_bool(value) == php_bool(self.next_page_flag.get("stopOn")):
+                return True
+
+        if self.limit_stop:
+            if "field" in self.limit_stop:
+                limit = page.response_value(self.limit_stop["field"])
+            else:
+                limit = self.limit_stop.get("count")
+            if limit is not None and self._records >= int(limit):
+                return True
+
+        if self.max_pages is not None and self._pages >= self.max_pages:
+            return True
+        if self.max_volume is not None and self._volume >= self.max_volume:
+            return True
+        if self.max_time is not None and self._clock() - self._started >= self.max_time:
+            return True
+        return False
+
+
 class BasePagination:
+    def __init__(self, paginator_params: dict | None = None):
+        self.paginator_params = paginator_params or {}
+
     def get_page_params(self, paginator_params):
         raise NotImplementedError("Subclasses should implement this method")
 
+    def first_request(self) -> PageRequest:
+        return PageRequest(params=self.get_page_params(self.paginator_params))
+
+    def next_request(self, page: Page) -> PageRequest | None:
+        """
+        Request of the page following the given one
+        Returns:
+            None if there are no more pages
+        """
+        raise NotImplementedError("Subclasses should implement this method")
+
+    def predict_next_request(self, request: PageRequest) -> PageRequest | None:
+        """
+        Request of the page following the given one, assuming the page is full. Only scrollers whose next request
+        does not depend on the response content can predict it.
+        Returns:
+            None if the request can't be predicted
+        """
+        return None
+
+    def iter_pages(
+        self,
+        fetch: Callable[[PageRequest], Page],
+        max_pages: int | None = None,
+        executor: Executor | None = None,
+        prefetch: int = 0,
+    ) -> Iterator[Page]:
+        """
+        Fetch the pages lazily, one by one, until a stop condition is met. The consumer may stop the iteration
+        at any time, no request is sent before the page is requested.
+
+        The iteration also stops when a page repeats the previous one, the repeated page is not returned.
+
+        With prefetch, scrollers that can predict their requests fetch the next pages in parallel in advance.
+        Pages fetched beyond the stop condition are discarded, the pending ones are cancelled.
+        Args:
+            fetch: function sending the page request and parsing the response
+            max_pages: maximum number of pages to fetch
+            executor: executor used to prefetch the pages
+            prefetch: number of pages fetched in advance
+
+        Returns:
+            iterator of the fetched pages
+        """
+        stop_conditions = StopConditions(self.paginator_params)
+        pending: deque[tuple[PageRequest, Future]] = deque()
+        request = self.first_request()
+        fetched = 0
+        previous_fingerprint = None
+        try:
+            while request is not None and (max_pages is None or fetched < max_pages):
+                if executor and prefetch:
+                    if pending and pending[0][0] != request:
+                        # the prediction failed, e.g. the API returned less records than the limit
+                        self._discard(pending)
+                    self._fill_prefetch_window(request, pending, fetch, executor, prefetch, max_pages, fetched)
+
+                if pending and pending[0][0] == request:
+                    page = pending.popleft()[1].result()
+                else:
+                    page = fetch(request)
+                fetched += 1
+
+                if previous_fingerprint == page.fingerprint:
+                    # the API repeats the same page, e.g. it ignores the page parameters
+                    return
+                previous_fingerprint = page.fingerprint
+
+                yield page
+                if not page.record_count or stop_conditions.is_reached(page):
+                    return
+                request = self.next_request(page)
+        finally:
+            self._discard(pending)
+
+    def _fill_prefetch_window(
+        self,
+        request: PageRequest,
+        pending: deque,
+        fetch: Callable[[PageRequest], Page],
+        executor: Executor,
+        prefetch: int,
+        max_pages: int | None,
+        fetched: int,
+    ):
+        window = prefetch + 1
+        if max_pages is not None:
+            window = min(window, max_pages - fetched)
+
+        next_request = pending[-1][0] if pending else request
+        if not pending:
+            pending.append((request, executor.submit(fetch, request)))
+        while len(pending) < window:
+            next_request = self.predict_next_request(next_request)
+            if next_request is None:
+                return
+            pending.append((next_request, executor.submit(fetch, next_request)))
+
+    @staticmethod
+    def _discard(pending: deque):
+        """
+        Cancel the prefetched pages that are not needed, close the responses of those already running
+        """
+
+        def close_response(future: Future):
+            if not future.cancelled() and future.exception() is None:
+                future.result().response.close()
+
+        while pending:
+            _, future = pending.popleft()
+            if not future.cancel():
+                future.add_done_callback(close_response)
+
 
 class DummyPagination(BasePagination):
     def get_page_params(self, paginator_params):
         return {}
 
+    def next_request(self, page: Page) -> PageRequest | None:
+        return None
+
 
 class OffsetPagination(BasePagination):
     def get_page_params(self, paginator_params):
@@ -16,24 +304,136 @@ class OffsetPagination(BasePagination):
             page_params[paginator_params.get("limitParam", "limit")] = paginator_params.get("limit")
         return page_params
 
+    def first_request(self) -> PageRequest:
+        page_params = self.get_page_params(self.paginator_params)
+        if self.paginator_params.get("offsetFromJob"):
+            return PageRequest(default_params=page_params)
+        return PageRequest(params=page_params)
+
+    def next_request(self, page: Page) -> PageRequest | None:
+        offset_param = self.paginator_params.get("offsetParam", "offset")
+        limit_param = self.paginator_params.get("limitParam", "limit")
+        limit = page.params.get(limit_param) or self.paginator_params.get("limit")
+        if not limit:
+            # the page size is unknown, the end of data can't be detected
+            return None
+        limit = int(limit)
+        if page.record_count < limit:
+            # underflow, the last page
+            return None
+        offset = int(page.params.get(offset_param, self.paginator_params.get("offset", 0)))
+        return PageRequest(params={offset_param: offset + limit, limit_param: limit})
+
+    def predict_next_request(self, request: PageRequest) -> PageRequest | None:
+        offset_param = self.paginator_params.get("offsetParam", "offset")
+        limit_param = self.paginator_params.get("limitParam", "limit")
+        if offset_param not in request.params or not request.params.get(limit_param):
+            # the first page, the job parameters are not known
+            return None
+        limit = int(request.params[limit_param])
+        return PageRequest(params={offset_param: int(request.params[offset_param]) + limit, limit_param: limit})
+
 
 class PageNumPagination(BasePagination):
     def get_page_params(self, paginator_params):
         page_params = {}
-        if paginator_params.get("firstPageParams"):
+        if paginator_params.get("firstPageParams", True):
             page_params[paginator_params.get("pageParam", "page")] = paginator_params.get("firstPage", 1)
             if paginator_params.get("limit"):
                 page_params[paginator_params.get("limitParam", "limit")] = paginator_params.get("limit")
         return page_params
 
+    def next_request(self, page: Page) -> PageRequest | None:
+        page_param = self.paginator_params.get("pageParam", "page")
+        limit_param = self.paginator_params.get("limitParam", "limit")
+        limit = page.params.get(limit_param) or self.paginator_params.get("limit")
+        if limit and page.record_count < int(limit):
+            return None
+
+        page_number = int(page.params.get(page_param, self.paginator_params.get("firstPage", 1))) + 1
+        default_params = {limit_param: limit} if limit else {}
+        return PageRequest(params={page_param: page_number}, default_params=default_params)
+
+    def predict_next_request(self, request: PageRequest) -> PageRequest | None:
+        page_param = self.paginator_params.get("pageParam", "page")
+        if page_param not in request.params:
+            return None
+        # the same limit as `next_request` takes from the sent parameters, so the prediction matches
+        limit_param = self.paginator_params.get("limitParam", "limit")
+        limit = (
+            request.params.get(limit_param)
+            or request.default_params.get(limit_param)
+            or self.paginator_params.get("limit")
+        )
+        default_params = {limit_param: limit} if limit else {}
+        return PageRequest(params={page_param: int(request.params[page_param]) + 1}, default_params=default_params)
+
+
+class CursorPagination(BasePagination):
+    def get_page_params(self, paginator_params):
+        return {}
+
+    def next_request(self, page: Page) -> PageRequest | None:
+        if not isinstance(page.records, list):
+            return None
+        ids = [_record_value(record, self.paginator_params["idKey"]) for record in page.records]
+        ids = [record_id for record_id in ids if record_id is not None]
+        if not ids:
+            return None
+
+        cursor = min(ids) if self.paginator_params.get("reverse") else max(ids)
+        cursor += self.paginator_params.get("increment", 0)
+        return PageRequest(params={self.paginator_params["param"]: cursor})
+
+
+class ResponseUrlPagination(BasePagination):
+    def get_page_params(self, paginator_params):
+        return {}
+
+    def next_request(self, page: Page) -> PageRequest | None:
+        url = page.response_value(
+            self.paginator_params.get("urlKey", "next_page"), self.paginator_params.get("delimiter", ".")
+        )
+        if not url:
+            return None
+
+        include_params = bool(self.paginator_params.get("includeParams", False))
+        if self.paginator_params.get("paramIsQuery"):
+            return PageRequest(params=dict(parse_qsl(url.lstrip("?"))), include_params=include_params)
+        return PageRequest(endpoint_path=url, include_params=include_params)
+
+
+class ResponseParamPagination(BasePagination):
+    def get_page_params(self, paginator_params):
+        return {}
+
+    def next_request(self, page: Page) -> PageRequest | None:
+        value = page.response_value(self.paginator_params["responseParam"])
+        if value is None or value == "":
+            return None
+
+        params = {self.paginator_params["queryParam"]: value}
+        scroll_request = self.paginator_params.get("scrollRequest")
+        if scroll_request:
+            return PageRequest(
+                params={**scroll_request.get("params", {}), **params},
+                include_params=False,
+                endpoint_path=scroll_request.get("endpoint"),
+                method=scroll_request.get("method", "GET"),
+            )
+        return PageRequest(params=params, include_params=bool(self.paginator_params.get("includeParams", False)))
+
 
 class PaginationBuilder:
+    PAGINATORS = {
+        "offset": OffsetPagination,
+        "pagenum": PageNumPagination,
+        "cursor": CursorPagination,
+        "response.url": ResponseUrlPagination,
+        "response.param": ResponseParamPagination,
+    }
+
     @classmethod
-    def get_paginator(cls, pagination):
+    def get_paginator(cls, pagination, paginator_params: dict | None = None):
         """Factory function to create the appropriate paginator configuration."""
-        if pagination == "offset":
-            return OffsetPagination()
-        elif pagination == "pagenum":
-            return PageNumPagination()
-        else:
-            return DummyPagination()
+        return cls.PAGINATORS.get(pagination, DummyPagination)(paginator_params)
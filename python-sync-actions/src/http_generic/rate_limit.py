@@ -0,0 +1,223 @@
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Mapping
+from urllib.parse import urlparse
+
+from urllib3 import BaseHTTPResponse, Retry
+
+from http_generic.budget import BudgetExhaustedError
+
+# header announcing when the API may be called again, used unless configured otherwise
+DEFAULT_RETRY_HEADER = "Retry-After"
+# prefixes of the rate limit headers, e.g. X-RateLimit-Remaining or the standardized RateLimit-Remaining
+RATE_LIMIT_PREFIXES = ("X-RateLimit-", "RateLimit-")
+# numeric values above this are unix timestamps rather than number of seconds
+_TIMESTAMP_THRESHOLD = 10**9
+
+
+def parse_delay(value: str, now: float | None = None) -> float | None:
+    """
+    Parse number of seconds to wait from a header value
+    Args:
+        value: number of seconds, unix timestamp or HTTP date
+        now: current unix timestamp
+
+    Returns:
+        non-negative number of seconds or None if the value is invalid
+    """
+    now = time.time() if now is None else now
+    value = str(value).strip()
+    try:
+        delay = float(value)
+        if delay > _TIMESTAMP_THRESHOLD:
+            delay -= now
+    except ValueError:
+        try:
+            delay = parsedate_to_datetime(value).timestamp() - now
+        except (TypeError, ValueError):
+            return None
+    return max(delay, 0.0)
+
+
+def _parse_number(value: str | None) -> float | None:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def host_key(url: str) -> str:
+    """
+    Key of the host the limits are tracked by
+    """
+    return (urlparse(url).hostname or "").lower()
+
+
+class _HostBucket:
+    def __init__(self):
+        # no requests are sent before this time (monotonic clock)
+        self.paused_until = 0.0
+        # requests left in the current rate limit window, None if the API did not announce any limit
+        self.tokens: float | None = None
+        # end of the current rate limit window, the bucket is refilled then
+        self.reset_at = 0.0
+
+
+class RateLimiter:
+    """
+    Per host scheduler pacing the requests by the limits announced by the API. The remaining requests
+    announced by `X-RateLimit-Remaining` (or `RateLimit-Remaining`) are handed out as tokens, once they run out
+    the requests wait for the window end announced by `X-RateLimit-Reset`. `Retry-After` (or the configured header)
+    of a retried response pauses all requests to the host, not only the retried one.
+
+    Hosts that don't send any of the headers are not limited. A request that could be sent only after
+    the deadline fails instead of waiting.
+    """
+
+    def __init__(
+        self,
+        retry_header: str = DEFAULT_RETRY_HEADER,
+        deadline: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+
+        Args:
+            retry_header: header with the number of seconds, timestamp or date the API may be called again at
+            deadline: time of the clock after which no request is sent, unlimited if not set
+            clock: monotonic clock the waits are planned with
+            sleep: function waiting the given number of seconds
+        """
+        self.retry_header = retry_header or DEFAULT_RETRY_HEADER
+        self.deadline = deadline
+        self._clock = clock
+        self._sleep = sleep
+        self._buckets: dict[str, _HostBucket] = {}
+        self._lock = threading.Lock()
+        # total number of seconds the requests waited
+        self.waited = 0.0
+
+    def _bucket(self, host: str) -> _HostBucket:
+        return self._buckets.setdefault(host, _HostBucket())
+
+    def acquire(self, host: str):
+        """
+        Wait until a request to the host may be sent and take its token
+        Args:
+            host: host key built by `host_key`
+
+        Raises:
+            BudgetExhaustedError: if the request could be sent only after the deadline
+        """
+        while True:
+            with self._lock:
+                bucket = self._bucket(host)
+                now = self._clock()
+                if bucket.tokens is not None and now >= bucket.reset_at:
+                    # the window ended, the limit is unknown until the next response announces it
+                    bucket.tokens = None
+                wait = bucket.paused_until - now
+                if wait <= 0 and bucket.tokens is not None and bucket.tokens < 1:
+                    wait = bucket.reset_at - now
+                if wait <= 0:
+                    if bucket.tokens is not None:
+                        bucket.tokens -= 1
+                    return
+                if self.deadline is not None and now + wait > self.deadline:
+                    raise BudgetExhaustedError(
+                        f"The rate limit of {host} allows the next request in {wait:.1f}s, after the time budget."
+                    )
+                self.waited += wait
+            self._sleep(wait)
+
+    def observe(self, host: str, headers: Mapping[str, str]):
+        """
+        Learn the rate limit of the host from the response headers
+        Args:
+            host: host key built by `host_key`
+            headers: case-insensitive response headers
+        """
+        remaining = reset = None
+        for prefix in RATE_LIMIT_PREFIXES:
+            remaining = _parse_number(headers.get(f"{prefix}Remaining"))
+            reset = headers.get(f"{prefix}Reset")
+            if remaining is not None:
+                break
+        if remaining is None or reset is None:
+            return
+        reset_in = parse_delay(reset)
+        if reset_in is None:
+            return
+
+        with self._lock:
+            bucket = self._bucket(host)
+            reset_at = self._clock() + reset_in
+            if bucket.tokens is None or reset_at > bucket.reset_at + 1:
+                # new window, the API counter is authoritative
+                bucket.tokens = remaining
+                bucket.reset_at = reset_at
+            else:
+                # responses may arrive out of order, the tokens already handed out are not returned
+                bucket.tokens = min(bucket.tokens, remaining)
+                bucket.reset_at = max(bucket.reset_at, reset_at)
+
+    def pause(self, host: str, delay: float):
+        """
+        Stop sending requests to the host for the given number of seconds
+        Args:
+            host: host key built by `host_key`
+            delay: number of seconds
+        """
+        with self._lock:
+            bucket = self._bucket(host)
+            bucket.paused_until = max(bucket.paused_until, self._clock() + delay)
+
+
+class RateLimitRetry(Retry):
+    """
+    Retry waiting for the time announced by the configured retry header, and reporting the rate limits
+    of the retried responses to the rate limiter, so the other requests to the host wait as well.
+    The host is paused only once the retry is taken, a retry given up does not hold back the other requests.
+    """
+
+    def __init__(self, *args, rate_limiter: RateLimiter | None = None, host: str | None = None, **kwargs):
+        """
+
+        Args:
+            rate_limiter: rate limiter of the client
+            host: host key of the retried request, set by `increment`
+            **kwargs: arguments of `Retry`
+        """
+        super().__init__(*args, **kwargs)
+        self.rate_limiter = rate_limiter
+        self.host = host
+
+    def new(self, **kw) -> "RateLimitRetry":
+        kw.setdefault("rate_limiter", self.rate_limiter)
+        kw.setdefault("host", self.host)
+        return super().new(**kw)
+
+    def get_retry_after(self, response: BaseHTTPResponse) -> float | None:
+        header = self.rate_limiter.retry_header if self.rate_limiter else DEFAULT_RETRY_HEADER
+        value = response.headers.get(header)
+        if value is None:
+            return None
+        return parse_delay(value)
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None) -> Retry:
+        # urllib3 passes only the path, the host is taken from the connection pool
+        host = _pool.host.lower() if _pool is not None else host_key(url or "")
+        if self.rate_limiter is not None and response is not None and host:
+            self.rate_limiter.observe(host, response.headers)
+        new_retry = super().increment(method, url, response, error, _pool, _stacktrace)
+        new_retry.host = host
+        return new_retry
+
+    def sleep(self, response: BaseHTTPResponse | None = None) -> None:
+        if self.rate_limiter is not None and response is not None and self.host:
+            delay = self.get_retry_after(response)
+            if delay:
+                self.rate_limiter.pause(self.host, delay)
+        super().sleep(response)
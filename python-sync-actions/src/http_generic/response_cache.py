@@ -0,0 +1,313 @@
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+import requests
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from requests.structures import CaseInsensitiveDict
+
+# default location of the cache, shared by the sync actions running in the same container
+DEFAULT_CACHE_PATH = os.path.join(tempfile.gettempdir(), "generic-extractor-responses.sqlite")
+# maximum total size of the cached bodies in bytes
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+# version of the database schema, the cache is recreated when it changes
+SCHEMA_VERSION = 3
+# headers carrying credentials, they are not part of the key, only of the auth scope
+SECRET_HEADERS = frozenset(
+    ["authorization", "proxy-authorization", "cookie", "x-api-key", "api-key", "x-auth-token", "x-access-token"]
+)
+
+# nonce size recommended for AES-GCM
+_NONCE_SIZE = 12
+
+
+def build_cache_key(
+    method: str,
+    url: str,
+    params: dict | None = None,
+    headers: dict | None = None,
+    body: Any = None,
+    auth_scope: bytes | None = None,
+) -> str:
+    """
+    Build fingerprint of the request. The fingerprint is derived from the request including the credentials,
+    so it is also used to encrypt the cached response.
+    Args:
+        method: HTTP method
+        url: full URL of the request
+        params: query parameters, the order does not matter
+        headers: request headers, the names are case-insensitive. Values of the secret headers
+                 only separate the auth scopes.
+        body: JSON or form body
+        auth_scope: identification of the credentials the response was obtained with
+
+    Returns:
+        hex digest of the request
+    """
+    public_headers = {}
+    scope = hashlib.sha256(auth_scope or b"")
+    for name, value in sorted((headers or {}).items(), key=lambda item: item[0].lower()):
+        if name.lower() in SECRET_HEADERS:
+            scope.update(f"{name.lower()}:{value}\n".encode("utf-8"))
+        else:
+            public_headers[name.lower()] = value
+
+    fingerprint = {
+        "method": method.upper(),
+        "url": url,
+        "params": sorted((str(key), str(value)) for key, value in (params or {}).items()),
+        "headers": public_headers,
+        "body": body,
+        "scope": scope.hexdigest(),
+    }
+    canonical = json.dumps(fingerprint, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite cache of the responses, so the repeated sync actions working with the same job don't call the API again.
+    Entries expire after `ttl` seconds, the least recently used entries are evicted once the total size
+    of the bodies exceeds `max_size`. Each operation uses its own connection, so the cache may be used
+    from multiple threads and processes.
+
+    Expired entries with `ETag` or `Last-Modified` validators are kept, so they may be revalidated
+    by a conditional request and served again if the API responds with 304 Not Modified.
+
+    The metadata and bodies are encrypted and authenticated with AES-256-GCM keyed by the cache key, the entries
+    are stored under a name derived from it. Without the request the response can't be read.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        path: str = DEFAULT_CACHE_PATH,
+        max_size: int = DEFAULT_MAX_SIZE,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+
+        Args:
+            ttl: number of seconds the responses are valid for
+            path: path of the SQLite database
+            max_size: maximum total size of the cached bodies in bytes
+            clock: clock returning unix timestamp
+        """
+        self.ttl = ttl
+        self.path = path
+        self.max_size = max_size
+        self._clock = clock
+        with self._connect() as connection:
+            if connection.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                # the cached responses are disposable, the cache created by another version is dropped
+                connection.execute("DROP TABLE IF EXISTS responses")
+                connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, expires_at REAL, accessed_at REAL, size INTEGER, "
+                "revalidable INTEGER, metadata BLOB, body BLOB)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """
+        Open connection committing the changes on success and closed at the end
+        """
+        connection = sqlite3.connect(self.path, timeout=10)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def get(self, key: str, request: requests.PreparedRequest | None = None) -> requests.Response | None:
+        """
+        Get the cached response
+        Args:
+            key: fingerprint of the request built by `build_cache_key`
+            request: request to attach to the response
+
+        Returns:
+            the response or None if it is not cached or expired
+        """
+        now = self._clock()
+        name = self._entry_name(key)
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT metadata, body FROM responses WHERE key = ? AND expires_at > ?", (name, now)
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, name))
+
+        entry = self._decrypt_entry(key, *row)
+        if entry is None:
+            return None
+        return self._build_response(*entry, request)
+
+    def get_validators(self, key: str) -> dict:
+        """
+        Get conditional request headers revalidating the expired response
+        Args:
+            key: fingerprint of the request built by `build_cache_key`
+
+        Returns:
+            `If-None-Match` and `If-Modified-Since` headers, empty if there is nothing to revalidate
+        """
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT metadata FROM responses WHERE key = ? AND revalidable", (self._entry_name(key),)
+            ).fetchone()
+        entry = self._decrypt_entry(key, row[0]) if row else None
+        if entry is None:
+            return {}
+        headers = CaseInsensitiveDict(entry[0]["headers"])
+        validators = {}
+        if headers.get("ETag"):
+            validators["If-None-Match"] = headers["ETag"]
+        if headers.get("Last-Modified"):
+            validators["If-Modified-Since"] = headers["Last-Modified"]
+        return validators
+
+    def revalidate(
+        self, key: str, not_modified: requests.Response, request: requests.PreparedRequest | None = None
+    ) -> requests.Response | None:
+        """
+        Renew the expired response confirmed by 304 Not Modified response
+        Args:
+            key: fingerprint of the request built by `build_cache_key`
+            not_modified: the 304 response, its headers update the cached ones
+            request: request to attach to the response
+
+        Returns:
+            the cached response or None if it was evicted in the meantime
+        """
+        now = self._clock()
+        name = self._entry_name(key)
+        with self._connect() as connection:
+            row = connection.execute("SELECT metadata, body FROM responses WHERE key = ?", (name,)).fetchone()
+            entry = self._decrypt_entry(key, *row) if row else None
+            if entry is None:
+                return None
+            metadata, body = entry
+            headers = CaseInsensitiveDict(metadata["headers"])
+            # 304 carries the current validators and caching headers, the body related ones are kept
+            for header, value in not_modified.headers.items():
+                if header.lower() not in ("content-length", "content-encoding", "transfer-encoding"):
+                    headers[header] = value
+            metadata["headers"] = dict(headers)
+            connection.execute(
+                "UPDATE responses SET expires_at = ?, accessed_at = ?, revalidable = ?, metadata = ? WHERE key = ?",
+                (
+                    now + self.ttl,
+                    now,
+                    self._is_revalidable(headers),
+                    self._encrypt(key, json.dumps(metadata).encode("utf-8")),
+                    name,
+                ),
+            )
+        return self._build_response(metadata, body, request)
+
+    @staticmethod
+    def _build_response(metadata: dict, body: bytes, request: requests.PreparedRequest | None) -> requests.Response:
+        response = requests.Response()
+        response.status_code = metadata["status_code"]
+        response.reason = metadata["reason"]
+        response.headers = CaseInsensitiveDict(metadata["headers"])
+        response.url = metadata["url"]
+        response.encoding = metadata["encoding"]
+        response._content = body
+        response.request = request
+        response.from_cache = True
+        return response
+
+    def set(self, key: str, response: requests.Response):
+        """
+        Store the response, its body is read completely
+        Args:
+            key: fingerprint of the request built by `build_cache_key`
+            response: response to store
+        """
+        now = self._clock()
+        body = response.content or b""
+        metadata = {
+            "status_code": response.status_code,
+            "reason": response.reason,
+            "headers": dict(response.headers),
+            "url": response.url,
+            "encoding": response.encoding,
+        }
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, expires_at, accessed_at, size, revalidable, metadata, body) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self._entry_name(key),
+                    now + self.ttl,
+                    now,
+                    len(body),
+                    self._is_revalidable(response.headers),
+                    self._encrypt(key, json.dumps(metadata).encode("utf-8")),
+                    self._encrypt(key, body),
+                ),
+            )
+            self._evict(connection, now)
+
+    def _evict(self, connection: sqlite3.Connection, now: float):
+        """
+        Remove the expired entries that can't be revalidated and the least recently used ones exceeding
+        the maximum size
+        """
+        connection.execute("DELETE FROM responses WHERE expires_at <= ? AND NOT revalidable", (now,))
+        connection.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY accessed_at DESC, key) AS total FROM responses) "
+            "WHERE total > ?)",
+            (self.max_size,),
+        )
+
+    @staticmethod
+    def _is_revalidable(headers: CaseInsensitiveDict) -> bool:
+        return bool(headers.get("ETag") or headers.get("Last-Modified"))
+
+    @staticmethod
+    def _entry_name(key: str) -> str:
+        return hmac.new(key.encode("utf-8"), b"name", hashlib.sha256).hexdigest()
+
+    @classmethod
+    def _decrypt_entry(cls, key: str, metadata: bytes, body: bytes | None = None) -> tuple[dict, bytes] | None:
+        try:
+            plain_body = cls._decrypt(key, body) if body is not None else None
+            return json.loads(cls._decrypt(key, metadata)), plain_body
+        except (ValueError, TypeError, InvalidTag) as e:
+            logging.debug(f"Ignoring invalid cached response: {e}")
+            return None
+
+    @staticmethod
+    def _cipher(key: str) -> AESGCM:
+        # the cache key also names the entry, the encryption uses a key derived from it
+        return AESGCM(hmac.new(key.encode("utf-8"), b"encryption", hashlib.sha256).digest())
+
+    @classmethod
+    def _encrypt(cls, key: str, plain: bytes) -> bytes:
+        nonce = secrets.token_bytes(_NONCE_SIZE)
+        return nonce + cls._cipher(key).encrypt(nonce, plain, None)
+
+    @classmethod
+    def _decrypt(cls, key: str, data: bytes) -> bytes:
+        """
+        Raises:
+            InvalidTag: if the data was modified or encrypted with another key
+        """
+        return cls._cipher(key).decrypt(data[:_NONCE_SIZE], data[_NONCE_SIZE:], None)
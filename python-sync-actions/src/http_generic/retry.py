@@ -0,0 +1,144 @@
+import random
+import threading
+import time
+from typing import Callable
+
+from urllib3 import BaseHTTPResponse, Retry
+from urllib3.exceptions import MaxRetryError, ResponseError
+
+from http_generic.rate_limit import RateLimitRetry
+
+# maximum number of seconds a single request may spend retrying, including the waits
+DEFAULT_MAX_RETRY_TIME = 10.0
+
+
+class RetryBudget:
+    """
+    Retries shared by all requests of an action, so a single failing endpoint can't spend the whole action
+    on backoff. Also collects the number of retries and the time spent waiting for them.
+    """
+
+    def __init__(
+        self,
+        max_retries: int | None = None,
+        deadline: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+
+        Args:
+            max_retries: maximum number of retries of all requests, unlimited if not set
+            deadline: time of the clock after which no retry is started, unlimited if not set
+            clock: monotonic clock returning seconds
+        """
+        self.max_retries = max_retries
+        self.deadline = deadline
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.retries = 0
+        self.retry_time = 0.0
+        self.exhausted = False
+
+    def acquire(self, delay: float) -> bool:
+        """
+        Take a retry from the budget
+        Args:
+            delay: number of seconds the retry waits before it is sent
+
+        Returns:
+            False if the retries are spent or the retry would end after the deadline
+        """
+        with self._lock:
+            over_count = self.max_retries is not None and self.retries >= self.max_retries
+            over_time = self.deadline is not None and self._clock() + delay >= self.deadline
+            if over_count or over_time:
+                self.exhausted = True
+                return False
+            self.retries += 1
+            return True
+
+    def add_time(self, seconds: float):
+        with self._lock:
+            self.retry_time += seconds
+
+    def to_dict(self) -> dict:
+        return {"retries": self.retries, "retry_time": round(self.retry_time, 3), "exhausted": self.exhausted}
+
+
+class BudgetedRetry(RateLimitRetry):
+    """
+    Retry with decorrelated jitter backoff, limited by the total time spent retrying a single request
+    and by the retry budget of the action. When a limit is reached, the last response is returned or the
+    error raised as if the retries ran out.
+
+    The backoff of each retry is drawn uniformly between `backoff_factor` and three times the previous backoff,
+    capped by `backoff_max`, so the parallel requests failing together don't retry in lockstep.
+    """
+
+    def __init__(
+        self,
+        *args,
+        retry_budget: RetryBudget | None = None,
+        max_retry_time: float | None = None,
+        started_at: float | None = None,
+        backoff: float | None = None,
+        **kwargs,
+    ):
+        """
+
+        Args:
+            retry_budget: budget shared by the requests of the action
+            max_retry_time: maximum number of seconds from the first failure to the last retry
+            started_at: time of the first failure, set by `increment`
+            backoff: backoff before the next retry, set by `increment`
+            **kwargs: arguments of `RateLimitRetry`
+        """
+        super().__init__(*args, **kwargs)
+        self.retry_budget = retry_budget
+        self.max_retry_time = max_retry_time
+        self.started_at = started_at
+        self.backoff = backoff
+
+    def new(self, **kw) -> "BudgetedRetry":
+        kw.setdefault("retry_budget", self.retry_budget)
+        kw.setdefault("max_retry_time", self.max_retry_time)
+        kw.setdefault("started_at", self.started_at)
+        kw.setdefault("backoff", self.backoff)
+        return super().new(**kw)
+
+    def get_backoff_time(self) -> float:
+        return self.backoff or 0.0
+
+    def _next_backoff(self) -> float:
+        if not self.backoff_factor:
+            return 0.0
+        previous = self.backoff or self.backoff_factor
+        return min(self.backoff_max, random.uniform(self.backoff_factor, previous * 3))
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None) -> Retry:
+        new_retry = super().increment(method, url, response, error, _pool, _stacktrace)
+        now = time.monotonic()
+        new_retry.started_at = self.started_at if self.started_at is not None else now
+        new_retry.backoff = self._next_backoff()
+
+        delay = new_retry.backoff
+        if response is not None and self.respect_retry_after_header:
+            retry_after = new_retry.get_retry_after(response)
+            if retry_after is not None:
+                delay = retry_after
+
+        cause = None
+        if self.max_retry_time is not None and now + delay - new_retry.started_at > self.max_retry_time:
+            cause = f"retry time limit of {self.max_retry_time}s exceeded"
+        elif self.retry_budget is not None and not self.retry_budget.acquire(delay):
+            cause = "retry budget of the action spent"
+        if cause:
+            reason = error or ResponseError(cause)
+            raise MaxRetryError(_pool, url, reason) from reason
+        return new_retry
+
+    def sleep(self, response: BaseHTTPResponse | None = None) -> None:
+        started = time.monotonic()
+        super().sleep(response)
+        if self.retry_budget is not None:
+            self.retry_budget.add_time(time.monotonic() - started)
@@ -0,0 +1,89 @@
+import dataclasses
+import json
+from dataclasses import dataclass
+from typing import Any
+
+import requests
+
+from redaction import SecretsRedactor
+
+
+@dataclass(frozen=True)
+class RequestSnapshot:
+    method: str
+    url: str
+    headers: dict
+    body: str | None = None
+
+    @classmethod
+    def from_request(cls, request: requests.PreparedRequest) -> "RequestSnapshot":
+        body = request.body
+        if isinstance(body, bytes):
+            body = body.decode("utf-8", errors="replace")
+        elif body is not None and not isinstance(body, str):
+            # streamed uploads (generators, files) can't be captured
+            body = None
+        return cls(method=request.method, url=request.url, headers=dict(request.headers), body=body or None)
+
+    def redact(self, redactor: SecretsRedactor) -> "RequestSnapshot":
+        return dataclasses.replace(
+            self,
+            url=redactor.redact_text(self.url),
+            headers=redactor.redact(self.headers),
+            body=redactor.redact(self.body),
+        )
+
+
+@dataclass(frozen=True)
+class ResponseSnapshot:
+    """
+    Immutable copy of the parts of `requests.Response` the sync actions return. Unlike the response it does not
+    hold the connection, adapters or cookies, so it is cheap to create and to redact.
+    """
+
+    status_code: int
+    reason: str
+    headers: dict
+    body: bytes
+    request: RequestSnapshot | None = None
+    encoding: str | None = None
+
+    @classmethod
+    def from_response(cls, response: requests.Response) -> "ResponseSnapshot":
+        request = RequestSnapshot.from_request(response.request) if response.request is not None else None
+        return cls(
+            status_code=response.status_code,
+            reason=response.reason,
+            headers=dict(response.headers),
+            body=response.content or b"",
+            request=request,
+            encoding=response.encoding,
+        )
+
+    def redact(self, redactor: SecretsRedactor) -> "ResponseSnapshot":
+        """
+        Return copy of the snapshot with all secrets replaced
+        """
+        return dataclasses.replace(
+            self,
+            headers=redactor.redact(self.headers),
+            body=redactor.redact_bytes(self.body),
+            request=self.request.redact(redactor) if self.request else None,
+        )
+
+    @property
+    def text(self) -> str:
+        try:
+            return self.body.decode(self.encoding or "utf-8", errors="replace")
+        except LookupError:
+            # unknown charset in the Content-Type header
+            return self.body.decode("utf-8", errors="replace")
+
+    def data(self) -> Any:
+        """
+        Body decoded as JSON, the text of the body if it is not a valid JSON
+        """
+        try:
+            return json.loads(self.body)
+        except (UnicodeDecodeError, ValueError):
+            return self.text
@@ -0,0 +1,154 @@
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import tempfile
+import threading
+import time
+from typing import Callable
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+# default location of the persistent cache, shared by the sync actions running in the same container
+DEFAULT_CACHE_DIRECTORY = os.path.join(tempfile.gettempdir(), "generic-extractor-tokens")
+# tokens expiring sooner than this many seconds are not reused
+EXPIRY_MARGIN = 60
+
+# nonce size recommended for AES-GCM
+_NONCE_SIZE = 12
+
+
+def build_cache_key(method_name: str, parameters: dict) -> bytes:
+    """
+    Build key of the cached token from the authentication parameters. The key is derived from the secrets,
+    so it is also used to encrypt the cached token.
+    Args:
+        method_name: name of the authentication method
+        parameters: parameters the method was built with
+
+    Returns:
+        sha256 digest of the parameters
+    """
+    canonical = json.dumps([method_name, parameters], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).digest()
+
+
+class TokenCache:
+    """
+    Cache of the tokens obtained by the login, kept in memory and optionally in encrypted files, so the sync actions
+    fired one after another don't need to login again. Only tokens with known expiration are cached.
+
+    The files are encrypted and authenticated with AES-256-GCM keyed by the cache key. Without the authentication
+    parameters the token can't be read.
+    """
+
+    def __init__(self, directory: str | None = None, clock: Callable[[], float] = time.time):
+        """
+
+        Args:
+            directory: directory of the encrypted cache files, if not set the tokens are cached only in memory
+            clock: clock returning unix timestamp
+        """
+        self.directory = directory
+        self._clock = clock
+        self._memory: dict[bytes, tuple[float, dict]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: bytes) -> tuple[dict, float] | None:
+        """
+        Get the cached token
+        Args:
+            key: cache key built by `build_cache_key`
+
+        Returns:
+            tuple (token, expiration timestamp) or None if it is not cached or expires soon
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+        if entry is None:
+            entry = self._read_file(key)
+        if entry is None:
+            return None
+
+        expires_at, token = entry
+        if expires_at - EXPIRY_MARGIN <= self._clock():
+            self.invalidate(key)
+            return None
+        with self._lock:
+            self._memory[key] = entry
+        return token, expires_at
+
+    def set(self, key: bytes, token: dict, expires_at: float):
+        """
+        Store the token
+        Args:
+            key: cache key built by `build_cache_key`
+            token: JSON serializable state of the authentication method
+            expires_at: unix timestamp the token expires at
+        """
+        with self._lock:
+            self._memory[key] = (expires_at, token)
+        if self.directory:
+            self._write_file(key, json.dumps({"expires_at": expires_at, "token": token}).encode("utf-8"))
+
+    def invalidate(self, key: bytes):
+        """
+        Remove the token from the cache
+        """
+        with self._lock:
+            self._memory.pop(key, None)
+        if self.directory:
+            try:
+                os.remove(self._file_path(key))
+            except FileNotFoundError:
+                pass
+
+    def _file_path(self, key: bytes) -> str:
+        name = hmac.new(key, b"name", hashlib.sha256).hexdigest()
+        return os.path.join(self.directory, name)
+
+    def _read_file(self, key: bytes) -> tuple[float, dict] | None:
+        if not self.directory:
+            return None
+        try:
+            with open(self._file_path(key), "rb") as file:
+                plain = self._decrypt(key, file.read())
+            entry = json.loads(plain)
+            return float(entry["expires_at"]), entry["token"]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError, InvalidTag) as e:
+            logging.debug(f"Ignoring invalid cached token: {e}")
+            return None
+
+    def _write_file(self, key: bytes, plain: bytes):
+        try:
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            # write to a temporary file first so a concurrent reader never sees a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+            with os.fdopen(fd, "wb") as file:
+                file.write(self._encrypt(key, plain))
+            os.replace(tmp_path, self._file_path(key))
+        except OSError as e:
+            logging.debug(f"Failed to store the token in the cache: {e}")
+
+    @staticmethod
+    def _cipher(key: bytes) -> AESGCM:
+        # the cache key also names the file, the encryption uses a key derived from it
+        return AESGCM(hmac.new(key, b"encryption", hashlib.sha256).digest())
+
+    @classmethod
+    def _encrypt(cls, key: bytes, plain: bytes) -> bytes:
+        nonce = secrets.token_bytes(_NONCE_SIZE)
+        return nonce + cls._cipher(key).encrypt(nonce, plain, None)
+
+    @classmethod
+    def _decrypt(cls, key: bytes, data: bytes) -> bytes:
+        """
+        Raises:
+            InvalidTag: if the data was modified or encrypted with another key
+        """
+        return cls._cipher(key).decrypt(data[:_NONCE_SIZE], data[_NONCE_SIZE:], None)
@@ -0,0 +1,42 @@
+import threading
+
+import requests
+
+
+class TransferStats:
+    """
+    Number of bytes transferred by the requests of an action, both as received over the wire (compressed)
+    and after decoding. Responses served from the cache count as cached with no wire bytes.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.cached = 0
+        self.wire_bytes = 0
+        self.decoded_bytes = 0
+        self._lock = threading.Lock()
+
+    def add(self, response: requests.Response):
+        """
+        Count the response, its body is expected to be already read (completely or partially when streamed)
+        Args:
+            response: response of the request
+        """
+        if not isinstance(response, requests.Response):
+            return
+        decoded_bytes = len(response.content or b"")
+        # the raw response (urllib3 or httpx one) counts the bytes pulled from the connection before the decoding
+        wire_bytes = response.raw.tell() if hasattr(response.raw, "tell") else 0
+        with self._lock:
+            self.requests += 1
+            self.cached += int(getattr(response, "from_cache", False))
+            self.wire_bytes += wire_bytes
+            self.decoded_bytes += decoded_bytes
+
+    def to_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "cached": self.cached,
+            "wire_bytes": self.wire_bytes,
+            "decoded_bytes": self.decoded_bytes,
+        }
@@ -0,0 +1,430 @@
+"""
+Pure Python implementations of the PHP functions available in the user functions (`hash`, `hash_hmac`, `date`
+and `strtotime`). All dates are evaluated in UTC, matching the `date.timezone` of the extractor.
+"""
+
+import calendar
+import hashlib
+import hmac
+import re
+import zlib
+from datetime import datetime, timedelta, timezone
+
+# PHP algorithm names that differ from the hashlib ones
+_HASHLIB_ALGORITHMS = {
+    "sha512/224": "sha512_224",
+    "sha512/256": "sha512_256",
+    "sha3-224": "sha3_224",
+    "sha3-256": "sha3_256",
+    "sha3-384": "sha3_384",
+    "sha3-512": "sha3_512",
+}
+
+# non-cryptographic checksums, not allowed in hash_hmac
+_CHECKSUMS = {
+    "crc32b": zlib.crc32,
+    "adler32": zlib.adler32,
+}
+
+
+def _hashlib_name(algorithm: str) -> str:
+    algorithm = algorithm.lower()
+    name = _HASHLIB_ALGORITHMS.get(algorithm, algorithm)
+    try:
+        hashlib.new(name)
+    except ValueError:
+        raise ValueError(f"Hashing algorithm [{algorithm}] is not supported.") from None
+    return name
+
+
+def _to_bytes(value) -> bytes:
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode("utf-8")
+
+
+def php_hash(algorithm: str, message) -> str:
+    """
+    PHP `hash($algo, $data)`, returns lowercase hex digest
+    """
+    checksum = _CHECKSUMS.get(algorithm.lower())
+    if checksum:
+        return f"{checksum(_to_bytes(message)) & 0xFFFFFFFF:08x}"
+    return hashlib.new(_hashlib_name(algorithm), _to_bytes(message)).hexdigest()
+
+
+def php_hash_hmac(algorithm: str, key, message) -> str:
+    """
+    PHP `hash_hmac($algo, $data, $key)`, returns lowercase hex digest
+    """
+    if algorithm.lower() in _CHECKSUMS:
+        raise ValueError(f"Hashing algorithm [{algorithm}] is not a cryptographic hashing algorithm.")
+    return hmac.new(_to_bytes(key), _to_bytes(message), _hashlib_name(algorithm)).hexdigest()
+
+
+def php_bool(value) -> bool:
+    """
+    PHP `(bool) $value`, the strings "" and "0" and empty arrays are false
+    """
+    if isinstance(value, str):
+        return value not in ("", "0")
+    return bool(value)
+
+
+# ############## date()
+
+_ENGLISH_SUFFIXES = {1: "st", 2: "nd", 3: "rd"}
+
+
+def _english_suffix(day: int) -> str:
+    if 10 < day % 100 < 14:
+        return "th"
+    return _ENGLISH_SUFFIXES.get(day % 10, "th")
+
+
+def _swatch_beat(dt: datetime) -> str:
+    # Biel Mean Time is UTC+1
+    seconds = (dt.hour * 3600 + dt.minute * 60 + dt.second + 3600) % 86400
+    return f"{int(seconds / 86.4):03d}"
+
+
+_DATE_FORMATTERS = {
+    # day
+    "d": lambda dt: f"{dt.day:02d}",
+    "D": lambda dt: dt.strftime("%a"),
+    "j": lambda dt: str(dt.day),
+    "l": lambda dt: dt.strftime("%A"),
+    "N": lambda dt: str(dt.isoweekday()),
+    "S": lambda dt: _english_suffix(dt.day),
+    "w": lambda dt: str(dt.isoweekday() % 7),
+    "z": lambda dt: str(dt.timetuple().tm_yday - 1),
+    # week
+    "W": lambda dt: f"{dt.isocalendar()[1]:02d}",
+    # month
+    "F": lambda dt: dt.strftime("%B"),
+    "m": lambda dt: f"{dt.month:02d}",
+    "M": lambda dt: dt.strftime("%b"),
+    "n": lambda dt: str(dt.month),
+    "t": lambda dt: str(calendar.monthrange(dt.year, dt.month)[1]),
+    # year
+    "L": lambda dt: "1" if calendar.isleap(dt.year) else "0",
+    "o": lambda dt: str(dt.isocalendar()[0]),
+    "Y": lambda dt: str(dt.year),
+    "y": lambda dt: f"{dt.year % 100:02d}",
+    # time
+    "a": lambda dt: "am" if dt.hour < 12 else "pm",
+    "A": lambda dt: "AM" if dt.hour < 12 else "PM",
+    "B": _swatch_beat,
+    "g": lambda dt: str(dt.hour % 12 or 12),
+    "G": lambda dt: str(dt.hour),
+    "h": lambda dt: f"{dt.hour % 12 or 12:02d}",
+    "H": lambda dt: f"{dt.hour:02d}",
+    "i": lambda dt: f"{dt.minute:02d}",
+    "s": lambda dt: f"{dt.second:02d}",
+    "u": lambda dt: "000000",
+    "v": lambda dt: "000",
+    # timezone
+    "e": lambda dt: "UTC",
+    "I": lambda dt: "0",
+    "O": lambda dt: "+0000",
+    "P": lambda dt: "+00:00",
+    "p": lambda dt: "Z",
+    "T": lambda dt: "UTC",
+    "Z": lambda dt: "0",
+    # full date/time
+    "c": lambda dt: dt.strftime("%Y-%m-%dT%H:%M:%S+00:00"),
+    "r": lambda dt: dt.strftime("%a, %d %b %Y %H:%M:%S +0000"),
+    "U": lambda dt: str(calendar.timegm(dt.timetuple())),
+}
+
+
+def php_date(format_string: str, timestamp: int) -> str:
+    """
+    PHP `date($format, $timestamp)` in UTC. Unknown characters are copied as they are, backslash escapes
+    the next character.
+    """
+    dt = datetime.fromtimestamp(int(float(timestamp)), tz=timezone.utc)
+    result = []
+    escaped = False
+    for char in format_string:
+        if escaped:
+            result.append(char)
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char in _DATE_FORMATTERS:
+            result.append(_DATE_FORMATTERS[char](dt))
+        else:
+            result.append(char)
+    return "".join(result)
+
+
+# ############## strtotime()
+
+_MONTHS = {
+    name: index
+    for index, names in enumerate(
+        [
+            ("jan", "january"),
+            ("feb", "february"),
+            ("mar", "march"),
+            ("apr", "april"),
+            ("may",),
+            ("jun", "june"),
+            ("jul", "july"),
+            ("aug", "august"),
+            ("sep", "sept", "september"),
+            ("oct", "october"),
+            ("nov", "november"),
+            ("dec", "december"),
+        ],
+        start=1,
+    )
+    for name in names
+}
+
+_WEEKDAYS = {
+    name: index
+    for index, names in enumerate(
+        [
+            ("sun", "sunday"),
+            ("mon", "monday"),
+            ("tue", "tues", "tuesday"),
+            ("wed", "wednesday"),
+            ("thu", "thur", "thurs", "thursday"),
+            ("fri", "friday"),
+            ("sat", "saturday"),
+        ]
+    )
+    for name in names
+}
+
+_UNITS = {
+    "sec": ("seconds", 1),
+    "secs": ("seconds", 1),
+    "second": ("seconds", 1),
+    "seconds": ("seconds", 1),
+    "min": ("minutes", 1),
+    "mins": ("minutes", 1),
+    "minute": ("minutes", 1),
+    "minutes": ("minutes", 1),
+    "hour": ("hours", 1),
+    "hours": ("hours", 1),
+    "day": ("days", 1),
+    "days": ("days", 1),
+    "week": ("days", 7),
+    "weeks": ("days", 7),
+    "fortnight": ("days", 14),
+    "fortnights": ("days", 14),
+    "month": ("months", 1),
+    "months": ("months", 1),
+    "year": ("years", 1),
+    "years": ("years", 1),
+}
+
+_RELATIVE_TEXT = {"this": 0, "next": 1, "last": -1, "previous": -1}
+
+_MONTH_RE = "|".join(sorted(_MONTHS, key=len, reverse=True))
+_WEEKDAY_RE = "|".join(sorted(_WEEKDAYS, key=len, reverse=True))
+_UNIT_RE = "|".join(sorted(_UNITS, key=len, reverse=True))
+_TEXT_RE = "|".join(_RELATIVE_TEXT)
+
+_TIME_RE = r"t?(?P<hour>\d{1,2}):(?P<minute>\d{2})(?::(?P<second>\d{2})(?:[.,]\d+)?)?(?:\s*(?P<meridian>[ap]\.?m\.?))?"
+_ZONE_RE = r"(?:\s*(?P<utc>z|utc|gmt)\b|\s*(?P<sign>[+-])(?P<zone_hour>\d{2}):?(?P<zone_minute>\d{2})(?!\d))"
+
+_TOKENS = [
+    ("timestamp", re.compile(r"@(?P<timestamp>-?\d+)")),
+    ("keyword", re.compile(r"(?P<keyword>now|today|midnight|noon|tomorrow|yesterday)\b")),
+    ("first_last", re.compile(r"(?P<first_last>first|last) day of\b")),
+    ("iso_date", re.compile(r"(?P<year>\d{4})-(?P<month>\d{1,2})-(?P<day>\d{1,2})")),
+    ("iso_date", re.compile(r"(?P<year>\d{4})/(?P<month>\d{1,2})/(?P<day>\d{1,2})")),
+    ("iso_date", re.compile(r"(?P<month>\d{1,2})/(?P<day>\d{1,2})/(?P<year>\d{4})")),
+    ("iso_date", re.compile(r"(?P<day>\d{1,2})[.-](?P<month>\d{1,2})[.-](?P<year>\d{4})")),
+    (
+        "text_date",
+        re.compile(rf"(?P<day>\d{{1,2}})(?:st|nd|rd|th)?[ -]?(?P<month_name>{_MONTH_RE})\b[ -]?(?P<year>\d{{4}})?"),
+    ),
+    (
+        "text_date",
+        re.compile(
+            rf"(?P<month_name>{_MONTH_RE})\b\s*(?P<day>\d{{1,2}}(?!\d))?(?:st|nd|rd|th)?,?\s*(?P<year>\d{{4}})?"
+        ),
+    ),
+    ("time", re.compile(_TIME_RE)),
+    ("time", re.compile(r"(?P<hour>\d{1,2})\s*(?P<meridian>[ap]\.?m\.?)")),
+    ("relative", re.compile(rf"(?P<number>[+-]?\s*\d+)\s*(?P<unit>{_UNIT_RE})\b")),
+    ("relative_text", re.compile(rf"(?P<text>{_TEXT_RE})\s+(?P<unit>{_UNIT_RE})\b")),
+    ("weekday", re.compile(rf"(?:(?P<text>{_TEXT_RE})\s+)?(?P<weekday>{_WEEKDAY_RE})\b")),
+    ("ago", re.compile(r"ago\b")),
+]
+
+_ZONE = re.compile(_ZONE_RE)
+_SEPARATORS = re.compile(r"[\s,]+")
+
+
+class _RelativeTime:
+    """
+    State of the parsed string: the absolute fields the string sets and the relative offsets it adds
+    """
+
+    def __init__(self, base: datetime):
+        self.year, self.month, self.day = base.year, base.month, base.day
+        self.hour, self.minute, self.second = base.hour, base.minute, base.second
+        self.offset = 0
+        self.have_date = False
+        self.have_time = False
+        self.relative = {"years": 0, "months": 0, "days": 0, "hours": 0, "minutes": 0, "seconds": 0}
+        self.weekday = None
+        self.first_last_day_of = None
+
+    def reset_time(self, hour: int = 0):
+        self.hour, self.minute, self.second = hour, 0, 0
+        self.have_time = hour != 0
+
+    def apply(self, kind: str, match: re.Match):
+        groups = match.groupdict()
+        if kind == "timestamp":
+            base = datetime.fromtimestamp(int(groups["timestamp"]), tz=timezone.utc)
+            self.year, self.month, self.day = base.year, base.month, base.day
+            self.hour, self.minute, self.second = base.hour, base.minute, base.second
+
+        elif kind == "keyword":
+            keyword = groups["keyword"]
+            if keyword == "noon":
+                self.reset_time(12)
+            elif keyword != "now":
+                self.reset_time()
+            if keyword == "tomorrow":
+                self.relative["days"] += 1
+            elif keyword == "yesterday":
+                self.relative["days"] -= 1
+
+        elif kind == "first_last":
+            self.first_last_day_of = groups["first_last"]
+
+        elif kind in ("iso_date", "text_date"):
+            if groups.get("month_name"):
+                self.month = _MONTHS[groups["month_name"]]
+                if groups["day"]:
+                    self.day = int(groups["day"])
+                elif groups["year"]:
+                    self.day = 1
+            else:
+                self.month, self.day = int(groups["month"]), int(groups["day"])
+            if groups["year"]:
+                self.year = int(groups["year"])
+            if not 1 <= self.month <= 12 or not 1 <= self.day <= 31:
+                raise ValueError("Invalid date.")
+            self.have_date = True
+
+        elif kind == "time":
+            hour = int(groups["hour"])
+            meridian = groups.get("meridian")
+            if meridian:
+                if not 1 <= hour <= 12:
+                    raise ValueError("Invalid time.")
+                hour = hour % 12 + (12 if meridian.startswith("p") else 0)
+            self.hour = hour
+            self.minute = int(groups.get("minute") or 0)
+            self.second = int(groups.get("second") or 0)
+            self.have_time = True
+            if self.hour > 23 or self.minute > 59 or self.second > 59:
+                raise ValueError("Invalid time.")
+
+        elif kind == "relative":
+            field, multiplier = _UNITS[groups["unit"]]
+            self.relative[field] += int(groups["number"].replace(" ", "")) * multiplier
+
+        elif kind == "relative_text":
+            field, multiplier = _UNITS[groups["unit"]]
+            self.relative[field] += _RELATIVE_TEXT[groups["text"]] * multiplier
+
+        elif kind == "weekday":
+            self.weekday = (_WEEKDAYS[groups["weekday"]], _RELATIVE_TEXT[groups["text"] or "this"])
+            self.reset_time()
+
+        elif kind == "ago":
+            self.relative = {field: -value for field, value in self.relative.items()}
+
+    def to_timestamp(self) -> int:
+        if self.have_date and not self.have_time:
+            # dates without time are midnight
+            self.reset_time()
+
+        day = self.day
+        if self.weekday:
+            weekday, amount = self.weekday
+            current = (datetime(self.year, self.month, 1) + timedelta(days=day - 1)).isoweekday() % 7
+            if amount == 0:
+                day += (weekday - current) % 7
+            elif amount > 0:
+                day += ((weekday - current) % 7 or 7) + 7 * (amount - 1)
+            else:
+                day -= ((current - weekday) % 7 or 7) + 7 * (-amount - 1)
+
+        year = self.year + self.relative["years"]
+        month = self.month + self.relative["months"]
+        day += self.relative["days"]
+        if self.first_last_day_of == "first":
+            day = 1
+        elif self.first_last_day_of == "last":
+            day, month = 0, month + 1
+
+        # overflowing days and months are carried over like in PHP, e.g. January 31 + 1 month is March 3
+        year, month = year + (month - 1) // 12, (month - 1) % 12 + 1
+        result = datetime(year, month, 1, tzinfo=timezone.utc) + timedelta(
+            days=day - 1,
+            hours=self.hour + self.relative["hours"],
+            minutes=self.minute + self.relative["minutes"],
+            seconds=self.second + self.relative["seconds"] - self.offset,
+        )
+        return calendar.timegm(result.timetuple())
+
+
+def php_strtotime(string: str, base_time: int) -> int:
+    """
+    PHP `strtotime($datetime, $baseTimestamp)` in UTC. Supports the common formats: `now`, `today`, `midnight`,
+    `noon`, `tomorrow`, `yesterday`, `@timestamp`, ISO, American and European dates, textual dates
+    (`1 January 2021`, `Jan 1, 2021`), times with optional timezone offset, relative offsets (`+1 day`,
+    `-2 weeks`, `3 months ago`, `next month`), weekdays (`monday`, `next friday`, `last sunday`) and
+    `first/last day of`.
+
+    Raises:
+        ValueError: if the string can't be parsed (`strtotime` returns false in PHP)
+    """
+    state = _RelativeTime(datetime.fromtimestamp(int(float(base_time)), tz=timezone.utc))
+    text = string.strip().lower()
+    position = 0
+    while True:
+        separator = _SEPARATORS.match(text, position)
+        if separator:
+            position = separator.end()
+        if position >= len(text):
+            break
+
+        for kind, pattern in _TOKENS:
+            match = pattern.match(text, position)
+            if match:
+                break
+        else:
+            raise ValueError(f'Unable to parse the time string "{string}".')
+
+        state.apply(kind, match)
+        position = match.end()
+
+        if kind == "time":
+            zone = _ZONE.match(text, position)
+            if zone:
+                state.offset = _zone_offset(zone)
+                position = zone.end()
+
+    return state.to_timestamp()
+
+
+def _zone_offset(match: re.Match) -> int:
+    if match.group("utc"):
+        return 0
+    hours = int(match.group("zone_hour"))
+    minutes = int(match.group("zone_minute"))
+    offset = hours * 3600 + minutes * 60
+    return -offset if match.group("sign") == "-" else offset
@@ -0,0 +1,78 @@
+import re
+from typing import Any, Iterable
+
+DEFAULT_REPLACEMENT = "--HIDDEN--"
+
+
+class SecretsRedactor:
+    """
+    Replaces secret values in strings, bytes and nested structures.
+
+    All secrets are compiled into a single regular expression, so each buffer is scanned only once regardless of
+    the number of secrets. Longer secrets take precedence when they overlap with shorter ones.
+    """
+
+    def __init__(self, secrets: Iterable[Any], replacement: str = DEFAULT_REPLACEMENT):
+        """
+
+        Args:
+            secrets: values to hide, empty values and values that are not strings or numbers are ignored
+            replacement: string the secrets are replaced with
+        """
+        words = set()
+        for secret in secrets:
+            if isinstance(secret, bytes):
+                secret = secret.decode("utf-8", errors="replace")
+            elif isinstance(secret, (int, float)) and not isinstance(secret, bool):
+                secret = str(secret)
+            if isinstance(secret, str) and secret:
+                words.add(secret)
+
+        self.replacement = replacement
+        self._pattern = None
+        self._bytes_pattern = None
+        if words:
+            ordered_words = sorted(words, key=len, reverse=True)
+            self._pattern = re.compile("|".join(re.escape(word) for word in ordered_words))
+            self._bytes_pattern = re.compile(b"|".join(re.escape(word.encode("utf-8")) for word in ordered_words))
+        self._bytes_replacement = replacement.encode("utf-8")
+
+    def redact_text(self, text: str) -> str:
+        if self._pattern is None:
+            return text
+        return self._pattern.sub(self.replacement, text)
+
+    def redact_bytes(self, data: bytes) -> bytes:
+        if self._bytes_pattern is None:
+            return data
+        return self._bytes_pattern.sub(self._bytes_replacement, data)
+
+    def redact(self, obj: Any) -> Any:
+        """
+        Return copy of the object with all secrets replaced. Strings, bytes, dictionary keys and values, lists,
+        tuples and sets are processed recursively, other objects are returned unchanged.
+        """
+        if self._pattern is None:
+            return obj
+
+        if isinstance(obj, str):
+            return self.redact_text(obj)
+
+        elif isinstance(obj, bytes):
+            return self.redact_bytes(obj)
+
+        elif isinstance(obj, dict):
+            return {self.redact(key): self.redact(value) for key, value in obj.items()}
+
+        elif isinstance(obj, list):
+            return [self.redact(item) for item in obj]
+
+        elif isinstance(obj, tuple):
+            return tuple(self.redact(item) for item in obj)
+
+        elif isinstance(obj, set):
+            return {self.redact(item) for item in obj}
+
+        # Return the object if it is of any other type
+        else:
+            return obj
@@ -1,32 +1,10 @@
 import base64
 import hashlib
-import subprocess
 import time
 
 import keboola.utils as kbcutils
-from keboola.component import UserException
 
-
-def perform_shell_command(command: str, context_detail: str = "") -> tuple[str, str]:
-    """
-    Perform shell command
-    Args:
-        command: shell command
-        context_detail: additional context detail for exception handling
-
-    Returns: command output
-
-    """
-    # Running the command
-    result = subprocess.run(command, shell=True, text=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-
-    # Getting the results
-    stdout_str = result.stdout
-    stderr_str = result.stderr
-
-    if result.returncode != 0:
-        raise UserException(f"Error while performing {context_detail}: {stderr_str}")
-    return stdout_str, stderr_str
+import php_compat
 
 
 class UserFunctions:
@@ -77,71 +55,55 @@ class UserFunctions:
 
     def hash_hmac(self, algorithm, key, message):
         """
-        Execute PHP hash_hmac function
+        PHP hash_hmac function
         Args:
-            algorithm:
-            key:
-            message:
+            algorithm: name of the hashing algorithm, e.g. sha256
+            key: shared secret key
+            message: message to be hashed
 
-        Returns:
+        Returns: lowercase hex digest
 
         """
-
-        command = f'php -r \'echo hash_hmac("{algorithm}", "{message}", "{key}");\''
-        stdout, stderr = perform_shell_command(command, "hash_hmac function")
-
-        return stdout
+        return php_compat.php_hash_hmac(algorithm, key, message)
 
     def hash(self, algorithm, message):
         """
-        Execute PHP hash function
+        PHP hash function
         Args:
-            algorithm:
-            message:
+            algorithm: name of the hashing algorithm, e.g. sha256
+            message: message to be hashed
 
-        Returns:
+        Returns: lowercase hex digest
 
         """
-
-        command = f'php -r \'echo hash("{algorithm}", "{message}");\''
-        stdout, stderr = perform_shell_command(command, "hash function")
-
-        return stdout
+        return php_compat.php_hash(algorithm, message)
 
     def time(self):
         return int(time.time())
 
     def date(self, format_string, timestamp=None):
         """
-        Execute PHP date function
+        PHP date function, evaluated in UTC
         Args:
-            format_string:
-            timestamp:
+            format_string: PHP date format
+            timestamp: unix timestamp, current time by default
 
-        Returns:
+        Returns: formatted date
 
         """
-
-        command = f"php -r 'echo date(\"{format_string}\", {timestamp or int(time.time())});'"
-        stdout, stderr = perform_shell_command(command, "date function")
-
-        return stdout
+        return php_compat.php_date(format_string, timestamp or int(time.time()))
 
     def strtotime(self, string, base_time=None):
         """
-        Execute PHP strtotime function
+        PHP strtotime function, evaluated in UTC
         Args:
-            string:
-            base_time:
+            string: date/time string, e.g. "-2 days"
+            base_time: unix timestamp the relative dates are computed from, current time by default
 
-        Returns:
+        Returns: unix timestamp
 
         """
-
-        command = f"php -r 'echo strtotime(\"{string}\", {base_time or int(time.time())});'"
-        stdout, stderr = perform_shell_command(command, "strotime function")
-
-        return int(stdout)
+        return php_compat.php_strtotime(string, base_time or int(time.time()))
 
     def sprintf(self, format_string, *values):
         return format_string % values
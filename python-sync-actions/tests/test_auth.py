@@ -1,4 +1,5 @@
 import unittest
+from unittest.mock import MagicMock, patch
 
 from http_generic.auth import Login
 
@@ -19,3 +20,29 @@ class TestLoginAuth(unittest.TestCase):
         result = Login._retrieve_response_placeholders(data, separator="_")
         expected = ["first_response", "accesstoken"]
         self.assertEqual(result, expected)
+
+    def test_expiration(self):
+        now = 1609462923
+        cases = [
+            (None, {}, None),
+            (3600, {}, now + 3600),
+            ({"response": "expires_in", "relative": True}, {"expires_in": 60}, now + 60),
+            ({"response": "auth.expires"}, {"auth": {"expires": now + 100}}, now + 100),
+            ({"response": "auth.expires"}, {"auth": {"expires": "2021-01-02 00:00:00"}}, 1609545600),
+            ({"response": "missing"}, {}, None),
+        ]
+        with patch("http_generic.auth.time.time", return_value=now):
+            for expires, response, expected in cases:
+                with self.subTest(expires=expires):
+                    self.assertEqual(Login("https://example.com", expires=expires)._get_expiration(response), expected)
+
+            with self.assertRaises(ValueError):
+                Login("https://example.com", expires={"response": "expires"})._get_expiration({"expires": now - 1})
+
+    def test_login_again(self):
+        transport = MagicMock()
+        auth_method = Login("https://example.com", api_request_headers={"X-Token": {"response": "token"}})
+        for token in ["first", "second"]:
+            transport.return_value.json.return_value = {"token": token}
+            auth_method.login(transport=transport)
+            self.assertEqual(auth_method.api_request_headers, {"X-Token": token})
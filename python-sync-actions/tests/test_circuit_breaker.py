@@ -0,0 +1,73 @@
+import unittest
+
+from http_generic.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    endpoint_template,
+)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10, clock=lambda: self.now)
+        self.key = self.breaker.key("https://api.example.com/users/1/orders")
+
+    def _fail(self, times: int = 1):
+        for _ in range(times):
+            self.breaker.before_request(self.key)
+            self.breaker.record_failure(self.key, "Status Code: 503")
+
+    def test_key(self):
+        self.assertEqual(self.key, "api.example.com/users/{}/orders")
+        self.assertEqual(endpoint_template("/api/v2/items/3f2b9c1e-aa10"), "/api/v2/items/{}")
+        host_breaker = CircuitBreaker(scope="host")
+        self.assertEqual(host_breaker.key("https://API.example.com/users/1"), "api.example.com")
+
+    def test_opens_after_consecutive_failures(self):
+        self._fail(2)
+        self.breaker.record_success(self.key)
+        self._fail(2)
+        self.assertEqual(self.breaker.state(self.key), CLOSED)
+        self._fail()
+        self.assertEqual(self.breaker.state(self.key), OPEN)
+
+        with self.assertRaisesRegex(CircuitOpenError, "after 3 consecutive failures, 1 requests were not sent"):
+            self.breaker.before_request(self.key)
+        with self.assertRaisesRegex(CircuitOpenError, "2 requests were not sent. Last failure: Status Code: 503"):
+            self.breaker.before_request(self.key)
+
+    def test_half_open_probe(self):
+        self._fail(3)
+        self.now += 10
+        # a single probe is let through
+        self.breaker.before_request(self.key)
+        self.assertEqual(self.breaker.state(self.key), HALF_OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_request(self.key)
+
+        # failed probe opens the circuit again
+        self.breaker.record_failure(self.key, "Status Code: 503")
+        self.assertEqual(self.breaker.state(self.key), OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_request(self.key)
+
+        self.now += 10
+        self.breaker.before_request(self.key)
+        self.breaker.record_success(self.key)
+        self.assertEqual(self.breaker.state(self.key), CLOSED)
+        self.breaker.before_request(self.key)
+
+    def test_release_probe(self):
+        self._fail(3)
+        self.now += 10
+        self.breaker.before_request(self.key)
+        self.breaker.release(self.key)
+        self.breaker.before_request(self.key)
+
+
+if __name__ == "__main__":
+    unittest.main()
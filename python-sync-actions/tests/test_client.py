@@ -0,0 +1,380 @@
+import gzip
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from http_generic import http2
+from http_generic.auth import Login, OAuth20ClientCredentials
+from http_generic.circuit_breaker import CircuitBreaker, endpoint_key
+from http_generic.client import GenericHttpClient, HttpClientError
+from http_generic.hedging import HedgePolicy
+from http_generic.json_stream import JsonStreamParser
+from http_generic.rate_limit import RateLimiter
+from http_generic.retry import RetryBudget
+from http_generic.response_cache import ResponseCache
+from http_generic.transfer_stats import TransferStats
+
+_COMPRESSORS = {"gzip": gzip.compress, "deflate": zlib.compress}
+try:
+    import brotli
+
+    _COMPRESSORS["br"] = brotli.compress
+except ImportError:
+    pass
+try:
+    import zstandard
+
+    _COMPRESSORS["zstd"] = zstandard.compress
+except ImportError:
+    pass
+
+
+class _ApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.client_address[1], dict(self.headers)))
+        if self.path == "/unavailable" and len(self.server.requests) < 3:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path == "/limited" and len(self.server.requests) < 2:
+            self.send_response(429)
+            self.send_header("X-RetryAfter", "0.2")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path.startswith("/slow/") and self.path not in self.server.slow_paths:
+            # only the first request of the path is slow
+            self.server.slow_paths.add(self.path)
+            time.sleep(0.5)
+        if self.path.startswith("/flaky/"):
+            # the first request of the path is slow but succeeds, the following ones fail fast
+            if self.path in self.server.slow_paths:
+                self.send_response(503)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.server.slow_paths.add(self.path)
+            time.sleep(0.3)
+        if self.path.startswith("/broken/"):
+            self.send_response(500)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path == "/catalog" and self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.send_header("ETag", '"v1"')
+            self.end_headers()
+            return
+
+        body = json.dumps({"token": "abc", "path": self.path}).encode("utf-8")
+        encoding = None
+        if self.path == "/compressed":
+            body = json.dumps({"items": [{"id": i, "name": "item"} for i in range(1000)]}).encode("utf-8")
+            encoding = self.headers["Accept-Encoding"].split(", ")[-1]
+            body = _COMPRESSORS[encoding](body)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        if self.path == "/catalog":
+            self.send_header("ETag", '"v1"')
+        if self.path == "/limited":
+            self.send_header("X-RateLimit-Remaining", "5")
+            self.send_header("X-RateLimit-Reset", "60")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestGenericHttpClient(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _ApiHandler)
+        self.server.requests = []
+        self.server.slow_paths = set()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}/"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_login_reuses_connection(self):
+        auth_method = Login(
+            login_endpoint=f"{self.base_url}login",
+            login_headers={"X-Login": "1"},
+            api_request_headers={"X-Token": {"response": "token"}},
+        )
+        client = GenericHttpClient(self.base_url, default_http_header={"X-Default": "1"}, auth_method=auth_method)
+        client.login()
+        client.send_request("GET", "users", params={"page": 1}, headers={"X-Job": "1"})
+        client.send_request("GET", "orders")
+
+        paths = [path for path, _, _ in self.server.requests]
+        self.assertEqual(paths, ["/login", "/users?page=1", "/orders"])
+        # all requests went through a single kept-alive connection
+        self.assertEqual(len({port for _, port, _ in self.server.requests}), 1)
+
+        login_headers, users_headers, orders_headers = [headers for _, _, headers in self.server.requests]
+        self.assertNotIn("X-Default", login_headers)
+        self.assertEqual(users_headers["X-Token"], "abc")
+        self.assertEqual(users_headers["X-Job"], "1")
+        # per request headers don't leak into the following requests
+        self.assertNotIn("X-Job", orders_headers)
+        self.assertEqual(orders_headers["X-Default"], "1")
+
+    def test_response_cache(self):
+        cache = ResponseCache(ttl=60, path=os.path.join(tempfile.mkdtemp(), "cache.sqlite"))
+        for _ in range(2):
+            client = GenericHttpClient(self.base_url, response_cache=cache)
+            response = client.send_request("GET", "users", params={"page": 1}, headers={"Authorization": "secret"})
+            self.assertEqual(response.json()["path"], "/users?page=1")
+            self.assertEqual(response.request.url, f"{self.base_url}users?page=1")
+
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_response_revalidation(self):
+        now = [1000]
+        cache = ResponseCache(ttl=60, path=os.path.join(tempfile.mkdtemp(), "cache.sqlite"), clock=lambda: now[0])
+        client = GenericHttpClient(self.base_url, response_cache=cache)
+        client.send_request("GET", "catalog")
+        now[0] += 120
+        response = client.send_request("GET", "catalog")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["path"], "/catalog")
+        first_headers, second_headers = [headers for _, _, headers in self.server.requests]
+        self.assertNotIn("If-None-Match", first_headers)
+        self.assertEqual(second_headers["If-None-Match"], '"v1"')
+
+        # the revalidated response is fresh again
+        client.send_request("GET", "catalog")
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_revalidation_of_evicted_response(self):
+        now = [1000]
+        cache = ResponseCache(ttl=60, path=os.path.join(tempfile.mkdtemp(), "cache.sqlite"), clock=lambda: now[0])
+        client = GenericHttpClient(self.base_url, response_cache=cache)
+        client.send_request("GET", "catalog")
+        now[0] += 120
+        # the entry is evicted while the conditional request is in flight
+        with patch.object(cache, "revalidate", return_value=None):
+            response = client.send_request("GET", "catalog")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["path"], "/catalog")
+        _, conditional_headers, retry_headers = [headers for _, _, headers in self.server.requests]
+        self.assertEqual(conditional_headers["If-None-Match"], '"v1"')
+        self.assertNotIn("If-None-Match", retry_headers)
+
+    def test_compressed_stream(self):
+        client = GenericHttpClient(self.base_url)
+        response = client.send_request("GET", "compressed", stream=True)
+        accept_encoding = self.server.requests[0][2]["Accept-Encoding"].split(", ")
+        self.assertEqual(accept_encoding[:2], ["gzip", "deflate"])
+        self.assertEqual(set(accept_encoding[2:]), set(_COMPRESSORS) - {"gzip", "deflate"})
+        # the server picks the last offered encoding
+        self.assertEqual(response.headers["Content-Encoding"], accept_encoding[-1])
+
+        consumed = []
+
+        def chunks():
+            for chunk in response.iter_content(1024):
+                consumed.append(chunk)
+                yield chunk
+
+        parser = JsonStreamParser(chunks())
+        parser.find(["items"])
+        self.assertEqual(len(list(parser.iter_array())), 1000)
+        response._content = b"".join(consumed)
+
+        stats = TransferStats()
+        stats.add(response)
+        self.assertEqual(stats.decoded_bytes, len(response.content))
+        self.assertLess(stats.wire_bytes, stats.decoded_bytes / 5)
+
+    @unittest.skipUnless(http2.httpx, "httpx is not installed")
+    def test_http2_transport(self):
+        client = GenericHttpClient(
+            self.base_url, default_http_header={"X-Default": "1"}, status_forcelist=(503,), backoff_factor=0, http2=True
+        )
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            responses = list(
+                executor.map(lambda i: client.send_request("GET", f"users/{i}", params={"a": i}), range(4))
+            )
+        self.assertEqual([response.json()["path"] for response in responses], [f"/users/{i}?a={i}" for i in range(4)])
+        self.assertTrue(all(headers["X-Default"] == "1" for _, _, headers in self.server.requests))
+
+        response = client.send_request("GET", "compressed", stream=True)
+        self.assertEqual(len(response.json()["items"]), 1000)
+        self.assertLess(response.raw.tell(), len(response.content))
+
+        self.server.requests.clear()
+        response = client.send_request("GET", "unavailable")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_rate_limit(self):
+        client = GenericHttpClient(
+            self.base_url, status_forcelist=(429,), backoff_factor=0, rate_limiter=RateLimiter("X-RetryAfter")
+        )
+        started = time.monotonic()
+        response = client.send_request("GET", "limited")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.server.requests), 2)
+        # the retry waited for the configured header
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+        self.assertEqual(client._rate_limiter._buckets["127.0.0.1"].tokens, 5)
+
+    def test_retry_budget(self):
+        budget = RetryBudget(max_retries=1)
+        client = GenericHttpClient(self.base_url, status_forcelist=(503,), backoff_factor=0, retry_budget=budget)
+        with self.assertRaisesRegex(HttpClientError, "too many retries. Status Code: 503"):
+            client.send_request("GET", "unavailable")
+
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(budget.to_dict(), {"retries": 1, "retry_time": 0.0, "exhausted": True})
+
+    def test_circuit_breaker(self):
+        client = GenericHttpClient(
+            self.base_url, max_retries=0, circuit_breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        )
+        for user_id in range(2):
+            with self.assertRaisesRegex(HttpClientError, "Status Code: 500"):
+                client.send_request("GET", f"broken/{user_id}")
+        with self.assertRaisesRegex(HttpClientError, "was not sent.*broken/{} is open after 2 consecutive failures"):
+            client.send_request("GET", "broken/2")
+
+        self.assertEqual(len(self.server.requests), 2)
+        # other endpoints are not affected
+        self.assertEqual(client.send_request("GET", "users/1").status_code, 200)
+
+    def test_hedged_request(self):
+        policy = HedgePolicy(max_hedges=1)
+        for _ in range(10):
+            policy.observe(endpoint_key(f"{self.base_url}slow/1"), 0.05)
+        client = GenericHttpClient(self.base_url, hedge_policy=policy)
+
+        started = time.monotonic()
+        response = client.send_request("GET", "slow/1")
+        # the duplicate sent after the usual latency answered first
+        self.assertLess(time.monotonic() - started, 0.4)
+        self.assertEqual(response.json()["path"], "/slow/1")
+        self.assertEqual(policy.to_dict(), {"hedges": 1, "wins": 1})
+
+        # the cap is spent, the next slow request is not hedged
+        started = time.monotonic()
+        client.send_request("GET", "slow/2")
+        self.assertGreaterEqual(time.monotonic() - started, 0.5)
+        self.assertEqual(policy.hedges, 1)
+
+    def test_hedged_request_fast_error(self):
+        policy = HedgePolicy(max_hedges=1)
+        for _ in range(10):
+            policy.observe(endpoint_key(f"{self.base_url}flaky/1"), 0.05)
+        client = GenericHttpClient(self.base_url, hedge_policy=policy)
+
+        response = client.send_request("GET", "flaky/1")
+        # the duplicate failed first, the slower success of the original request is returned
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["path"], "/flaky/1")
+        self.assertEqual(policy.to_dict(), {"hedges": 1, "wins": 0})
+
+        client.close()
+        self.assertIsNone(client._hedge_executor)
+
+    def test_login_uses_client_transport(self):
+        transport = MagicMock()
+        transport.return_value.json.return_value = {"access_token": "abc"}
+        auth_method = OAuth20ClientCredentials("https://example.com/token", "secret", "id")
+        auth_method.login(transport=transport)
+
+        transport.assert_called_once_with(
+            "POST", "https://example.com/token", data={"grant_type": "client_credentials"}, auth=("id", "secret")
+        )
+        self.assertEqual(auth_method.auth_header, {"Authorization": "Bearer abc"})
+
+    def test_transport_defaults(self):
+        client = GenericHttpClient(self.base_url, timeout=5, verify=False, cert="")
+        client._session = MagicMock()
+        client.transport("GET", "https://example.com", timeout=1)
+        client._session.request.assert_called_once_with(
+            "GET", "https://example.com", timeout=1, verify=False, cert=None
+        )
+
+
+class TestRelogin(unittest.TestCase):
+    def setUp(self):
+        self.logins = []
+
+    def _build_client(self, expires_in: int) -> GenericHttpClient:
+        def transport(method, url, **kwargs):
+            self.logins.append(url)
+            response = MagicMock()
+            response.json.return_value = {"access_token": f"token-{len(self.logins)}", "expires_in": expires_in}
+            return response
+
+        client = GenericHttpClient(
+            "https://example.com", auth_method=OAuth20ClientCredentials("https://example.com/token", "secret", "id")
+        )
+        client.transport = transport
+        return client
+
+    @staticmethod
+    def _request_raw(valid_token: str):
+        def request_raw(self, method, endpoint_path, **kwargs):
+            valid = self._auth.auth_header["Authorization"] == f"Bearer {valid_token}"
+            time.sleep(0.05)
+            response = requests.Response()
+            response.status_code = 200 if valid else 401
+            response.raw = io.BytesIO(b"")
+            return response
+
+        return request_raw
+
+    def test_single_flight_relogin(self):
+        client = self._build_client(expires_in=3600)
+        client.login()
+
+        with patch.object(GenericHttpClient, "_request_raw", self._request_raw("token-2")):
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                responses = list(executor.map(lambda i: client.send_request("GET", f"users/{i}"), range(8)))
+
+        self.assertTrue(all(response.status_code == 200 for response in responses))
+        # a single login shared by all requests failing with the expired token
+        self.assertEqual(len(self.logins), 2)
+
+    def test_refresh_expiring_token(self):
+        client = self._build_client(expires_in=30)
+        client.login()
+
+        with patch.object(GenericHttpClient, "_request_raw", self._request_raw("token-2")):
+            client.send_request("GET", "users")
+
+        self.assertEqual(len(self.logins), 2)
+
+    def test_relogin_once(self):
+        client = self._build_client(expires_in=3600)
+        client.login()
+
+        with patch.object(GenericHttpClient, "_request_raw", self._request_raw("never")):
+            with self.assertRaises(HttpClientError):
+                client.send_request("GET", "users")
+
+        self.assertEqual(len(self.logins), 2)
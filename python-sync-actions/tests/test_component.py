@@ -1,9 +1,18 @@
+import io
+import json
 import os
+import threading
+import time
 import unittest
 from pathlib import Path
+from unittest.mock import MagicMock, PropertyMock, patch
 
-from component import Component
+import requests
+from keboola.component.exceptions import UserException
+
+from component import ADAPTIVE_MAX_CONCURRENCY, DEFAULT_CONCURRENCY, Component
 from configuration import DataPath
+from http_generic.client import GenericHttpClient
 
 
 class TestComponent(unittest.TestCase):
@@ -15,6 +24,12 @@ class TestComponent(unittest.TestCase):
         os.environ["KBC_DATADIR"] = test_dir
         return Component()
 
+    @staticmethod
+    def _mock_response(data):
+        response = MagicMock()
+        response.json.return_value = data
+        return response
+
     # @patch('http_generic.client.GenericHttpClient.send_request')
     # def test_001_nested(self, mock_send_request):
     #
@@ -103,6 +118,192 @@ class TestComponent(unittest.TestCase):
         expected_data = [{"id": "1.0", "status": "first"}, {"id": "1.1", "status": "page"}]
         self.assertEqual(results, expected_data)
 
+    def test_010_child_fan_out(self):
+        users = [{"id": i} for i in range(1, 7)]
+        running = []
+        max_running = []
+        lock = threading.Lock()
+
+        def send_request(method, endpoint_path, **kwargs):
+            if endpoint_path == "users":
+                return self._mock_response({"users": users})
+            with lock:
+                running.append(endpoint_path)
+                max_running.append(len(running))
+            user_id = int(endpoint_path.split("/")[-1])
+            # later users respond sooner, the order of results must be kept anyway
+            time.sleep(0.05 * (len(users) - user_id))
+            with lock:
+                running.remove(endpoint_path)
+            return self._mock_response({"id": user_id, "detail": f"user {user_id}"})
+
+        component = self._get_test_component(self._testMethodName)
+        with patch.object(GenericHttpClient, "send_request", side_effect=send_request):
+            results, response, log, error_message = component.make_call()
+
+        self.assertEqual(results, [{"id": u["id"], "detail": f"user {u['id']}"} for u in users])
+        self.assertEqual(response.json(), {"id": 6, "detail": "user 6"})
+        self.assertEqual(max(max_running), 4)
+
+    def test_014_infer_mapping(self):
+        component = self._get_test_component("test_007_infer_mapping_userdata")
+        with patch.object(
+            GenericHttpClient, "send_request", return_value=self._mock_response([{"id": 1, "status": "ok"}])
+        ):
+            output = component.infer_mapping()
+
+        expected_output = {
+            "id": "id",
+            "start_date": {"mapping": {"destination": "start_date"}, "type": "user"},
+            "status": "status",
+        }
+        self.assertEqual(output, expected_output)
+
+    def test_015_load_from_curl(self):
+        component = self._get_test_component(self._testMethodName)
+        output = component.load_from_curl()
+
+        self.assertEqual(output["endpoint"], "users")
+        self.assertEqual(output["params"], {"page": "2"})
+        self.assertEqual(output["headers"], {"Accept": "application/json"})
+
+    def test_adaptive_concurrency(self):
+        component = self._get_test_component("test_010_child_fan_out")
+        self.assertIsNone(component._get_concurrency_limiter())
+
+        def with_concurrency(value):
+            return patch.object(
+                Component, "configuration", new_callable=PropertyMock, return_value=MagicMock(parameters=value)
+            )
+
+        with with_concurrency({"__CONCURRENCY": "adaptive"}):
+            self.assertEqual(component._get_concurrency(), ADAPTIVE_MAX_CONCURRENCY)
+            self.assertEqual(component._get_concurrency_limiter().limit, DEFAULT_CONCURRENCY)
+
+        with with_concurrency({"__CONCURRENCY": "fast"}), self.assertRaises(UserException):
+            component._get_concurrency()
+
+    def test_numeric_parameters(self):
+        component = self._get_test_component("test_010_child_fan_out")
+
+        def with_parameters(value):
+            return patch.object(
+                Component, "configuration", new_callable=PropertyMock, return_value=MagicMock(parameters=value)
+            )
+
+        with with_parameters({"__PAGE_LIMIT": "3", "__CACHE_TTL": "0", "__TIME_BUDGET": 1.5}):
+            self.assertEqual(component._get_page_limit(), 3)
+            self.assertIsNone(component._get_cache_ttl())
+            self.assertIsNone(component._get_record_limit())
+            self.assertEqual(component._get_time_budget().seconds, 1.5)
+            self.assertEqual(component._get_max_retry_time(), 10.0)
+
+        with with_parameters({"__MAX_RETRY_TIME": "2.5"}):
+            self.assertEqual(component._get_max_retry_time(), 2.5)
+
+        invalid = [
+            ({"__PAGE_LIMIT": 0}, component._get_page_limit),
+            ({"__PAGE_PREFETCH": "many"}, component._get_page_prefetch),
+            ({"__TIME_BUDGET": 0}, component._get_time_budget),
+            ({"__MAX_RETRY_TIME": 0}, component._get_max_retry_time),
+        ]
+        for parameters, getter in invalid:
+            with with_parameters(parameters), self.assertRaises(UserException):
+                getter()
+
+    def test_011_time_budget(self):
+        def send_request(method, endpoint_path, **kwargs):
+            if endpoint_path == "users":
+                return self._mock_response({"users": [{"id": i} for i in range(1, 21)]})
+            self.assertLessEqual(kwargs["timeout"], 0.5)
+            time.sleep(0.2)
+            return self._mock_response({"id": int(endpoint_path.split("/")[-1])})
+
+        component = self._get_test_component(self._testMethodName)
+        with (
+            patch.object(GenericHttpClient, "send_request", side_effect=send_request),
+            patch.object(component, "_call_job", wraps=component._call_job) as call_job,
+        ):
+            results, response, log, error_message = component.make_call()
+
+        self.assertTrue(component._budget.truncated)
+        self.assertTrue(0 < len(results) < 6)
+        self.assertEqual(results, [{"id": i} for i in range(1, len(results) + 1)])
+        # the child calls are submitted lazily, those after the budget was spent are never scheduled
+        self.assertLess(call_job.call_count, 10)
+
+    def test_012_filtered_response(self):
+        def send_request(method, endpoint_path, **kwargs):
+            response = requests.Response()
+            response.status_code = 200
+            response.reason = "OK"
+            response.headers["X-Echo"] = "user-secret"
+            response._content = json.dumps({"users": [{"id": 1, "token": "bearer-secret"}]}).encode("utf-8")
+            response.request = requests.Request(
+                method,
+                f"http://example.com/{endpoint_path}",
+                headers={"Authorization": "Bearer bearer-secret"},
+                params={"key": "user-secret"},
+            ).prepare()
+            return response
+
+        component = self._get_test_component(self._testMethodName)
+        with patch.object(GenericHttpClient, "send_request", side_effect=send_request):
+            output = component.test_request()
+
+        self.assertEqual(output["response"]["data"], {"users": [{"id": 1, "token": "--HIDDEN--"}]})
+        self.assertEqual(output["response"]["headers"]["X-Echo"], "--HIDDEN--")
+        self.assertEqual(output["request"]["headers"]["Authorization"], "Bearer --HIDDEN--")
+        self.assertEqual(output["request"]["url"], "http://example.com/users?key=--HIDDEN--")
+        self.assertEqual(output["transfer"], {"requests": 1, "cached": 0, "wire_bytes": 0, "decoded_bytes": 48})
+        self.assertEqual(output["retries"], {"retries": 0, "retry_time": 0.0, "exhausted": False})
+        self.assertEqual(output["hedging"], {"hedges": 0, "wins": 0})
+        self.assertNotIn("bearer-secret", output["debug_log"])
+        self.assertNotIn("user-secret", output["debug_log"])
+
+    def test_013_pagination(self):
+        users = [{"id": i} for i in range(1, 10)]
+        sent_params = []
+
+        def send_request(method, endpoint_path, **kwargs):
+            sent_params.append(dict(kwargs["params"]))
+            offset = kwargs["params"]["offset"]
+            return self._mock_response({"users": users[offset : offset + kwargs["params"]["limit"]]})
+
+        component = self._get_test_component(self._testMethodName)
+        with patch.object(GenericHttpClient, "send_request", side_effect=send_request):
+            results, response, log, error_message = component.make_call()
+
+        self.assertEqual(results, users[:6])
+        self.assertEqual([params["offset"] for params in sent_params], [0, 2, 4])
+        self.assertTrue(all(params["account"] == 123 for params in sent_params))
+        self.assertEqual(response.json(), {"users": [{"id": 5}, {"id": 6}]})
+
+    def test_016_pagination_prefetch(self):
+        users = [{"id": i} for i in range(1, 6)]
+        sent_offsets = []
+
+        def send_request(method, endpoint_path, **kwargs):
+            offset = kwargs["params"]["offset"]
+            sent_offsets.append(offset)
+            if offset == 4:
+                # the last page is slow, the pages after it are already being fetched
+                time.sleep(0.2)
+            response = requests.Response()
+            response.status_code = 200
+            response._content = json.dumps({"users": users[offset : offset + kwargs["params"]["limit"]]}).encode()
+            response.request = requests.Request(method, f"http://example.com/{endpoint_path}").prepare()
+            return response
+
+        component = self._get_test_component(self._testMethodName)
+        with patch.object(GenericHttpClient, "send_request", side_effect=send_request):
+            output = component.test_request()
+
+        self.assertEqual(output["records"], users)
+        # the pages prefetched after the last short page are thrown away and not counted
+        self.assertIn(6, sent_offsets)
+        self.assertEqual(output["transfer"]["requests"], 3)
+
     def test_parse_data_null_datafield(self):
         component = self._get_test_component("test_009_empty_datafield")
         # test array of primitives
@@ -126,6 +327,33 @@ class TestComponent(unittest.TestCase):
         results = component._parse_data(data, DataPath("data"))
         self.assertEqual(results, data["data"])
 
+    def test_parse_response_stream_record_limit(self):
+        component = self._get_test_component("test_009_empty_datafield")
+        component._record_limit = 3
+        body = json.dumps({"data": {"items": [{"id": i} for i in range(100000)]}}).encode("utf-8")
+        response = requests.Response()
+        response.status_code = 200
+        response.raw = io.BytesIO(body)
+
+        results = component._parse_response(response, DataPath("data.items"))
+
+        self.assertEqual(results, [{"id": 0}, {"id": 1}, {"id": 2}])
+        self.assertLess(len(response.content), len(body))
+
+    def test_parse_response_stream_within_limit(self):
+        component = self._get_test_component("test_009_empty_datafield")
+        component._record_limit = 3
+        data = {"data": [{"id": 1}, {"id": 2}], "next": None}
+        response = requests.Response()
+        response.status_code = 200
+        response.raw = io.BytesIO(json.dumps(data).encode("utf-8"))
+
+        results = component._parse_response(response, DataPath("data"))
+
+        self.assertEqual(results, data["data"])
+        # the whole response was read
+        self.assertEqual(response.json(), data)
+
 
 if __name__ == "__main__":
     unittest.main()
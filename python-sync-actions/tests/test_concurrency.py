@@ -0,0 +1,106 @@
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+import requests
+from urllib3 import Retry
+
+from http_generic.concurrency import AdaptiveConcurrencyLimiter, is_congested
+
+
+class TestAdaptiveConcurrencyLimiter(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.limiter = AdaptiveConcurrencyLimiter(2, max_limit=4, clock=lambda: self.now)
+
+    def _request(self, latency: float = 0.1, congested: bool = False):
+        started = self.limiter.acquire()
+        self.now += latency
+        self.limiter.release(started, congested)
+
+    def test_additive_increase(self):
+        self._request()
+        self.assertEqual(self.limiter.limit, 2)
+        # about one slot per window of successful requests
+        for _ in range(2):
+            self._request()
+        self.assertEqual(self.limiter.limit, 3)
+        for _ in range(100):
+            self._request()
+        self.assertEqual(self.limiter.limit, 4)
+
+    def test_multiplicative_decrease(self):
+        for _ in range(100):
+            self._request()
+        self._request(congested=True)
+        self.assertEqual(self.limiter.limit, 2)
+        self._request(congested=True)
+        self.assertEqual(self.limiter.limit, 1)
+        self._request(congested=True)
+        self.assertEqual(self.limiter.limit, 1)
+
+    def test_latency_spike(self):
+        for _ in range(100):
+            self._request()
+        self._request(latency=0.15)
+        self.assertEqual(self.limiter.limit, 4)
+        self._request(latency=1)
+        self.assertEqual(self.limiter.limit, 2)
+        self.assertEqual(self.limiter.decreases, 1)
+
+    def test_single_decrease_per_window(self):
+        for _ in range(100):
+            self._request()
+        # requests started before the decrease don't decrease the limit again
+        started = [self.limiter.acquire() for _ in range(3)]
+        self.now += 0.1
+        for start in started:
+            self.limiter.release(start, congested=True)
+        self.assertEqual(self.limiter.limit, 2)
+
+    def test_limits_requests_in_flight(self):
+        limiter = AdaptiveConcurrencyLimiter(2, max_limit=2)
+        running = []
+        max_running = []
+        lock = threading.Lock()
+
+        def request():
+            started = limiter.acquire()
+            with lock:
+                running.append(1)
+                max_running.append(len(running))
+            time.sleep(0.02)
+            with lock:
+                running.pop()
+            limiter.release(started)
+
+        threads = [threading.Thread(target=request) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(max(max_running), 2)
+
+
+class TestIsCongested(unittest.TestCase):
+    def _response(self, status_code: int, retries: Retry | None = None) -> requests.Response:
+        response = requests.Response()
+        response.status_code = status_code
+        response.raw = MagicMock(retries=retries)
+        return response
+
+    def test_status(self):
+        self.assertTrue(is_congested(self._response(429)))
+        self.assertTrue(is_congested(self._response(503)))
+        self.assertFalse(is_congested(self._response(200)))
+        self.assertFalse(is_congested(self._response(404)))
+
+    def test_retried_attempts(self):
+        retries = Retry(total=3).increment("GET", "/users", response=MagicMock(status=503, headers={}))
+        self.assertTrue(is_congested(self._response(200, retries)))
+        self.assertFalse(is_congested(self._response(200, Retry(total=3))))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+
+from freezegun import freeze_time
+
+from config_template import ConfigTemplate
+
+
+class TestConfigTemplate(unittest.TestCase):
+    def test_render_attr_references(self):
+        template = ConfigTemplate.compile(
+            {"headers": {"X-Key": {"attr": "#key"}, "X-Page": {"attr": "page"}}, "list": [{"attr": "page"}, 1]},
+            ["#key", "page"],
+        )
+        self.assertEqual(template.attr_references, {"#key", "page"})
+        self.assertEqual(
+            template.render({"#key": 'with "quotes"', "page": 2}),
+            {"headers": {"X-Key": 'with "quotes"', "X-Page": "2"}, "list": ["2", 1]},
+        )
+        # the template may be rendered repeatedly
+        self.assertEqual(template.render({"#key": "other", "page": 3})["headers"], {"X-Key": "other", "X-Page": "3"})
+
+    @freeze_time("2021-01-01")
+    def test_render_time_references(self):
+        template = ConfigTemplate.compile({"since": {"time": "previousStart"}, "until": {"time": "currentStart"}})
+        self.assertEqual(template.render(), {"since": 1609459200, "until": 1609459200})
+        self.assertEqual(template.render(now=10), {"since": 10, "until": 10})
+
+    def test_attr_kept_without_user_parameters(self):
+        conf = {"function": "concat", "args": [{"attr": "name"}, {"time": "unknown"}]}
+        self.assertEqual(ConfigTemplate.compile(conf).render(), conf)
+
+    def test_unresolved_references(self):
+        with self.assertRaises(ValueError) as context:
+            ConfigTemplate.compile({"a": {"attr": "missing"}, "b": [{"attr": "x", "other": 1}]}, ["x"])
+        self.assertIn("['missing', 'x']", str(context.exception))
+
+    def test_render_returns_new_objects(self):
+        conf = {"params": {"a": [1, 2]}}
+        template = ConfigTemplate.compile(conf, [])
+        rendered = template.render()
+        rendered["params"]["a"].append(3)
+        self.assertEqual(template.render(), {"params": {"a": [1, 2]}})
+        self.assertEqual(conf, {"params": {"a": [1, 2]}})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,5 @@
 import unittest
+from unittest.mock import patch
 
 import configuration
 from configuration import ConfigHelpers
@@ -52,6 +53,56 @@ class TestConfigHelpers(unittest.TestCase):
         result = self.helpers.fill_in_user_parameters(conf_objects, user_params, True)
         self.assertEqual(result, expected)
 
+    def test_user_parameters_evaluated_in_dependency_order(self):
+        user_params = {
+            "token": {"function": "concat", "args": ["Bearer ", {"attr": "key"}]},
+            "key": {"function": "md5", "args": [{"attr": "secret"}]},
+            "secret": "abc",
+            "nested": {"header": {"attr": "token"}, "values": [{"attr": "secret"}]},
+        }
+        result = self.helpers.evaluate_user_parameters(user_params)
+
+        self.assertEqual(result["key"], "900150983cd24fb0d6963f7d28e17f72")
+        self.assertEqual(result["token"], "Bearer 900150983cd24fb0d6963f7d28e17f72")
+        self.assertEqual(result["nested"], {"header": result["token"], "values": ["abc"]})
+        self.assertEqual(list(result), list(user_params))
+
+    def test_user_parameters_evaluated_once(self):
+        user_params = {"a": {"function": "md5", "args": ["x"]}, "b": {"attr": "a"}, "c": {"attr": "a"}}
+        functions = self.helpers.user_functions
+        with patch.object(functions, "execute_function", wraps=functions.execute_function) as execute_function:
+            result = self.helpers.evaluate_user_parameters(user_params)
+            self.assertIs(self.helpers.evaluate_user_parameters(user_params), result)
+            self.assertIs(self.helpers.evaluate_user_parameters(result), result)
+            self.helpers.fill_in_user_parameters({"h": {"attr": "b"}}, user_params)
+        execute_function.assert_called_once_with("md5", "x")
+
+    def test_template_compiled_once(self):
+        conf_objects = {
+            "h": {"function": "concat", "args": ["s", {"attr": "a"}]},
+            "t": {"time": "currentStart"},
+        }
+        user_params = {"a": "x"}
+        with patch.object(
+            configuration.ConfigTemplate, "compile", wraps=configuration.ConfigTemplate.compile
+        ) as compile:
+            first = self.helpers.fill_in_user_parameters(conf_objects, user_params)
+            second = self.helpers.fill_in_user_parameters(conf_objects, user_params)
+        compile.assert_called_once()
+        self.assertEqual(first, {"h": "sx", "t": self.helpers.now})
+        self.assertEqual(second, first)
+        self.assertIsNot(second, first)
+
+    def test_user_parameters_cycle(self):
+        user_params = {"a": {"function": "concat", "args": [{"attr": "b"}]}, "b": {"attr": "a"}, "c": "x"}
+        with self.assertRaises(ValueError) as ctx:
+            self.helpers.evaluate_user_parameters(user_params)
+        self.assertIn("a -> b -> a", str(ctx.exception))
+
+    def test_user_parameters_unknown_reference(self):
+        with self.assertRaises(ValueError):
+            self.helpers.evaluate_user_parameters({"a": {"attr": "missing"}})
+
     def test_query_parameters_dropped_in_post_mode(self):
         config = {
             "__SELECTED_JOB": "0",
@@ -120,3 +120,44 @@ class TestCurl(unittest.TestCase):
         )
         result = curl.build_job_from_curl(command)
         self.assertEqual(result, expected)
+
+    def test_get_with_data(self):
+        command = "curl -G -d 'limit=10' --data-urlencode 'q=a b' -H 'Accept: application/json' http://localhost:3000/items?page=1"
+        expected = JobTemplate(
+            endpoint="http://localhost:3000/items",
+            children=[],
+            method="GET",
+            dataType="items",
+            dataField={"path": ".", "separator": "."},
+            params={"page": "1", "limit": "10", "q": "a b"},
+            headers={"Accept": "application/json"},
+        )
+        result = curl.build_job_from_curl(command)
+        self.assertEqual(result, expected)
+
+    def test_json_option(self):
+        command = 'curl --json \'{"key1": "value1"}\' --url http://localhost:3000/endpoint'
+        result = curl.parse_curl(command)
+        self.assertEqual(
+            result,
+            {
+                "url": "http://localhost:3000/endpoint",
+                "raw_url": "http://localhost:3000/endpoint",
+                "method": "post",
+                "headers": {"Content-Type": "application/json", "Accept": "application/json"},
+                "data": {"key1": "value1"},
+            },
+        )
+
+    def test_attached_option_values_and_auth(self):
+        command = "curl -XPOST -u user:pass -HContent-Type:application/json -d '[1, 2]' http://localhost:3000/endpoint"
+        result = curl.parse_curl(command)
+        self.assertEqual(result["method"], "post")
+        self.assertEqual(result["headers"], {"Content-Type": "application/json"})
+        self.assertEqual(result["data"], [1, 2])
+        self.assertEqual(result["auth"], {"user": "user", "password": "pass"})
+
+    def test_unknown_option_value_is_not_url(self):
+        result = curl.parse_curl("curl --oauth2-bearer TOKEN https://api.example.com/users?page=1")
+        self.assertEqual(result["url"], "https://api.example.com/users")
+        self.assertEqual(result["queries"], {"page": "1"})
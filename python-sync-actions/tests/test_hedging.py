@@ -0,0 +1,37 @@
+import unittest
+
+from http_generic.hedging import HedgePolicy
+
+
+class TestHedgePolicy(unittest.TestCase):
+    def test_delay_percentile(self):
+        policy = HedgePolicy(max_hedges=2, percentile=0.9)
+        for latency in range(1, 10):
+            policy.observe("api.example.com/users/{}", latency / 10)
+        # not enough samples yet
+        self.assertIsNone(policy.delay("api.example.com/users/{}"))
+
+        for latency in range(10, 21):
+            policy.observe("api.example.com/users/{}", latency / 10)
+        self.assertEqual(policy.delay("api.example.com/users/{}"), 1.8)
+        self.assertIsNone(policy.delay("api.example.com/orders"))
+
+    def test_hedge_cap(self):
+        policy = HedgePolicy(max_hedges=2, min_samples=1)
+        policy.observe("api.example.com/users", 0.1)
+        self.assertTrue(policy.acquire())
+        self.assertTrue(policy.acquire())
+        self.assertFalse(policy.acquire())
+        # no more requests are hedged once the cap is spent
+        self.assertIsNone(policy.delay("api.example.com/users"))
+        self.assertEqual(policy.to_dict(), {"hedges": 2, "wins": 0})
+
+    def test_disabled(self):
+        policy = HedgePolicy(max_hedges=0, min_samples=1)
+        policy.observe("api.example.com/users", 0.1)
+        self.assertFalse(policy.enabled)
+        self.assertIsNone(policy.delay("api.example.com/users"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import json
+import unittest
+
+from http_generic.json_stream import JsonStreamParser
+
+
+class TestJsonStreamParser(unittest.TestCase):
+    DOCUMENT = {
+        "meta": {"skipped": [1, 2, {"tricky": '}]"['}], "total": 12345},
+        "data": {"items": [{"id": i, "name": "žluťoučký kůň"} for i in range(50)]},
+        "after": 1.5e10,
+    }
+
+    def _get_parser(self, chunk_size: int) -> JsonStreamParser:
+        raw = json.dumps(self.DOCUMENT, ensure_ascii=False).encode("utf-8")
+        return JsonStreamParser(raw[i : i + chunk_size] for i in range(0, len(raw), chunk_size))
+
+    def test_iter_nested_array(self):
+        for chunk_size in (1, 3, 64, 1024 * 1024):
+            parser = self._get_parser(chunk_size)
+            self.assertTrue(parser.find(["data", "items"]))
+            self.assertTrue(parser.is_array())
+            self.assertEqual(list(parser.iter_array()), self.DOCUMENT["data"]["items"])
+
+    def test_read_scalar_split_across_chunks(self):
+        parser = self._get_parser(2)
+        self.assertTrue(parser.find(["meta", "total"]))
+        self.assertFalse(parser.is_array())
+        self.assertEqual(parser.read_value(), 12345)
+
+    def test_path_not_found(self):
+        self.assertFalse(self._get_parser(16).find(["data", "missing"]))
+        self.assertFalse(self._get_parser(16).find(["after", "nested"]))
+
+    def test_root(self):
+        parser = self._get_parser(16)
+        self.assertTrue(parser.find([]))
+        self.assertEqual(parser.read_value(), self.DOCUMENT)
+
+    def test_early_stop_reads_only_prefix(self):
+        raw = json.dumps([{"id": i} for i in range(10000)]).encode("utf-8")
+        read_chunks = []
+
+        def chunks():
+            for i in range(0, len(raw), 1024):
+                read_chunks.append(i)
+                yield raw[i : i + 1024]
+
+        parser = JsonStreamParser(chunks())
+        elements = parser.iter_array()
+        self.assertEqual([next(elements) for _ in range(5)], [{"id": i} for i in range(5)])
+        self.assertLess(len(read_chunks), 5)
+
+    def test_empty_array(self):
+        parser = JsonStreamParser([b" [ ", b" ] "])
+        self.assertTrue(parser.is_array())
+        self.assertEqual(list(parser.iter_array()), [])
+
+    def test_invalid_document(self):
+        parser = JsonStreamParser([b'{"data": [1, 2', b", }"])
+        self.assertTrue(parser.find(["data"]))
+        with self.assertRaises(json.JSONDecodeError):
+            list(parser.iter_array())
+
+
+if __name__ == "__main__":
+    unittest.main()
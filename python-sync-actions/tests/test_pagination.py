@@ -0,0 +1,328 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+from http_generic.pagination import Page, PageRequest, PaginationBuilder, StopConditions
+
+
+class TestPagination(unittest.TestCase):
+    @staticmethod
+    def _paginate(config: dict, responses: list, job_params: dict = None, data_field: str = None):
+        """
+        Iterate the pages of the scroller against the list of response bodies
+        Returns:
+            list of (endpoint, method, params) of the sent requests
+        """
+        scroller = PaginationBuilder.get_paginator(config.get("method"), config)
+        requests = []
+        bodies = iter(responses)
+
+        def fetch(page_request: PageRequest) -> Page:
+            params = page_request.build_params(job_params or {})
+            requests.append((page_request.endpoint_path, page_request.method, params))
+            response = MagicMock()
+            response.json.return_value = next(bodies)
+            data = response.json.return_value
+            records = data[data_field] if data_field else data
+            return Page(page_request, params, response, records)
+
+        pages = list(scroller.iter_pages(fetch))
+        return requests, pages
+
+    def test_offset_underflow(self):
+        requests, pages = self._paginate(
+            {"method": "offset", "limit": "2"}, [[{"id": 1}, {"id": 2}], [{"id": 3}, {"id": 4}], [{"id": 5}]]
+        )
+        self.assertEqual(
+            [params for _, _, params in requests],
+            [{"offset": 0, "limit": "2"}, {"offset": 2, "limit": 2}, {"offset": 4, "limit": 2}],
+        )
+
+    def test_offset_from_job(self):
+        requests, _ = self._paginate(
+            {"method": "offset", "limitParam": "count", "offsetParam": "skip", "offsetFromJob": True, "limit": "20"},
+            [{"items": [{"id": 1}] * 5}, {"items": [{"id": 2}] * 2}],
+            job_params={"count": 5, "skip": 2},
+            data_field="items",
+        )
+        self.assertEqual([params for _, _, params in requests], [{"count": 5, "skip": 2}, {"count": 5, "skip": 7}])
+
+    def test_pagenum_empty_page(self):
+        requests, _ = self._paginate(
+            {
+                "method": "pagenum",
+                "limit": 200,
+                "limitParam": "count",
+                "pageParam": "set",
+                "firstPage": 0,
+                "firstPageParams": False,
+            },
+            [{"items": [{"id": 1}, {"id": 2}]}, {"items": [{"id": 3}, {"id": 4}]}, {"items": []}],
+            job_params={"count": 2},
+            data_field="items",
+        )
+        self.assertEqual(
+            [params for _, _, params in requests],
+            [{"count": 2}, {"count": 2, "set": 1}, {"count": 2, "set": 2}],
+        )
+
+    def test_cursor_reverse(self):
+        requests, _ = self._paginate(
+            {"method": "cursor", "idKey": "id", "param": "startWith", "increment": -1, "reverse": True},
+            [{"items": [{"id": 345}, {"id": 456}]}, {"items": [{"id": 123}, {"id": 234}]}, {"items": []}],
+            job_params={"startWith": "last", "account": "123"},
+            data_field="items",
+        )
+        self.assertEqual(
+            [params for _, _, params in requests],
+            [
+                {"startWith": "last", "account": "123"},
+                {"startWith": 344, "account": "123"},
+                {"startWith": 122, "account": "123"},
+            ],
+        )
+
+    def test_response_url(self):
+        requests, _ = self._paginate(
+            {"method": "response.url", "urlKey": "links.next", "includeParams": True},
+            [{"items": [{"id": 1}], "links": {"next": "/users?page=2"}}, {"items": [{"id": 2}], "links": {}}],
+            job_params={"account": 123},
+            data_field="items",
+        )
+        self.assertEqual(requests, [(None, None, {"account": 123}), ("/users?page=2", None, {"account": 123})])
+
+    def test_response_url_default_key(self):
+        requests, _ = self._paginate(
+            {"method": "response.url"},
+            [{"items": [{"id": 1}], "next_page": "/users?page=2"}, {"items": [{"id": 2}]}],
+            data_field="items",
+        )
+        self.assertEqual([endpoint for endpoint, _, _ in requests], [None, "/users?page=2"])
+
+    def test_response_url_param_is_query(self):
+        requests, _ = self._paginate(
+            {"method": "response.url", "urlKey": "links.next", "paramIsQuery": True, "includeParams": True},
+            [{"items": [{"id": 1}], "links": {"next": "?page=2"}}, {"items": [{"id": 2}], "links": {"next": None}}],
+            job_params={"account": 123, "page": "start"},
+            data_field="items",
+        )
+        self.assertEqual(requests[1], (None, None, {"account": 123, "page": "2"}))
+
+    def test_response_param_scroll_request(self):
+        requests, _ = self._paginate(
+            {
+                "method": "response.param",
+                "responseParam": "scroll.token",
+                "queryParam": "scrollToken",
+                "scrollRequest": {"endpoint": "results", "method": "GET"},
+            },
+            [
+                {"items": [{"id": 1}], "scroll": {"token": "a"}},
+                {"items": [{"id": 2}], "scroll": {"token": "b"}},
+                {"items": [], "scroll": {"token": "c"}},
+            ],
+            job_params={"object": "users"},
+            data_field="items",
+        )
+        self.assertEqual(
+            requests,
+            [
+                (None, None, {"object": "users"}),
+                ("results", "GET", {"scrollToken": "a"}),
+                ("results", "GET", {"scrollToken": "b"}),
+            ],
+        )
+
+    def test_next_page_flag(self):
+        requests, _ = self._paginate(
+            {"method": "offset", "limit": "1", "nextPageFlag": {"field": "hasMore", "stopOn": False}},
+            [{"hasMore": True, "items": [{"id": 1}]}, {"hasMore": False, "items": [{"id": 2}]}],
+            data_field="items",
+        )
+        self.assertEqual(len(requests), 2)
+
+    def test_next_page_flag_string_values(self):
+        # doc/examples 046-next-page-flag-has-more-2 and 047-next-page-flag-is-last
+        for field, value in (("hasMore", "no"), ("isLast", "yes")):
+            requests, _ = self._paginate(
+                {
+                    "method": "offset",
+                    "limit": "2",
+                    "nextPageFlag": {"field": field, "stopOn": True, "ifNotSet": False},
+                },
+                [
+                    {"items": [{"id": 123}, {"id": 234}]},
+                    {field: value, "items": [{"id": 345}, {"id": 456}]},
+                    {"items": [{"id": 567}, {"id": 678}]},
+                ],
+                data_field="items",
+            )
+            self.assertEqual(
+                [params for _, _, params in requests], [{"offset": 0, "limit": "2"}, {"offset": 2, "limit": 2}]
+            )
+
+    def test_next_page_flag_if_not_set(self):
+        requests, _ = self._paginate(
+            {"method": "offset", "limit": "1", "nextPageFlag": {"field": "isLast", "stopOn": True, "ifNotSet": False}},
+            [[{"id": 1}], [{"id": 2}], []],
+        )
+        self.assertEqual(len(requests), 3)
+
+    def test_limit_stop_field(self):
+        requests, _ = self._paginate(
+            {"method": "offset", "limit": "2", "limitStop": {"field": "scroller.count"}},
+            [{"items": [{"id": i}, {"id": i + 1}], "scroller": {"count": 4}} for i in range(0, 6, 2)],
+            data_field="items",
+        )
+        self.assertEqual(len(requests), 2)
+
+    def test_force_stop_pages(self):
+        requests, _ = self._paginate(
+            {"method": "pagenum", "forceStop": {"pages": 3}}, [[{"id": i}] for i in range(5)], job_params={}
+        )
+        self.assertEqual([params for _, _, params in requests], [{"page": 1}, {"page": 2}, {"page": 3}])
+
+    def test_pagenum_first_page_params(self):
+        # doc/examples 051-pagination-pagenum-basic and 052-pagination-pagenum-rename
+        requests, _ = self._paginate({"method": "pagenum"}, [[{"id": 1}], [{"id": 2}], []])
+        self.assertEqual([params for _, _, params in requests], [{"page": 1}, {"page": 2}, {"page": 3}])
+
+        requests, _ = self._paginate(
+            {"method": "pagenum", "limit": 2, "limitParam": "count", "pageParam": "set"},
+            [[{"id": 1}, {"id": 2}], [{"id": 3}, {"id": 4}], [{"id": 5}]],
+        )
+        self.assertEqual(
+            [params for _, _, params in requests],
+            [{"set": 1, "count": 2}, {"set": 2, "count": 2}, {"set": 3, "count": 2}],
+        )
+
+    def test_stop_on_same_page(self):
+        first = [{"id": 123}, {"id": 234}]
+        second = [{"id": 345}, {"id": 456}]
+        requests, pages = self._paginate({"method": "offset", "limit": "2"}, [first, second, second, second])
+        self.assertEqual(len(requests), 3)
+        self.assertEqual([page.records for page in pages], [first, second])
+
+        # only the previous page is compared
+        requests, pages = self._paginate({"method": "offset", "limit": "2"}, [first, second, first, first])
+        self.assertEqual([page.records for page in pages], [first, second, first])
+
+    def test_fingerprint(self):
+        def page(records):
+            return Page(PageRequest(), {}, MagicMock(), records)
+
+        self.assertEqual(page([{"id": 1}]).fingerprint, page([{"id": 1}]).fingerprint)
+        self.assertNotEqual(page([{"id": 1}]).fingerprint, page([{"id": 2}]).fingerprint)
+        self.assertNotEqual(page(["ab"]).fingerprint, page(["a", "b"]).fingerprint)
+        self.assertEqual(len(page({"id": 1}).fingerprint), 16)
+
+    def test_lazy_iteration(self):
+        scroller = PaginationBuilder.get_paginator("pagenum", {"method": "pagenum"})
+        fetched = []
+
+        def fetch(page_request):
+            fetched.append(page_request)
+            response = MagicMock()
+            return Page(page_request, page_request.build_params({}), response, [{"id": 1}])
+
+        pages = scroller.iter_pages(fetch)
+        next(pages)
+        self.assertEqual(len(fetched), 1)
+
+    def test_force_stop_time(self):
+        clock = iter([0, 10, 301])
+        stop = StopConditions({"forceStop": {"time": "5 minutes"}}, clock=lambda: next(clock))
+        page = Page(PageRequest(), {}, MagicMock(), [{"id": 1}])
+        self.assertFalse(stop.is_reached(page))
+        self.assertTrue(stop.is_reached(page))
+
+    def test_legacy_page_params(self):
+        paginator = PaginationBuilder.get_paginator("offset")
+        self.assertEqual(paginator.get_page_params({"limit": 10}), {"offset": 0, "limit": 10})
+        self.assertEqual(PaginationBuilder.get_paginator("unknown").get_page_params({}), {})
+
+    def test_prefetch_offset(self):
+        scroller = PaginationBuilder.get_paginator("offset", {"method": "offset", "limit": 2})
+        records = [{"id": i} for i in range(7)]
+        sent = []
+        running = []
+        max_running = []
+        lock = threading.Lock()
+
+        def fetch(page_request):
+            params = page_request.build_params({})
+            with lock:
+                sent.append(params["offset"])
+                running.append(params["offset"])
+                max_running.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.remove(params["offset"])
+            response = MagicMock()
+            return Page(page_request, params, response, records[params["offset"] : params["offset"] + 2])
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            pages = list(scroller.iter_pages(fetch, executor=executor, prefetch=3))
+
+        self.assertEqual([page.params["offset"] for page in pages], [0, 2, 4, 6])
+        self.assertGreater(max(max_running), 1)
+        # the pages after the underflow were requested in advance and discarded
+        self.assertEqual(sorted(sent)[:4], [0, 2, 4, 6])
+        for page in pages:
+            page.response.close.assert_not_called()
+
+    def test_prefetch_max_pages(self):
+        scroller = PaginationBuilder.get_paginator("pagenum", {"method": "pagenum", "firstPageParams": True})
+        sent = []
+
+        def fetch(page_request):
+            params = page_request.build_params({})
+            sent.append(params["page"])
+            return Page(page_request, params, MagicMock(), [{"id": params["page"]}])
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            pages = list(scroller.iter_pages(fetch, max_pages=3, executor=executor, prefetch=5))
+
+        self.assertEqual([page.params["page"] for page in pages], [1, 2, 3])
+        self.assertEqual(sorted(sent), [1, 2, 3])
+
+    def test_prefetch_pagenum_limit(self):
+        scroller = PaginationBuilder.get_paginator(
+            "pagenum", {"method": "pagenum", "firstPageParams": True, "limit": 2, "limitParam": "count"}
+        )
+        records = [{"id": i} for i in range(9)]
+        sent = []
+
+        def fetch(page_request):
+            params = page_request.build_params({})
+            sent.append(params["page"])
+            start = (params["page"] - 1) * params["count"]
+            return Page(page_request, params, MagicMock(), records[start : start + params["count"]])
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            pages = list(scroller.iter_pages(fetch, executor=executor, prefetch=2))
+
+        self.assertEqual([page.params for page in pages], [{"page": i, "count": 2} for i in range(1, 6)])
+        # every predicted page matched the requested one, none was fetched twice
+        self.assertEqual(len(sent), len(set(sent)))
+
+    def test_prefetch_discarded_on_stop(self):
+        scroller = PaginationBuilder.get_paginator(
+            "pagenum", {"method": "pagenum", "firstPageParams": True, "limitStop": {"count": 2}}
+        )
+        responses = {}
+
+        def fetch(page_request):
+            params = page_request.build_params({})
+            responses[params["page"]] = MagicMock()
+            return Page(page_request, params, responses[params["page"]], [{"id": params["page"]}])
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            pages = list(scroller.iter_pages(fetch, executor=executor, prefetch=3))
+
+        self.assertEqual(len(pages), 2)
+        for page_number, response in responses.items():
+            if page_number > 2:
+                response.close.assert_called_once()
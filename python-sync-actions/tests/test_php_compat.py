@@ -0,0 +1,140 @@
+import unittest
+
+from php_compat import php_bool, php_date, php_hash, php_hash_hmac, php_strtotime
+
+# 2021-01-01 01:02:03 UTC, Friday
+BASE_TIME = 1609462923
+
+# expected values produced by PHP 7.4 with date.timezone = UTC
+STRTOTIME_CORPUS = [
+    ("now", 1609462923),
+    ("today", 1609459200),
+    ("midnight", 1609459200),
+    ("noon", 1609502400),
+    ("tomorrow", 1609545600),
+    ("yesterday", 1609372800),
+    ("yesterday noon", 1609416000),
+    ("+1 day", 1609549323),
+    ("-2 day", 1609290123),
+    ("-7 days", 1608858123),
+    ("+1 week 2 days", 1610240523),
+    ("2 weeks ago", 1608253323),
+    ("3 days ago", 1609203723),
+    ("+1 day -3 hours", 1609538523),
+    ("+90 minutes", 1609468323),
+    ("-30 sec", 1609462893),
+    ("+1 month", 1612141323),
+    ("next month", 1612141323),
+    ("last month", 1606784523),
+    ("next year", 1640998923),
+    ("1 year 2 months ago", 1572570123),
+    ("first day of next month", 1612141323),
+    ("first day of previous month", 1606784523),
+    ("last day of next month", 1614474123),
+    ("last day of february 2024", 1709164800),
+    ("monday", 1609718400),
+    ("next monday", 1609718400),
+    ("last monday", 1609113600),
+    ("friday", 1609459200),
+    ("this friday", 1609459200),
+    ("next friday", 1610064000),
+    ("last sunday", 1609027200),
+    ("next monday 10:30", 1609756200),
+    ("tomorrow 10:00", 1609581600),
+    ("-1 month midnight", 1606780800),
+    ("2021-03-04", 1614816000),
+    ("2021-03-04 10:20", 1614853200),
+    ("2021-03-04 10:20:30", 1614853230),
+    ("2021-03-04T10:20:30Z", 1614853230),
+    ("2021-03-04T10:20:30+02:00", 1614846030),
+    ("2021-01-01 10:00 +0100", 1609491600),
+    ("2021/02/03", 1612310400),
+    ("03/15/2021", 1615766400),
+    ("15-03-2021", 1615766400),
+    ("15.03.2021", 1615766400),
+    ("1 January 2021", 1609459200),
+    ("Jan 15, 2020", 1579046400),
+    ("December 25 2020 5pm", 1608915600),
+    ("2021-01-31 +1 month", 1614729600),
+    ("2020-02-29 +1 year", 1614556800),
+    ("2021-01-01 -2 days", 1609286400),
+    ("10am", 1609495200),
+    ("10:00", 1609495200),
+    ("@86400", 86400),
+]
+
+DATE_CORPUS = [
+    ("Y-m-d", "2021-01-01"),
+    ("Y-m-d H:i:s", "2021-01-01 01:02:03"),
+    ("Y-m-d\\TH:i:sP", "2021-01-01T01:02:03+00:00"),
+    ("d-m-Y", "01-01-2021"),
+    ("D, d M Y", "Fri, 01 Jan 2021"),
+    ("l jS \\o\\f F Y h:i:s A", "Friday 1st of January 2021 01:02:03 AM"),
+    ("N w z W t L o y", "5 5 0 53 31 0 2020 21"),
+    ("g G a B", "1 1 am 084"),
+    ("U", "1609462923"),
+    ("c", "2021-01-01T01:02:03+00:00"),
+    ("r", "Fri, 01 Jan 2021 01:02:03 +0000"),
+    ("e T O Z", "UTC UTC +0000 0"),
+]
+
+HASH_CORPUS = [
+    ("md5", "NotSoSecret", "1228d3ff5089f27721f1e0403ad86e73"),
+    ("sha1", "NotSoSecret", "64d5d2977cc2573afbd187ff5e71d1529fd7f6d8"),
+    ("sha256", "abc", "ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad"),
+    ("sha512/256", "abc", "53048e2681941ef99b2e29b76b4c7dabe4c2d0c634fc6d46e0e2f13107e7af23"),
+    ("sha3-256", "abc", "3a985da74fe225b2045c172d6bd390bd855f086e3e9d525b46bfe24511431532"),
+    ("crc32b", "The quick brown fox jumped over the lazy dog.", "82a34642"),
+]
+
+HASH_HMAC_CORPUS = [
+    ("sha256", "12345abcd5678efgh90ijk", "TeaPot", "7bd4ec99a609b3a9b1f79bc155037cf70939f6bff50b0012fc49e350586bf554"),
+    (
+        "sha256",
+        "key",
+        "The quick brown fox jumps over the lazy dog",
+        "f7bc83f430538424b13298e6aa6fb143ef4d59a14946175997479dbc2d1a3cd8",
+    ),
+    ("md5", "key", "The quick brown fox jumps over the lazy dog", "80070713463e7749b90c2dc24911e275"),
+    ("sha1", "key", "The quick brown fox jumps over the lazy dog", "de7c9b85b8b78aa6bc8a7a36f70a90701c9db4d9"),
+]
+
+
+class TestPhpCompat(unittest.TestCase):
+    def test_strtotime_parity(self):
+        for string, expected in STRTOTIME_CORPUS:
+            with self.subTest(string=string):
+                self.assertEqual(php_strtotime(string, BASE_TIME), expected)
+
+    def test_strtotime_invalid(self):
+        for string in ["garbage", "2021-13-01", "25:00"]:
+            with self.subTest(string=string):
+                with self.assertRaises(ValueError):
+                    php_strtotime(string, BASE_TIME)
+
+    def test_date_parity(self):
+        for format_string, expected in DATE_CORPUS:
+            with self.subTest(format_string=format_string):
+                self.assertEqual(php_date(format_string, BASE_TIME), expected)
+
+    def test_hash_parity(self):
+        for algorithm, message, expected in HASH_CORPUS:
+            with self.subTest(algorithm=algorithm):
+                self.assertEqual(php_hash(algorithm, message), expected)
+
+    def test_hash_hmac_parity(self):
+        for algorithm, key, message, expected in HASH_HMAC_CORPUS:
+            with self.subTest(algorithm=algorithm):
+                self.assertEqual(php_hash_hmac(algorithm, key, message), expected)
+
+    def test_bool(self):
+        for value in ("", "0", 0, 0.0, None, [], {}, False):
+            self.assertFalse(php_bool(value), value)
+        for value in ("no", "false", "0.0", " ", 1, -1, [0], {"a": None}, True):
+            self.assertTrue(php_bool(value), value)
+
+    def test_unsupported_algorithm(self):
+        with self.assertRaises(ValueError):
+            php_hash("nonexistent", "abc")
+        with self.assertRaises(ValueError):
+            php_hash_hmac("crc32b", "key", "abc")
@@ -0,0 +1,108 @@
+import unittest
+from email.utils import formatdate
+from unittest.mock import MagicMock, patch
+
+from urllib3 import HTTPResponse
+from urllib3.exceptions import MaxRetryError
+
+from http_generic.budget import BudgetExhaustedError
+from http_generic.rate_limit import RateLimiter, RateLimitRetry, host_key, parse_delay
+from http_generic.retry import BudgetedRetry
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.clock = _FakeClock()
+        self.limiter = RateLimiter("X-RetryAfter", clock=self.clock, sleep=self.clock.sleep)
+
+    def test_parse_delay(self):
+        self.assertEqual(parse_delay("5", now=1000), 5)
+        self.assertEqual(parse_delay("1700000030", now=1700000000), 30)
+        self.assertEqual(parse_delay(formatdate(1700000060, usegmt=True), now=1700000000), 60)
+        self.assertEqual(parse_delay("-5", now=1000), 0)
+        self.assertIsNone(parse_delay("soon", now=1000))
+
+    def test_unknown_limit(self):
+        for _ in range(100):
+            self.limiter.acquire("api.example.com")
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_remaining_requests(self):
+        self.limiter.observe("api.example.com", {"X-RateLimit-Remaining": "2", "X-RateLimit-Reset": "10"})
+        self.limiter.acquire("api.example.com")
+        self.limiter.acquire("api.example.com")
+        self.assertEqual(self.clock.sleeps, [])
+
+        # the third request waits for the next window
+        self.limiter.acquire("api.example.com")
+        self.assertEqual(self.clock.sleeps, [10])
+        self.assertEqual(self.limiter.waited, 10)
+
+        # other hosts are not limited
+        self.limiter.observe("other.example.com", {"RateLimit-Remaining": "0", "RateLimit-Reset": "30"})
+        self.limiter.acquire("api.example.com")
+        self.assertEqual(self.clock.sleeps, [10])
+
+    def test_out_of_order_responses(self):
+        self.limiter.observe("api.example.com", {"X-RateLimit-Remaining": "1", "X-RateLimit-Reset": "10"})
+        # older response of the same window does not return the tokens
+        self.limiter.observe("api.example.com", {"X-RateLimit-Remaining": "5", "X-RateLimit-Reset": "9.5"})
+        self.limiter.acquire("api.example.com")
+        self.limiter.acquire("api.example.com")
+        self.assertEqual(self.clock.sleeps, [10])
+
+    def test_pause(self):
+        self.limiter.pause("api.example.com", 3)
+        self.limiter.acquire("api.example.com")
+        self.assertEqual(self.clock.sleeps, [3])
+
+    def test_retry_pauses_host(self):
+        retry = RateLimitRetry(total=3, status_forcelist=(429,), rate_limiter=self.limiter)
+        response = HTTPResponse(headers={"X-RetryAfter": "4"}, status=429, preload_content=False)
+        pool = MagicMock(host="API.example.com")
+        retry = retry.increment("GET", "/users", response=response, _pool=pool)
+
+        self.assertIs(retry.rate_limiter, self.limiter)
+        self.assertEqual(retry.get_retry_after(response), 4)
+        with patch("urllib3.util.retry.time.sleep"):
+            retry.sleep(response)
+        self.limiter.acquire(host_key("https://api.example.com/orders"))
+        self.assertEqual(self.clock.sleeps, [4])
+
+    def test_retry_given_up_does_not_pause(self):
+        retry = BudgetedRetry(total=3, status_forcelist=(429,), rate_limiter=self.limiter, max_retry_time=10)
+        response = HTTPResponse(headers={"X-RetryAfter": "3600"}, status=429, preload_content=False)
+        with self.assertRaises(MaxRetryError):
+            retry.increment("GET", "/users", response=response, _pool=MagicMock(host="api.example.com"))
+
+        self.limiter.acquire("api.example.com")
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_wait_past_deadline(self):
+        limiter = RateLimiter(deadline=20, clock=self.clock, sleep=self.clock.sleep)
+        limiter.pause("api.example.com", 3600)
+        with self.assertRaises(BudgetExhaustedError):
+            limiter.acquire("api.example.com")
+        self.assertEqual(self.clock.sleeps, [])
+
+        # the window end within the deadline is waited for
+        limiter.observe("other.example.com", {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "10"})
+        limiter.acquire("other.example.com")
+        self.assertEqual(self.clock.sleeps, [10])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+from redaction import SecretsRedactor
+
+
+class TestSecretsRedactor(unittest.TestCase):
+    def test_redact_text(self):
+        redactor = SecretsRedactor(["secret", "token123"])
+        self.assertEqual(
+            redactor.redact_text("Bearer token123, password=secret"), "Bearer --HIDDEN--, password=--HIDDEN--"
+        )
+
+    def test_redact_bytes(self):
+        redactor = SecretsRedactor(["secret", "žluťoučký"])
+        self.assertEqual(
+            redactor.redact_bytes('{"a": "secret", "b": "žluťoučký"}'.encode("utf-8")),
+            b'{"a": "--HIDDEN--", "b": "--HIDDEN--"}',
+        )
+
+    def test_longest_secret_wins(self):
+        redactor = SecretsRedactor(["abc", "abcdef"])
+        self.assertEqual(redactor.redact_text("xabcdefx abc"), "x--HIDDEN--x --HIDDEN--")
+
+    def test_special_characters(self):
+        redactor = SecretsRedactor(["a.b*c", "(x|y)"])
+        self.assertEqual(redactor.redact_text("a.b*c axbbc (x|y) x"), "--HIDDEN-- axbbc --HIDDEN-- x")
+
+    def test_redact_nested(self):
+        redactor = SecretsRedactor(["secret"], replacement="***")
+        data = {"secret_key": ["secret", ("a secret", 1)], "other": {"secret"}, "number": 5, "none": None}
+        expected = {"***_key": ["***", ("a ***", 1)], "other": {"***"}, "number": 5, "none": None}
+        self.assertEqual(redactor.redact(data), expected)
+
+    def test_ignores_empty_and_non_string_secrets(self):
+        redactor = SecretsRedactor(["", None, {"function": "concat"}, 1234])
+        self.assertEqual(redactor.redact_text("pin 1234"), "pin --HIDDEN--")
+        self.assertEqual(SecretsRedactor([""]).redact("unchanged"), "unchanged")
+
+
+if __name__ == "__main__":
+    unittest.main()
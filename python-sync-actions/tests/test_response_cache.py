@@ -0,0 +1,129 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+import requests
+
+from http_generic.response_cache import ResponseCache, build_cache_key
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "cache.sqlite")
+        self.now = 1000
+
+    def _cache(self, **kwargs) -> ResponseCache:
+        return ResponseCache(ttl=60, path=self.path, clock=lambda: self.now, **kwargs)
+
+    @staticmethod
+    def _response(body: bytes) -> requests.Response:
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.headers["Content-Type"] = "application/json"
+        response.url = "https://example.com/users"
+        response._content = body
+        return response
+
+    def test_key(self):
+        key = build_cache_key("get", "https://example.com", {"a": 1, "b": 2}, {"Accept": "json"})
+        self.assertEqual(key, build_cache_key("GET", "https://example.com", {"b": 2, "a": 1}, {"accept": "json"}))
+        self.assertNotEqual(key, build_cache_key("GET", "https://example.com", {"a": 1, "b": 3}, {"Accept": "json"}))
+        self.assertNotEqual(key, build_cache_key("POST", "https://example.com", {"a": 1, "b": 2}, {"Accept": "json"}))
+        self.assertNotEqual(key, build_cache_key("GET", "https://example.com", {"a": 1, "b": 2}, {}, body={"x": 1}))
+
+        # the credentials separate the scopes
+        headers = {"Authorization": "Bearer a"}
+        self.assertEqual(
+            build_cache_key("GET", "https://example.com", headers=headers),
+            build_cache_key("GET", "https://example.com", headers={"authorization": "Bearer a"}),
+        )
+        self.assertNotEqual(
+            build_cache_key("GET", "https://example.com", headers=headers),
+            build_cache_key("GET", "https://example.com", headers={"Authorization": "Bearer b"}),
+        )
+        self.assertNotEqual(
+            build_cache_key("GET", "https://example.com", auth_scope=b"a"),
+            build_cache_key("GET", "https://example.com", auth_scope=b"b"),
+        )
+
+    def test_roundtrip_and_ttl(self):
+        self._cache().set("key", self._response(b'{"id": 1}'))
+
+        cached = self._cache().get("key")
+        self.assertEqual(cached.json(), {"id": 1})
+        self.assertEqual(cached.headers["content-type"], "application/json")
+        self.assertTrue(cached.from_cache)
+
+        self.now += 60
+        self.assertIsNone(self._cache().get("key"))
+
+    def test_encrypted(self):
+        key = build_cache_key("GET", "https://example.com/users", headers={"Authorization": "Bearer secret"})
+        response = self._response(b'{"token": "abc"}')
+        response.headers["ETag"] = '"v1"'
+        self._cache().set(key, response)
+
+        with sqlite3.connect(self.path) as connection:
+            (row,) = connection.execute("SELECT * FROM responses").fetchall()
+        stored = b"".join(value if isinstance(value, bytes) else str(value).encode() for value in row)
+        for plain in (key.encode(), b"abc", b"example.com", b"v1"):
+            self.assertNotIn(plain, stored)
+        # the other credentials can't read the response
+        other = build_cache_key("GET", "https://example.com/users", headers={"Authorization": "Bearer other"})
+        self.assertIsNone(self._cache().get(other))
+        self.assertEqual(self._cache().get(key).json(), {"token": "abc"})
+
+    def test_tampered_entry(self):
+        self._cache().set("key", self._response(b'{"id": 1}'))
+        with sqlite3.connect(self.path) as connection:
+            (body,) = connection.execute("SELECT body FROM responses").fetchone()
+            body = bytearray(body)
+            body[20] ^= 1
+            connection.execute("UPDATE responses SET body = ?", (bytes(body),))
+
+        self.assertIsNone(self._cache().get("key"))
+
+    def test_lru_eviction(self):
+        cache = self._cache(max_size=10)
+        cache.set("a", self._response(b"aaaa"))
+        self.now += 1
+        cache.set("b", self._response(b"bbbb"))
+        self.now += 1
+        # access makes "a" the most recently used one
+        cache.get("a")
+        self.now += 1
+        cache.set("c", self._response(b"cccc"))
+
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("c"))
+
+    def test_revalidation(self):
+        cache = self._cache(max_size=100)
+        response = self._response(b'{"id": 1}')
+        response.headers["ETag"] = '"v1"'
+        response.headers["Last-Modified"] = "Fri, 01 Jan 2021 00:00:00 GMT"
+        cache.set("key", response)
+        cache.set("plain", self._response(b"{}"))
+
+        self.now += 120
+        cache.set("other", self._response(b"{}"))
+        # only the expired responses with validators are kept
+        self.assertEqual(cache.get_validators("plain"), {})
+        self.assertEqual(
+            cache.get_validators("key"),
+            {"If-None-Match": '"v1"', "If-Modified-Since": "Fri, 01 Jan 2021 00:00:00 GMT"},
+        )
+        self.assertIsNone(cache.get("key"))
+
+        not_modified = requests.Response()
+        not_modified.status_code = 304
+        not_modified.headers["ETag"] = '"v2"'
+        revalidated = cache.revalidate("key", not_modified)
+        self.assertEqual(revalidated.status_code, 200)
+        self.assertEqual(revalidated.json(), {"id": 1})
+        self.assertEqual(revalidated.headers["etag"], '"v2"')
+        self.assertEqual(cache.get("key").headers["content-type"], "application/json")
+        self.assertEqual(cache.get_validators("key")["If-None-Match"], '"v2"')
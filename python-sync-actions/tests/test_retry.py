@@ -0,0 +1,62 @@
+import time
+import unittest
+
+from urllib3 import HTTPResponse
+from urllib3.exceptions import MaxRetryError
+
+from http_generic.retry import BudgetedRetry, RetryBudget
+
+
+def _response(status: int = 503, headers: dict | None = None) -> HTTPResponse:
+    return HTTPResponse(headers=headers or {}, status=status, preload_content=False)
+
+
+class TestBudgetedRetry(unittest.TestCase):
+    def test_decorrelated_jitter(self):
+        retry = BudgetedRetry(total=20, status_forcelist=(503,), backoff_factor=1, backoff_max=10)
+        previous = 1
+        for _ in range(20):
+            retry = retry.increment("GET", "/users", response=_response())
+            self.assertGreaterEqual(retry.get_backoff_time(), 1)
+            self.assertLessEqual(retry.get_backoff_time(), min(10, previous * 3))
+            previous = retry.get_backoff_time()
+
+    def test_no_backoff(self):
+        retry = BudgetedRetry(total=3, status_forcelist=(503,), backoff_factor=0)
+        retry = retry.increment("GET", "/users", response=_response())
+        self.assertEqual(retry.get_backoff_time(), 0)
+
+    def test_max_retry_time(self):
+        retry = BudgetedRetry(total=3, status_forcelist=(503,), max_retry_time=10)
+        retry = retry.increment("GET", "/users", response=_response(headers={"Retry-After": "5"}))
+        with self.assertRaisesRegex(MaxRetryError, "retry time limit"):
+            retry.increment("GET", "/users", response=_response(headers={"Retry-After": "20"}))
+
+    def test_retry_budget(self):
+        budget = RetryBudget(max_retries=2)
+        for _ in range(2):
+            retry = BudgetedRetry(total=10, status_forcelist=(503,), retry_budget=budget)
+            retry.increment("GET", "/users", response=_response())
+
+        retry = BudgetedRetry(total=10, status_forcelist=(503,), retry_budget=budget)
+        with self.assertRaisesRegex(MaxRetryError, "retry budget"):
+            retry.increment("GET", "/users", response=_response())
+        self.assertEqual(budget.to_dict(), {"retries": 2, "retry_time": 0.0, "exhausted": True})
+
+    def test_retry_budget_deadline(self):
+        budget = RetryBudget(deadline=time.monotonic() + 1)
+        retry = BudgetedRetry(total=10, status_forcelist=(503,), retry_budget=budget)
+        with self.assertRaises(MaxRetryError):
+            retry.increment("GET", "/users", response=_response(headers={"Retry-After": "5"}))
+
+    def test_retry_time(self):
+        budget = RetryBudget()
+        retry = BudgetedRetry(total=3, status_forcelist=(503,), backoff_factor=0.01, retry_budget=budget)
+        retry = retry.increment("GET", "/users", response=_response())
+        retry.sleep()
+        self.assertEqual(budget.retries, 1)
+        self.assertGreaterEqual(budget.retry_time, 0.01)
+
+
+if __name__ == "__main__":
+    unittest.main()
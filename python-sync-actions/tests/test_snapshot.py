@@ -0,0 +1,44 @@
+import unittest
+
+import requests
+
+from http_generic.snapshot import ResponseSnapshot
+from redaction import SecretsRedactor
+
+
+class TestResponseSnapshot(unittest.TestCase):
+    def _get_response(self, content: bytes, content_type: str = "application/json") -> requests.Response:
+        response = requests.Response()
+        response.status_code = 201
+        response.reason = "Created"
+        response.headers["Content-Type"] = content_type
+        response._content = content
+        response.request = requests.Request(
+            "POST", "http://example.com/items", headers={"X-Token": "s3cr3t"}, json={"token": "s3cr3t"}
+        ).prepare()
+        return response
+
+    def test_from_response(self):
+        snapshot = ResponseSnapshot.from_response(self._get_response(b'{"id": 1}'))
+        self.assertEqual(snapshot.status_code, 201)
+        self.assertEqual(snapshot.reason, "Created")
+        self.assertEqual(snapshot.data(), {"id": 1})
+        self.assertEqual(snapshot.request.method, "POST")
+        self.assertEqual(snapshot.request.body, '{"token": "s3cr3t"}')
+
+    def test_text_body(self):
+        snapshot = ResponseSnapshot.from_response(self._get_response(b"<html>error</html>", "text/html"))
+        self.assertEqual(snapshot.data(), "<html>error</html>")
+
+    def test_redact(self):
+        snapshot = ResponseSnapshot.from_response(self._get_response(b'{"echo": "s3cr3t"}'))
+        redacted = snapshot.redact(SecretsRedactor(["s3cr3t"]))
+        self.assertEqual(redacted.data(), {"echo": "--HIDDEN--"})
+        self.assertEqual(redacted.request.headers["X-Token"], "--HIDDEN--")
+        self.assertEqual(redacted.request.body, '{"token": "--HIDDEN--"}')
+        # the original snapshot is not changed
+        self.assertEqual(snapshot.data(), {"echo": "s3cr3t"})
+
+
+if __name__ == "__main__":
+    unittest.main()
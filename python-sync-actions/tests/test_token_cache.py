@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from http_generic.auth import AuthMethodBuilder
+from http_generic.client import GenericHttpClient
+from http_generic.token_cache import TokenCache, build_cache_key
+
+
+class TestTokenCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.key = build_cache_key("Login", {"#password": "secret"})
+
+    def test_file_roundtrip(self):
+        TokenCache(self.directory).set(self.key, {"token": "abc"}, 2000)
+
+        cache = TokenCache(self.directory, clock=lambda: 1000)
+        self.assertEqual(cache.get(self.key), ({"token": "abc"}, 2000))
+        # the other parameters can't read the token
+        self.assertIsNone(cache.get(build_cache_key("Login", {"#password": "other"})))
+
+        (file_name,) = os.listdir(self.directory)
+        with open(os.path.join(self.directory, file_name), "rb") as file:
+            self.assertNotIn(b"abc", file.read())
+
+    def test_expired(self):
+        TokenCache(self.directory).set(self.key, {"token": "abc"}, 1050)
+
+        self.assertIsNone(TokenCache(self.directory, clock=lambda: 1000).get(self.key))
+        # the expired token is removed
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_tampered_file(self):
+        TokenCache(self.directory).set(self.key, {"token": "abc"}, 2000)
+        (file_name,) = os.listdir(self.directory)
+        path = os.path.join(self.directory, file_name)
+        with open(path, "rb") as file:
+            data = bytearray(file.read())
+        data[20] ^= 1
+        with open(path, "wb") as file:
+            file.write(data)
+
+        self.assertIsNone(TokenCache(self.directory, clock=lambda: 1000).get(self.key))
+
+    def test_client_reuses_token(self):
+        cache = TokenCache(self.directory)
+        transport = MagicMock()
+        transport.return_value.json.return_value = {"access_token": "abc", "expires_in": 3600}
+
+        def build_client():
+            auth_method = AuthMethodBuilder.build(
+                "OAuth20ClientCredentials",
+                login_endpoint="https://example.com/token",
+                client_secret="secret",
+                client_id="id",
+                method="client_secret_post",
+                scopes=[],
+            )
+            return GenericHttpClient("https://example.com", auth_method=auth_method, token_cache=cache)
+
+        with patch.object(GenericHttpClient, "transport", transport):
+            build_client().login()
+            client = build_client()
+            client.login()
+
+        transport.assert_called_once()
+        self.assertEqual(client._auth.auth_header, {"Authorization": "Bearer abc"})
+        self.assertEqual(client._auth.get_secrets(), ["Bearer abc"])